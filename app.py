@@ -1,4 +1,13 @@
+import time
+
+_script_started = time.perf_counter()
+
+import importlib
+import sys
 import streamlit as st
+from components import performance
+from data.master import store
+from utils import profiler
 
 # ✅ Must be the very first Streamlit command
 st.set_page_config(
@@ -7,11 +16,41 @@ st.set_page_config(
     page_icon="📚"
 )
 
-# ------------------ Import Components ------------------
-from components.viewer import show_viewer            # UPDATED name
-from components.admin import show_admin               # UPDATED name
-from components.faculty_view import show_faculty_view
-from components.load_distribution import show_faculty_load_distribution
+# ------------------ Views ------------------
+# Only the selected view's module is imported and run; st.tabs would run
+# every tab body on each rerun even when it is hidden.
+VIEWS = {
+    "📘 View Timetable": ("components.viewer", "show_viewer"),
+    "👨‍🏫 Faculty View": ("components.faculty_view", "show_faculty_view"),
+    "📊 Load Summary": ("components.load_distribution", "show_faculty_load_distribution"),
+    "🛠️ Admin Panel": ("components.admin", "show_admin"),
+}
+if store.read_only:
+    # Read-only replicas serve the viewing tabs only
+    VIEWS.pop("🛠️ Admin Panel")
+
+
+def load_view(module_name, function_name):
+    """Import the view on first use; returns (function, seconds spent importing)."""
+    started = time.perf_counter()
+    first_import = module_name not in sys.modules
+    module = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - started
+    if first_import:
+        st.session_state.setdefault("view_import_timings", {})[module_name] = elapsed
+    return getattr(module, function_name), elapsed
+
+
+def show_timings(timings):
+    with st.sidebar.expander("⏱️ Timing", expanded=False):
+        for label, seconds in timings:
+            st.markdown(f"{label}: `{seconds * 1000:.0f} ms`")
+        first_imports = st.session_state.get("view_import_timings", {})
+        if first_imports:
+            st.markdown("**First import per view**")
+            for module_name, seconds in first_imports.items():
+                st.markdown(f"{module_name}: `{seconds * 1000:.0f} ms`")
+
 
 # ------------------ App Header ------------------
 st.title("📚 NFSU Goa Timetable Manager 2026-27")
@@ -23,23 +62,33 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# ------------------ Tabs ------------------
-tabs = st.tabs([
-    "📘 View Timetable",
-    "👨‍🏫 Faculty View",
-    "📊 Load Summary",
-    "🛠️ Admin Panel"
-])
-
-# ------------------ Tab Routing ------------------
-with tabs[0]:
-    show_viewer()                     # ⬅ updated viewer (subject-code based)
-
-with tabs[1]:
-    show_faculty_view()               # ⬅ faculty timetable (mapping-based)
+# ------------------ Navigation ------------------
+active_view = st.radio(
+    "View",
+    list(VIEWS),
+    horizontal=True,
+    key="active_view",
+    label_visibility="collapsed"
+)
 
-with tabs[2]:
-    show_faculty_load_distribution()  # ⬅ load from subject_faculty_map + timetable
+# ------------------ View Routing ------------------
+profiler.start_run(active_view)
+timings = [("App shell", time.perf_counter() - _script_started)]
+show_view, import_seconds = load_view(*VIEWS[active_view])
+timings.append((f"Import {VIEWS[active_view][0]}", import_seconds))
 
-with tabs[3]:
-    show_admin()                      # ⬅ updated admin (no regex, no hardcoding)
+render_started = time.perf_counter()
+with profiler.span(f"render {VIEWS[active_view][0]}"):
+    if performance.is_enabled() and performance.profile_requested():
+        path = performance.profile_path()
+        with profiler.profile_to(path):
+            show_view()
+        st.session_state["perf_profile_path"] = str(path)
+    else:
+        show_view()
+timings.append((f"Render {active_view}", time.perf_counter() - render_started))
+timings.append(("Total", time.perf_counter() - _script_started))
+profiler.end_run()
+show_timings(timings)
+if performance.is_enabled():
+    performance.show_performance()
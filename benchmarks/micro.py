@@ -0,0 +1,108 @@
+"""Micro-benchmarks over a synthetic data set.
+
+Each entry of ``BENCHMARKS`` takes the generated documents, does its setup
+outside the timed region and returns the zero-argument callable to time.
+"""
+import time
+
+
+def bench_check_clashes(documents):
+    # check_clashes is occupancy.bind + occupancy.clashes on the admin's
+    # module-level index; a fresh index per call measures the full build.
+    from components.occupancy import OccupancyIndex
+
+    timetables = documents["timetable.json"]
+    subject_faculty_map = documents["subject_faculty_map.json"]
+    subject_metadata = documents["subject_metadata.json"]
+
+    def run():
+        index = OccupancyIndex()
+        index.bind(timetables, subject_faculty_map, subject_metadata)
+        return index.clashes()
+    return run
+
+
+def bench_find_all_clashes(documents):
+    from components.clash_checker import find_all_clashes_and_common_subjects, subject_similarity
+
+    timetables = documents["timetable.json"]
+
+    def run():
+        subject_similarity.cache_clear()
+        return find_all_clashes_and_common_subjects(timetables)
+    return run
+
+
+def bench_faculty_load(documents):
+    from components.load_distribution import calculate_faculty_load
+
+    timetables = documents["timetable.json"]
+    subject_faculty_map = documents["subject_faculty_map.json"]
+    return lambda: calculate_faculty_load(timetables, subject_faculty_map=subject_faculty_map)
+
+
+def bench_faculty_view(documents):
+    # extract_faculty_cells was replaced by FacultyIndex: one index build plus
+    # the consolidated grid, program tables and load summary of every faculty
+    from components.faculty_index import FacultyIndex
+    from data.assignments import ResolvedAssignments
+
+    timetables = documents["timetable.json"]
+    subject_faculty_map = documents["subject_faculty_map.json"]
+
+    def run():
+        index = FacultyIndex(timetables, ResolvedAssignments(timetables, subject_faculty_map))
+        for faculty_code in index.faculty_codes():
+            index.consolidated(faculty_code)
+            index.program_tables(faculty_code)
+            index.load_summary(faculty_code)
+    return run
+
+
+def bench_subject_summary(documents):
+    from components.viewer import subject_summary
+
+    tables = [table for semesters in documents["timetable.json"].values() for table in semesters.values()]
+    return lambda: [subject_summary(table) for table in tables]
+
+
+def bench_table_image(documents):
+    import pandas as pd
+    from utils import image_exporter
+
+    table = next(iter(next(iter(documents["timetable.json"].values())).values()))
+    columns = ["Time"] + [f"DAY {i + 1}" for i in range(len(table[0]) - 1)]
+    frame = pd.DataFrame(table, columns=columns)
+    image_exporter.load_font(image_exporter.CELL_FONT_SIZE)
+
+    def run():
+        image_exporter._image_cache.clear()  # time the render, not the PNG cache
+        return image_exporter.generate_table_image(frame, "Benchmark")
+    return run
+
+
+BENCHMARKS = {
+    "check_clashes": bench_check_clashes,
+    "find_all_clashes_and_common_subjects": bench_find_all_clashes,
+    "calculate_faculty_load": bench_faculty_load,
+    "faculty_view": bench_faculty_view,
+    "subject_summary": bench_subject_summary,
+    "generate_table_image": bench_table_image,
+}
+
+
+def measure(func, repeat=5):
+    """Wall-clock seconds of ``repeat`` calls: best, median and mean."""
+    func()  # warm-up: imports, parse_cell cache, fonts
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "best": samples[0],
+        "median": samples[len(samples) // 2],
+        "mean": sum(samples) / len(samples),
+        "repeat": repeat,
+    }
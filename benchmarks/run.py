@@ -0,0 +1,77 @@
+"""Run the micro-benchmarks and save the timings as JSON.
+
+    python -m benchmarks.run --programs 50 --output results/main.json
+    python -m benchmarks.run --programs 50 --compare results/main.json
+
+Results carry the scale parameters, Python version and git commit, so runs
+can be compared over time; ``--compare`` prints the ratio of median times
+against an earlier results file.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.micro import BENCHMARKS, measure
+from benchmarks.synthetic import add_scale_arguments, generate, scale_from_args
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scale, names=None, repeat=5):
+    documents = generate(**scale)
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = measure(BENCHMARKS[name](documents), repeat)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Run the micro-benchmarks.")
+    add_scale_arguments(parser)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run only these benchmarks.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results JSON here.")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against.")
+    args = parser.parse_args(argv)
+
+    report = run(scale_from_args(args), args.only, args.repeat)
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    print(f"{'benchmark':<38} {'best (ms)':>10} {'median (ms)':>12} {'vs baseline':>12}")
+    for name, timing in report["results"].items():
+        ratio = ""
+        if name in baseline and timing["median"]:
+            ratio = f"{baseline[name]['median'] / timing['median']:.2f}x"
+        print(f"{name:<38} {timing['best'] * 1000:>10.2f} {timing['median'] * 1000:>12.2f} {ratio:>12}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Synthetic timetable data at configurable scale.
+
+    python -m benchmarks.synthetic /tmp/synthetic --programs 100 --faculty 400
+
+writes ``timetable.json``, ``subjects.json``, ``subject_faculty_map.json``,
+``faculties.json`` and an empty ``subject_metadata.json``, so the directory
+can be used as ``--data-dir`` or as the store's data directory.
+
+``clash_density`` is the chance that a class ignores whether its faculty is
+already teaching at that day and slot in the same term; at 0 the generator
+only double-books faculty when every subject of the semester is taken.
+"""
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+from data.timetable import build_semester_name, time_slots
+
+LUNCH_SLOT = "01.00 - 02.00"
+
+
+def slot_labels(count):
+    """The app's time slots, continued hour by hour when ``count`` is larger."""
+    labels = list(time_slots[:count])
+    hour = 5
+    while len(labels) < count:
+        labels.append(f"{hour:02d}.00 - {hour + 1:02d}.00")
+        hour += 1
+    return labels
+
+
+def generate(programs=10, semesters=4, faculty=40, slots=7, days=5, clash_density=0.05,
+             subjects_per_semester=9, co_teaching=0.1, fill=0.85, seed=0):
+    """Return {filename: document} for a synthetic data set."""
+    rng = random.Random(seed)
+    faculty_codes = [f"F{i:03d}" for i in range(faculty)]
+    theory = (subjects_per_semester + 1) // 2
+    codes = [f"P{i}" for i in range(1, theory + 1)] + [f"L{i}" for i in range(1, subjects_per_semester - theory + 1)]
+    labels = slot_labels(slots)
+    busy = set()  # (term, faculty, day, slot)
+
+    timetables, subjects, subject_faculty_map = {}, {}, {}
+    for p in range(programs):
+        program = f"Program {p:03d}"
+        for number in range(1, semesters + 1):
+            semester = build_semester_name(number)
+            term = number % 2
+            mapping = {
+                code: rng.sample(faculty_codes, 2 if faculty > 1 and rng.random() < co_teaching else 1)
+                for code in codes
+            }
+            table = []
+            for slot in labels:
+                row = [slot]
+                for day in range(days):
+                    if slot == LUNCH_SLOT:
+                        row.append("Lunch break")
+                        continue
+                    if rng.random() >= fill:
+                        row.append("")
+                        continue
+                    candidates = codes
+                    if rng.random() >= clash_density:
+                        candidates = [
+                            code for code in codes
+                            if not any((term, f, day, slot) in busy for f in mapping[code])
+                        ] or codes
+                    code = rng.choice(candidates)
+                    for f in mapping[code]:
+                        busy.add((term, f, day, slot))
+                    row.append(f"{code} ({', '.join(mapping[code])})")
+                table.append(row)
+            timetables.setdefault(program, {})[semester] = table
+            subjects.setdefault(program, {})[semester] = {code: f"Subject {code} of {program}" for code in codes}
+            subject_faculty_map.setdefault(program, {})[semester] = mapping
+
+    return {
+        "timetable.json": timetables,
+        "subjects.json": subjects,
+        "subject_faculty_map.json": subject_faculty_map,
+        "faculties.json": {code: f"Faculty {code}" for code in faculty_codes},
+        "subject_metadata.json": {},
+    }
+
+
+def write(documents, out_dir):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for filename, data in documents.items():
+        with open(out_dir / filename, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def add_scale_arguments(parser):
+    parser.add_argument("--programs", type=int, default=10)
+    parser.add_argument("--semesters", type=int, default=4)
+    parser.add_argument("--faculty", type=int, default=40)
+    parser.add_argument("--slots", type=int, default=7)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--clash-density", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def scale_from_args(args):
+    return dict(
+        programs=args.programs,
+        semesters=args.semesters,
+        faculty=args.faculty,
+        slots=args.slots,
+        days=args.days,
+        clash_density=args.clash_density,
+        seed=args.seed,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description="Write a synthetic data set.")
+    parser.add_argument("out_dir")
+    add_scale_arguments(parser)
+    args = parser.parse_args(argv)
+
+    write(generate(**scale_from_args(args)), args.out_dir)
+    print(f"Wrote synthetic data to {args.out_dir}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""Command-line tools for the timetable data.
+
+    python cli.py validate [--data-dir DIR] [--json] [--strict]
+    python cli.py rename renames.csv [--dry-run]
+
+``validate`` checks subject codes, faculty assignments, weekly hours,
+faculty availability and clashes. It exits 0 when the data is clean, 1 when it finds errors (or
+warnings with ``--strict``) and 2 when a data file cannot be read.
+``timetable.json`` is read one program at a time with ijson (in
+requirements.txt); without it the file is loaded whole.
+
+``rename`` applies a CSV of ``old,new`` faculty/subject codes (see
+``data.code_index.read_renames``) through the store in one batch.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+try:
+    import ijson
+except ImportError:  # optional: stream large timetables instead of json.load
+    ijson = None
+
+from data.assignments import resolve_faculty
+from data.availability import Availability
+from data.timetable import days, parse_semester_number
+from utils.cell_parser import parse_cell
+
+# Not data.master.DATA_DIR: importing data.master loads every document at import time
+DATA_DIR = Path(__file__).parent / "data"
+
+ERROR = "error"
+WARNING = "warning"
+
+
+# ------------------ Loading ------------------
+def load_document(data_dir, filename):
+    path = Path(data_dir) / filename
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_timetables(data_dir):
+    """Yield (program, {semester: table}) from timetable.json."""
+    path = Path(data_dir) / "timetable.json"
+    if not path.exists():
+        return
+    with open(path, "rb") as f:
+        if ijson is not None:
+            yield from ijson.kvitems(f, "")
+        else:
+            yield from json.load(f).items()
+
+
+# ------------------ Validation ------------------
+def issue(severity, check, message, **fields):
+    return dict({"severity": severity, "check": check, "message": message},
+                **{key: value for key, value in fields.items() if value is not None})
+
+
+def explicit_hours(metadata):
+    try:
+        return int(metadata["hours_per_week"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def check_semester(program, semester, table, subjects, mapping, metadata, faculties, occupancy, availability):
+    issues = []
+    hours = defaultdict(int)
+    unassigned = defaultdict(int)
+    unknown = defaultdict(int)
+    unavailable = defaultdict(list)
+    number = parse_semester_number(semester)
+    terms = ("Odd", "Even") if number is None else ("Odd" if number % 2 else "Even",)
+
+    for row in table:
+        if not row:
+            continue
+        for day_idx in range(1, len(row)):
+            cell = parse_cell(row[day_idx])
+            if not cell.is_class:
+                continue
+            hours[cell.code] += 1
+            faculty, _ = resolve_faculty(cell, mapping)
+            if not faculty:
+                unassigned[cell.code] += 1
+                continue
+            is_common = bool(metadata.get(cell.code, {}).get("is_common", False))
+            for code in faculty:
+                if code not in faculties:
+                    unknown[code] += 1
+                if not availability.is_available(code, day_idx, row[0]):
+                    unavailable[code].append(f"{days[day_idx] if day_idx < len(days) else day_idx} {row[0]} {cell.code}")
+                for term in terms:
+                    occupancy[(term, code, day_idx, row[0])].append((program, semester, cell.code, is_common))
+
+    where = dict(program=program, semester=semester)
+    for code, count in sorted(hours.items()):
+        if code not in subjects:
+            issues.append(issue(ERROR, "undefined-subject",
+                                f"{code} is scheduled {count}x but not defined in subjects.json", subject=code, **where))
+        expected = explicit_hours(metadata.get(code, {}))
+        if expected is not None and expected != count:
+            issues.append(issue(ERROR, "hours-mismatch",
+                                f"{code} has {count} hours/week, hours_per_week is {expected}",
+                                subject=code, scheduled=count, expected=expected, **where))
+    for code, count in sorted(unassigned.items()):
+        issues.append(issue(ERROR, "unassigned-subject",
+                            f"{code} has {count} slots without faculty in the cell or subject_faculty_map.json",
+                            subject=code, **where))
+    for code, count in sorted(unknown.items()):
+        issues.append(issue(ERROR, "unknown-faculty",
+                            f"faculty {code} teaches {count} slots but is missing from faculties.json",
+                            faculty=code, **where))
+    for code, slots in sorted(unavailable.items()):
+        issues.append(issue(ERROR, "unavailable-faculty",
+                            f"faculty {code} teaches {len(slots)} slots marked unavailable: {', '.join(slots)}",
+                            faculty=code, slots=slots, **where))
+    for code in sorted(set(subjects) - set(hours)):
+        issues.append(issue(WARNING, "unused-subject", f"{code} is defined but never scheduled", subject=code, **where))
+    for code in sorted(set(subjects) - set(mapping)):
+        issues.append(issue(WARNING, "unmapped-subject",
+                            f"{code} has no entry in subject_faculty_map.json", subject=code, **where))
+    return issues
+
+
+def check_map(subject_faculty_map, faculties):
+    issues = []
+    for program, semesters in subject_faculty_map.items():
+        for semester, mapping in semesters.items():
+            for subject, faculty_list in mapping.items():
+                for code in faculty_list:
+                    if code not in faculties:
+                        issues.append(issue(ERROR, "unknown-faculty",
+                                            f"{subject} is mapped to {code}, which is missing from faculties.json",
+                                            program=program, semester=semester, subject=subject, faculty=code))
+    return issues
+
+
+def check_clashes(occupancy):
+    issues = []
+    for (term, faculty, day_idx, slot), classes in occupancy.items():
+        # Two is_common subjects are one combined class, as in the admin clash check
+        if len(classes) < 2 or all(is_common for *_, is_common in classes):
+            continue
+        day = days[day_idx] if day_idx < len(days) else f"DAY {day_idx}"
+        taught = ", ".join(f"{program} {semester} {code}" for program, semester, code, _ in classes)
+        issues.append(issue(ERROR, "clash", f"{faculty} is booked {len(classes)}x on {day} {slot}: {taught}",
+                            faculty=faculty, term=term, day=day, slot=slot,
+                            classes=[list(entry[:3]) for entry in classes]))
+    return issues
+
+
+def validate(data_dir=DATA_DIR):
+    """Return the list of issues found in the documents under ``data_dir``."""
+    subjects = load_document(data_dir, "subjects.json")
+    subject_faculty_map = load_document(data_dir, "subject_faculty_map.json")
+    subject_metadata = load_document(data_dir, "subject_metadata.json")
+    faculties = load_document(data_dir, "faculties.json")
+    availability = Availability(load_document(data_dir, "faculty_availability.json"))
+
+    issues = check_map(subject_faculty_map, faculties)
+    occupancy = defaultdict(list)
+    for program, semesters in iter_timetables(data_dir):
+        for semester, table in semesters.items():
+            if not isinstance(table, list):
+                continue
+            issues.extend(check_semester(
+                program,
+                semester,
+                table,
+                subjects.get(program, {}).get(semester, {}),
+                subject_faculty_map.get(program, {}).get(semester, {}),
+                subject_metadata.get(program, {}).get(semester, {}),
+                faculties,
+                occupancy,
+                availability,
+            ))
+    issues.extend(check_clashes(occupancy))
+    return issues
+
+
+# ------------------ Commands ------------------
+def run_validate(args):
+    started = time.perf_counter()
+    try:
+        if not Path(args.data_dir).is_dir():
+            raise FileNotFoundError(f"no data directory at {args.data_dir}")
+        issues = validate(args.data_dir)
+    except (OSError, ValueError) as exc:  # unreadable file or invalid JSON
+        print(json.dumps({"ok": False, "error": str(exc)}) if args.json else f"error: {exc}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - started
+
+    errors = sum(1 for item in issues if item["severity"] == ERROR)
+    warnings = len(issues) - errors
+    ok = not errors and not (args.strict and warnings)
+    if args.json:
+        json.dump({
+            "ok": ok,
+            "errors": errors,
+            "warnings": warnings,
+            "seconds": round(elapsed, 4),
+            "issues": issues,
+        }, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        for item in issues:
+            where = " / ".join(item[key] for key in ("program", "semester") if key in item)
+            print(f"{item['severity']:<8}{item['check']:<20}{where + ': ' if where else ''}{item['message']}")
+        print(f"{errors} errors, {warnings} warnings in {elapsed:.2f}s")
+    return 0 if ok else 1
+
+
+def run_rename(args):
+    from data import code_index
+    from data.master import store
+
+    try:
+        with open(args.csv, encoding="utf-8", newline="") as f:
+            faculty, subjects = code_index.read_renames(f, store)
+        conflicts = code_index.rename_conflicts(faculty, subjects, store)
+        if conflicts:
+            raise ValueError("\n".join(conflicts))
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    index = code_index.for_store(store)
+    for old, new in sorted(faculty.items()):
+        cells, entries = index.faculty_usage(old)
+        print(f"faculty {old} -> {new}: {cells} cells, {entries} map entries")
+    for (program, semester, old), new in sorted(subjects.items()):
+        print(f"subject {old} -> {new} in {program} / {semester}: {index.subject_usage(program, semester, old)} cells")
+    if args.dry_run:
+        return 0
+    changed, affected = code_index.rename(faculty, subjects, store)
+    print(f"Rewrote {changed} cells in {len(affected)} semesters.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="timetable", description="Timetable data tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    validate_parser = commands.add_parser(
+        "validate",
+        help="Check the data files for errors.",
+        description="Check the data files for errors. timetable.json is streamed one program at a time when "
+                    "ijson is installed and loaded whole otherwise.",
+    )
+    validate_parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with the JSON documents.")
+    validate_parser.add_argument("--json", action="store_true", help="Print a JSON report instead of text.")
+    validate_parser.add_argument("--strict", action="store_true", help="Exit 1 on warnings as well.")
+    validate_parser.set_defaults(run=run_validate)
+
+    rename_parser = commands.add_parser("rename", help="Rename faculty and subject codes from a CSV.")
+    rename_parser.add_argument("csv", help="CSV with old,new and optional kind,program,semester columns.")
+    rename_parser.add_argument("--dry-run", action="store_true", help="Show what would change without saving.")
+    rename_parser.set_defaults(run=run_rename)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,19 @@
-import copy
-import re
+import io
+import os
+import tempfile
 import streamlit as st
-import pandas as pd
-import json
+from components import rooms
+from components.faculty_index import FacultyIndex
+from components.occupancy import OccupancyIndex
+from data import availability, code_index, journal, migrations, scenarios, sqlite_backend
+from data.assignments import ResolvedAssignments, resolved
+from data.master import store
+from data.timetable import (
+    default_hours_for_subject_code,
+    semester_parity_matches,
+    sort_semesters,
+)
+from utils import bulk_export, profiler
 
 # ------------------ Streamlit helpers ------------------
 
@@ -15,50 +26,48 @@ def safe_rerun():
         st.info("UI refresh requested. Please refresh the page if changes do not appear automatically.")
 
 # ------------------ Load JSON ------------------
-with open("data/timetable.json") as f:
-    timetables = json.load(f)
-
-with open("data/subjects.json") as f:
-    subjects = json.load(f)
-
-with open("data/faculties.json") as f:
-    faculties = json.load(f)
-
-with open("data/subject_faculty_map.json") as f:
-    subject_faculty_map = json.load(f)
-
-try:
-    with open("data/subject_metadata.json") as f:
-        subject_metadata = json.load(f)
-except FileNotFoundError:
-    subject_metadata = {}
-
-try:
-    with open("data/semester_metadata.json") as f:
-        semester_metadata = json.load(f)
-except FileNotFoundError:
-    semester_metadata = {}
+def load_state():
+    global timetables, subjects, faculties, subject_faculty_map, subject_metadata, semester_metadata
+    timetables = store.timetables
+    subjects = store.subjects
+    faculties = store.faculties
+    subject_faculty_map = store.subject_faculty_map
+    subject_metadata = store.subject_metadata
+    semester_metadata = store.semester_metadata
+    occupancy.bind(timetables, subject_faculty_map, subject_metadata)
+    room_index.bind(timetables, semester_metadata, subject_metadata)
+
+
+occupancy = OccupancyIndex()
+room_index = rooms.RoomIndex()
+load_state()
 
 # ------------------ Helpers ------------------
-def save_json(data, path):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-
-
 DEFAULT_DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
 
-def save_updated_timetable(program, semester, df):
-    timetables[program][semester] = df.values.tolist()
-    save_json(timetables, "data/timetable.json")
+def save_updated_timetable(program, semester, df, parity=None):
+    previous = timetables.get(program, {}).get(semester, [])
+    timetables.setdefault(program, {})[semester] = df.values.tolist()
+    touched = occupancy.update_cells(program, semester, previous)
+    room_index.update_semester(program, semester)
+    store.save("timetable.json", timetables)
+    # Only the (faculty, day, slot) keys the edit touched can have new or resolved clashes.
+    return [
+        clash for clash in occupancy.clashes(parity, keys=touched)
+        if (clash["program1"], clash["semester1"]) == (program, semester)
+        or (clash["program2"], clash["semester2"]) == (program, semester)
+    ]
 
 
 def save_all_state():
-    save_json(timetables, "data/timetable.json")
-    save_json(subjects, "data/subjects.json")
-    save_json(subject_faculty_map, "data/subject_faculty_map.json")
-    save_json(subject_metadata, "data/subject_metadata.json")
-    save_json(semester_metadata, "data/semester_metadata.json")
+    with store.batch():
+        store.save("timetable.json", timetables)
+        store.save("faculties.json", faculties)
+        store.save("subjects.json", subjects)
+        store.save("subject_faculty_map.json", subject_faculty_map)
+        store.save("subject_metadata.json", subject_metadata)
+        store.save("semester_metadata.json", semester_metadata)
 
 
 def get_program_semesters(program):
@@ -71,102 +80,6 @@ def get_program_semesters(program):
     )
 
 
-ROMAN_TO_INT = {
-    "I": 1,
-    "II": 2,
-    "III": 3,
-    "IV": 4,
-    "V": 5,
-    "VI": 6,
-    "VII": 7,
-    "VIII": 8,
-    "IX": 9,
-    "X": 10
-}
-
-INT_TO_ROMAN = {value: key for key, value in ROMAN_TO_INT.items()}
-
-
-def build_semester_name(number):
-    roman = INT_TO_ROMAN.get(number)
-    return f"Semester {roman}" if roman else f"Semester {number}"
-
-
-def sort_semesters(semesters):
-    return sorted(
-        semesters,
-        key=lambda sem: (
-            parse_semester_number(sem) if parse_semester_number(sem) is not None else 999,
-            sem
-        )
-    )
-
-
-def parse_semester_number(semester_name):
-    if not isinstance(semester_name, str):
-        return None
-    digits = re.findall(r"\d+", semester_name)
-    if digits:
-        return int(digits[0])
-    roman_match = re.search(r"\b(I|II|III|IV|V|VI|VII|VIII|IX|X)\b", semester_name.upper())
-    if roman_match:
-        return ROMAN_TO_INT.get(roman_match.group(1), None)
-    return None
-
-
-def semester_parity_matches(semester_name, parity):
-    sem_number = parse_semester_number(semester_name)
-    if sem_number is None:
-        return True
-    if parity == "Odd":
-        return sem_number % 2 == 1
-    return sem_number % 2 == 0
-
-
-def is_bsc_program(program):
-    if not isinstance(program, str):
-        return False
-    name = program.lower().replace(".", "").replace(" ", "")
-    return "bsc" in name or "bachelor" in name
-
-
-def ensure_bsc_semesters(program, total_semesters=10):
-    if not is_bsc_program(program):
-        return False
-
-    existing = set(get_program_semesters(program))
-    base_odd = "Semester I"
-    base_even = "Semester II"
-    changed = False
-
-    for sem_number in range(1, total_semesters + 1):
-        sem_name = build_semester_name(sem_number)
-        if sem_name in existing:
-            continue
-
-        if sem_number % 2 == 1:
-            if base_odd in existing:
-                clone_semester_data(program, base_odd, sem_name)
-            elif base_even in existing:
-                clone_semester_data(program, base_even, sem_name)
-            else:
-                create_blank_semester(program, sem_name, template_semester=base_odd)
-        else:
-            if base_even in existing:
-                clone_semester_data(program, base_even, sem_name)
-            elif base_odd in existing:
-                clone_semester_data(program, base_odd, sem_name)
-            else:
-                create_blank_semester(program, sem_name, template_semester=base_even)
-
-        changed = True
-        existing.add(sem_name)
-
-    if changed:
-        save_all_state()
-    return changed
-
-
 def delete_program(program):
     if program in timetables:
         del timetables[program]
@@ -178,6 +91,8 @@ def delete_program(program):
         del subject_metadata[program]
     if program in semester_metadata:
         del semester_metadata[program]
+    occupancy.remove_program(program)
+    room_index.remove_program(program)
     save_all_state()
 
 
@@ -192,86 +107,22 @@ def delete_semester(program, semester):
         del subject_metadata[program][semester]
     if program in semester_metadata and semester in semester_metadata[program]:
         del semester_metadata[program][semester]
-    save_all_state()
-
-
-def clone_semester_data(program, source_semester, target_semester):
-    timetables.setdefault(program, {})
-    subjects.setdefault(program, {})
-    subject_faculty_map.setdefault(program, {})
-    subject_metadata.setdefault(program, {})
-    semester_metadata.setdefault(program, {})
-
-    if source_semester in timetables.get(program, {}):
-        timetables[program][target_semester] = copy.deepcopy(timetables[program][source_semester])
-    if source_semester in subjects.get(program, {}):
-        subjects[program][target_semester] = copy.deepcopy(subjects[program][source_semester])
-    if source_semester in subject_faculty_map.get(program, {}):
-        subject_faculty_map[program][target_semester] = copy.deepcopy(subject_faculty_map[program][source_semester])
-    if source_semester in subject_metadata.get(program, {}):
-        subject_metadata[program][target_semester] = copy.deepcopy(subject_metadata[program][source_semester])
-    if source_semester in semester_metadata.get(program, {}):
-        semester_metadata[program][target_semester] = copy.deepcopy(semester_metadata[program][source_semester])
-
-
-def create_blank_semester(program, target_semester, template_semester=None):
-    timetables.setdefault(program, {})
-    subjects.setdefault(program, {})
-    subject_faculty_map.setdefault(program, {})
-    subject_metadata.setdefault(program, {})
-    semester_metadata.setdefault(program, {})
-
-    if template_semester in timetables.get(program, {}):
-        template = timetables[program][template_semester]
-        rows = len(template)
-        cols = len(template[0]) if template else 6
-    else:
-        rows = 10
-        cols = 6
-    timetables[program][target_semester] = [["" for _ in range(cols)] for _ in range(rows)]
-    subjects[program][target_semester] = {}
-    subject_faculty_map[program][target_semester] = {}
-    subject_metadata[program][target_semester] = {}
-    semester_metadata[program][target_semester] = {}
-
-
-def generate_missing_semesters(program, total_semesters=10):
-    existing = set(get_program_semesters(program))
-    base_odd = "Semester I"
-    base_even = "Semester II"
-
-    for sem_number in range(1, total_semesters + 1):
-        sem_name = build_semester_name(sem_number)
-        if sem_name in existing:
-            continue
-
-        if sem_number % 2 == 1 and base_odd in get_program_semesters(program):
-            clone_semester_data(program, base_odd, sem_name)
-        elif sem_number % 2 == 0 and base_even in get_program_semesters(program):
-            clone_semester_data(program, base_even, sem_name)
-        else:
-            create_blank_semester(program, sem_name, template_semester=base_odd if base_odd in get_program_semesters(program) else None)
+    occupancy.remove_semester(program, semester)
+    room_index.remove_semester(program, semester)
     save_all_state()
 
 
 def delete_faculty(faculty_code):
-    if faculty_code in faculties:
-        del faculties[faculty_code]
-    for prog, sems in subject_faculty_map.items():
-        for sem, mapping in sems.items():
-            for subject, faculty_list in mapping.items():
-                subject_faculty_map[prog][sem][subject] = [f for f in faculty_list if f != faculty_code]
-    save_all_state()
+    for program, semester in code_index.delete_faculty(faculty_code, store):
+        occupancy.update_semester(program, semester)
 
 
 def delete_subject(program, semester, subject_code):
-    if program in subjects and semester in subjects[program] and subject_code in subjects[program][semester]:
-        del subjects[program][semester][subject_code]
-    if program in subject_faculty_map and semester in subject_faculty_map[program] and subject_code in subject_faculty_map[program][semester]:
-        del subject_faculty_map[program][semester][subject_code]
-    if program in subject_metadata and semester in subject_metadata[program] and subject_code in subject_metadata[program][semester]:
-        del subject_metadata[program][semester][subject_code]
-    save_all_state()
+    """Returns how many timetable cells still use the deleted code."""
+    remaining = code_index.delete_subject(program, semester, subject_code, store)
+    occupancy.update_mapping(program, semester, subject_code)
+    room_index.update_semester(program, semester)
+    return remaining
 
 
 def ensure_nested_dict(data, *keys):
@@ -297,46 +148,13 @@ def get_semester_metadata(program, semester):
     return semester_metadata.get(program, {}).get(semester, {})
 
 
-def default_hours_for_subject_code(subject_code):
-    if not isinstance(subject_code, str) or not subject_code:
-        return 0
-    code = subject_code.strip().upper()
-    if code.startswith("P"):
-        return 3
-    if code.startswith("L"):
-        return 2
-    return 0
-
-
-def update_timetable_subject_code(program, semester, old_code, new_code):
-    table = timetables.get(program, {}).get(semester, [])
-    for row_index, row in enumerate(table):
-        for col_index, cell in enumerate(row):
-            if not isinstance(cell, str) or not cell:
-                continue
-            parts = cell.split(" ", 1)
-            if parts[0] == old_code:
-                remainder = parts[1] if len(parts) > 1 else ""
-                table[row_index][col_index] = new_code + (" " + remainder if remainder else "")
-    save_json(timetables, "data/timetable.json")
-
-
-def update_timetable_faculty_code(old_code, new_code):
-    for program, semesters in timetables.items():
-        for semester, table in semesters.items():
-            for row_index, row in enumerate(table):
-                for col_index, cell in enumerate(row):
-                    if not isinstance(cell, str) or not cell or old_code not in cell:
-                        continue
-                    match = re.search(r"\(([^)]*)\)$", cell)
-                    if not match:
-                        continue
-                    faculty_list = [part.strip() for part in match.group(1).split(",")]
-                    if old_code not in faculty_list:
-                        continue
-                    updated_faculty = [new_code if part == old_code else part for part in faculty_list]
-                    table[row_index][col_index] = cell[:match.start()] + "(" + ", ".join(updated_faculty) + ")"
-    save_json(timetables, "data/timetable.json")
+def rename_codes(faculty=None, subjects=None):
+    """Index-backed renames (see ``data.code_index.rename``); returns the number of cells rewritten."""
+    changed, affected = code_index.rename(faculty, subjects, store)
+    for program, semester in affected:
+        occupancy.update_semester(program, semester)
+        room_index.update_semester(program, semester)
+    return changed
 
 
 def rename_program(old_program, new_program):
@@ -354,11 +172,12 @@ def rename_program(old_program, new_program):
         subject_metadata[new_program] = subject_metadata.pop(old_program)
     if old_program in semester_metadata:
         semester_metadata[new_program] = semester_metadata.pop(old_program)
-    save_json(timetables, "data/timetable.json")
-    save_json(subjects, "data/subjects.json")
-    save_json(subject_faculty_map, "data/subject_faculty_map.json")
-    save_json(subject_metadata, "data/subject_metadata.json")
-    save_json(semester_metadata, "data/semester_metadata.json")
+    occupancy.remove_program(old_program)
+    room_index.remove_program(old_program)
+    for semester in timetables.get(new_program, {}):
+        occupancy.update_semester(new_program, semester)
+        room_index.update_semester(new_program, semester)
+    save_all_state()
 
 
 def rename_semester(program, old_semester, new_semester):
@@ -376,14 +195,16 @@ def rename_semester(program, old_semester, new_semester):
         subject_metadata[program][new_semester] = subject_metadata[program].pop(old_semester)
     if old_semester in semester_metadata.get(program, {}):
         semester_metadata[program][new_semester] = semester_metadata[program].pop(old_semester)
-    save_json(timetables, "data/timetable.json")
-    save_json(subjects, "data/subjects.json")
-    save_json(subject_faculty_map, "data/subject_faculty_map.json")
-    save_json(subject_metadata, "data/subject_metadata.json")
-    save_json(semester_metadata, "data/semester_metadata.json")
+    occupancy.remove_semester(program, old_semester)
+    occupancy.update_semester(program, new_semester)
+    room_index.remove_semester(program, old_semester)
+    room_index.update_semester(program, new_semester)
+    save_all_state()
 
 
 def build_subject_table(program, semester):
+    import pandas as pd
+
     rows = []
     map_rows = subject_faculty_map.get(program, {}).get(semester, {})
     meta_rows = subject_metadata.get(program, {}).get(semester, {})
@@ -404,6 +225,8 @@ def is_common_subject(program, semester, subject_key):
 
 
 def build_common_subject_summary():
+    import pandas as pd
+
     rows = []
     for program, sems in subject_metadata.items():
         for semester, metas in sems.items():
@@ -423,56 +246,100 @@ def build_common_subject_summary():
 
 
 # ------------------ Clash Checker (NO REGEX) ------------------
+@profiler.timed("check_clashes")
 def check_clashes(timetables, subject_faculty_map, parity=None):
-    faculty_schedule = {}
-    clashes = []
-
-    for program, semesters in timetables.items():
-        for semester, table in semesters.items():
-            if parity is not None and not semester_parity_matches(semester, parity):
-                continue
-            for row in table:
-                time_slot = row[0]
-                for day_idx, subject_code in enumerate(row[1:], start=1):
-
-                    if not subject_code or subject_code in ["Lunch break", "Library/Mentoring"]:
-                        continue
-
-                    subject_key = subject_code.split()[0].strip()
-                    faculty_list = subject_faculty_map \
-                        .get(program, {}) \
-                        .get(semester, {}) \
-                        .get(subject_key, [])
-                    subject_common = is_common_subject(program, semester, subject_key)
-
-                    for faculty in faculty_list:
-                        key = (faculty, day_idx, time_slot)
-                        if key in faculty_schedule:
-                            prev = faculty_schedule[key]
-                            prev_common = is_common_subject(prev["program"], prev["semester"], prev["subject"].split()[0].strip())
-                            if prev_common and subject_common:
-                                continue
-                            clashes.append({
-                                "faculty": faculty,
-                                "time": time_slot,
-                                "program1": prev["program"],
-                                "semester1": prev["semester"],
-                                "subject1": prev["subject"],
-                                "program2": program,
-                                "semester2": semester,
-                                "subject2": subject_code
-                            })
-                        else:
-                            faculty_schedule[key] = {
-                                "program": program,
-                                "semester": semester,
-                                "subject": subject_code
-                            }
+    own_data = timetables is store.timetables and subject_faculty_map is store.subject_faculty_map
+    backend = sqlite_backend.queries(store) if own_data else None
+    if backend is not None:
+        # Only the slots SQLite reports as booked twice are loaded
+        index = OccupancyIndex.from_slots(timetables, subject_faculty_map, subject_metadata, backend.contended_slots())
+        clashes = index.clashes(parity)
+    else:
+        occupancy.bind(timetables, subject_faculty_map, subject_metadata)
+        clashes = occupancy.clashes(parity)
+    if own_data:
+        assignments = resolved(store).assignments  # cached per store version
+    else:
+        assignments = ResolvedAssignments(timetables, subject_faculty_map).assignments
+    clashes.extend(unavailable_clashes(assignments, parity))
     return clashes
 
+
+def unavailable_clashes(assignments, parity=None):
+    """Classes in slots the faculty marked unavailable (faculty_availability.json)."""
+    return [
+        {
+            "kind": "unavailable",
+            "faculty": faculty,
+            "day": availability.DAY_NAMES[assignment.day - 1],
+            "time": assignment.slot,
+            "program1": assignment.program,
+            "semester1": assignment.semester,
+            "subject1": assignment.subject,
+        }
+        for faculty, assignment in availability.unavailable_assignments(
+            availability.for_store(store), assignments, parity
+        )
+    ]
+
+
+def check_scenario_clashes(scenario, parity=None):
+    """Clashes of the timetable as ``scenario`` would leave it.
+
+    Starts from a copy of the live index and re-indexes only the cells the
+    scenario edits, so the cost follows the size of the scenario.
+    """
+    with profiler.span("scenario_clashes"):
+        occupancy.bind(timetables, subject_faculty_map, subject_metadata)
+        overlay = scenario.timetables()
+        index = occupancy.copy(overlay)
+        edited = {}
+        for program, semester in scenario.edits:
+            index.update_cells(program, semester, timetables.get(program, {}).get(semester, []))
+            edited.setdefault(program, {})[semester] = overlay[program][semester]
+        assignments = [
+            assignment for assignment in resolved(store).assignments
+            if (assignment.program, assignment.semester) not in scenario.edits
+        ]
+        assignments.extend(ResolvedAssignments(edited, subject_faculty_map).assignments)
+        return index.clashes(parity) + unavailable_clashes(assignments, parity)
+
+
+def check_room_clashes(parity=None):
+    room_index.bind(timetables, semester_metadata, subject_metadata)
+    return room_index.clashes(parity)
+
+
+def render_room_clashes(clashes):
+    for c in clashes:
+        st.write(
+            f"🚪 **{c['room']}** ⛔ {c['day']} {c['time']} | "
+            f"{c['program1']} {c['semester1']} ({c['subject1']}) "
+            f"vs {c['program2']} {c['semester2']} ({c['subject2']})"
+        )
+
+
+def render_clashes(clashes):
+    for c in clashes:
+        if c.get("kind") == "unavailable":
+            st.write(
+                f"🚫 **{c['faculty']}** unavailable {c['day']} {c['time']} | "
+                f"{c['program1']} {c['semester1']} ({c['subject1']})"
+            )
+            continue
+        st.write(
+            f"👤 **{c['faculty']}** ⛔ {c['time']} | "
+            f"{c['program1']} {c['semester1']} ({c['subject1']}) "
+            f"vs {c['program2']} {c['semester2']} ({c['subject2']})"
+        )
+
+
 # ------------------ Admin UI ------------------
 def show_admin():
+    import pandas as pd
+
     st.title("📋 Timetable Admin Panel")
+    load_state()
 
     st.markdown(
         "<div style='padding:18px; border-radius:14px; background:#f0f7ff; border-left:6px solid #0b69ff; margin-bottom:24px;'>"
@@ -499,7 +366,14 @@ def show_admin():
             key="semester_parity"
         )
 
-    ensure_bsc_semesters(program, total_semesters=10)
+    missing_semesters = migrations.missing_bsc_semesters(program, total_semesters=10)
+    if missing_semesters:
+        st.info(f"{program} is missing {', '.join(missing_semesters)}.")
+        if st.button("Generate missing semesters", key="admin_generate_semesters"):
+            for created in migrations.ensure_bsc_semesters(program, total_semesters=10):
+                occupancy.update_semester(program, created)
+                room_index.update_semester(program, created)
+            safe_rerun()
 
     available_semesters = [
         sem for sem in get_program_semesters(program)
@@ -511,7 +385,15 @@ def show_admin():
 
     semester = st.selectbox("Selected Semester", available_semesters, key="admin_semester")
 
-    table = timetables.get(program, {}).get(semester, [])
+    scenario_names = scenarios.names(store)
+    scenario_name = st.selectbox(
+        "Working on",
+        ["Live timetable"] + scenario_names,
+        key="admin_scenario"
+    )
+    scenario = scenarios.load(scenario_name, store) if scenario_name in scenario_names else None
+
+    table = scenario.semester_rows(program, semester) if scenario else timetables.get(program, {}).get(semester, [])
     if not table:
         table = [["", "", "", "", "", ""]]
     day_names = ["Time"] + [f"DAY {i+1}" for i in range(len(table[0]) - 1)]
@@ -555,17 +437,11 @@ def show_admin():
                 elif faculty_selection != "NEW FACULTY" and faculty_code != faculty_selection and faculty_code in faculties:
                     st.error("This faculty code already exists.")
                 else:
-                    if faculty_selection != "NEW FACULTY" and faculty_code != faculty_selection:
+                    with store.batch():
+                        if faculty_selection != "NEW FACULTY" and faculty_code != faculty_selection:
+                            rename_codes(faculty={faculty_selection: faculty_code})
                         faculties[faculty_code] = faculty_name
-                        del faculties[faculty_selection]
-                        for prog, sems in subject_faculty_map.items():
-                            for sem, mapping in sems.items():
-                                for subj, faculty_list in mapping.items():
-                                    subject_faculty_map[prog][sem][subj] = [faculty_code if f == faculty_selection else f for f in faculty_list]
-                        update_timetable_faculty_code(faculty_selection, faculty_code)
-                    else:
-                        faculties[faculty_code] = faculty_name
-                    save_all_state()
+                        save_all_state()
                     st.success("✅ Faculty saved.")
         with action_col2:
             if faculty_selection != "NEW FACULTY" and st.button("Delete Faculty", key="delete_faculty_btn"):
@@ -573,6 +449,65 @@ def show_admin():
                 st.success("✅ Faculty deleted.")
                 safe_rerun()
 
+        if faculty_selection != "NEW FACULTY":
+            with st.expander(f"Availability of {faculty_selection}", expanded=False):
+                availability_kind = st.radio(
+                    "Edit",
+                    ["unavailable", "preferred"],
+                    format_func=str.capitalize,
+                    horizontal=True,
+                    key="faculty_availability_kind"
+                )
+                faculty_availability = availability.for_store(store)
+                week = getattr(faculty_availability, availability_kind).get(faculty_selection, 0)
+                grid_df = pd.DataFrame(
+                    [
+                        [bool((week >> availability.slot_bit(day_idx, slot)) & 1) for day_idx in range(1, len(availability.DAY_NAMES) + 1)]
+                        for slot in availability.time_slots
+                    ],
+                    index=availability.time_slots,
+                    columns=availability.DAY_NAMES
+                )
+                edited_grid = st.data_editor(
+                    grid_df,
+                    use_container_width=True,
+                    key=f"faculty_availability_{availability_kind}_{faculty_selection}"
+                )
+                if st.button("Save Availability", key="save_faculty_availability_btn"):
+                    document = store.faculty_availability
+                    entry = document.setdefault(faculty_selection, {})
+                    day_values = {
+                        day: sum(1 << slot_idx for slot_idx, checked in enumerate(edited_grid[day].tolist()) if checked)
+                        for day in availability.DAY_NAMES
+                    }
+                    entry[availability_kind] = {day: value for day, value in day_values.items() if value}
+                    if not entry[availability_kind]:
+                        del entry[availability_kind]
+                    if not entry:
+                        del document[faculty_selection]
+                    store.save("faculty_availability.json", document)
+                    st.success("✅ Availability saved.")
+
+        with st.expander("Bulk rename from CSV", expanded=False):
+            st.caption(
+                "Columns `old,new`, optionally `kind` (faculty/subject) and `program`,`semester` "
+                "to limit a subject rename. All renames are applied together."
+            )
+            rename_file = st.file_uploader("Renames CSV", type=["csv"], key="bulk_rename_csv")
+            if rename_file is not None and st.button("Apply Renames", key="bulk_rename_btn"):
+                try:
+                    faculty_renames, subject_renames = code_index.read_renames(
+                        io.StringIO(rename_file.getvalue().decode("utf-8-sig")), store
+                    )
+                    changed = rename_codes(faculty_renames, subject_renames)
+                except ValueError as exc:
+                    st.error(f"❌ Nothing renamed:\n\n{exc}")
+                else:
+                    st.success(
+                        f"✅ Renamed {len(faculty_renames)} faculty and {len(subject_renames)} subject codes "
+                        f"({changed} timetable cells)."
+                    )
+
     with fac_col_right:
         st.markdown("#### Faculty list")
         st.dataframe(
@@ -642,40 +577,45 @@ def show_admin():
                 elif not subject_name_value:
                     st.warning("Enter a subject name.")
                 else:
-                    ensure_nested_dict(subjects, program, semester)
-                    ensure_nested_dict(subject_faculty_map, program, semester)
-                    ensure_nested_dict(subject_metadata, program, semester)
-
-                    if original_code and original_code != code_value:
-                        if code_value in subjects[program][semester]:
-                            st.error(f"Subject code {code_value} already exists.")
-                        else:
-                            subjects[program][semester][code_value] = subjects[program][semester].pop(original_code)
-                            subject_faculty_map[program][semester][code_value] = subject_faculty_map[program][semester].pop(original_code, [])
-                            subject_metadata[program][semester][code_value] = subject_metadata[program][semester].pop(original_code, {})
-                            update_timetable_subject_code(program, semester, original_code, code_value)
-                            subjects[program][semester][code_value] = subject_name_value
-                            st.success(f"✅ Renamed {original_code} to {code_value} and updated timetable entries.")
+                    renaming = bool(original_code) and original_code != code_value
+                    renames = {(program, semester, original_code): code_value}
+                    # Same check as the CSV import: the code may already exist in the map or metadata only
+                    conflicts = code_index.rename_conflicts(subjects=renames, store=store) if renaming else []
+                    if not original_code and code_value in subjects.get(program, {}).get(semester, {}):
+                        conflicts.append(f"Subject code {code_value} already exists.")
+                    if conflicts:
+                        st.error("❌ Subject not saved:\n\n" + "\n".join(conflicts))
                     else:
-                        if code_value in subjects[program][semester] and not original_code:
-                            st.error(f"Subject code {code_value} already exists.")
-                        else:
-                            subjects[program][semester][code_value] = subject_name_value
+                        ensure_nested_dict(subjects, program, semester)
+                        ensure_nested_dict(subject_faculty_map, program, semester)
+                        ensure_nested_dict(subject_metadata, program, semester)
 
-                    subject_faculty_map[program][semester][code_value] = normalize_faculty_codes(faculty_codes)
-                    subject_metadata[program][semester][code_value] = {
-                        "hours_per_week": int(hours_per_week or default_hours_for_subject_code(code_value)),
-                        "is_common": bool(is_common)
-                    }
+                        with store.batch():
+                            if renaming:
+                                rename_codes(subjects=renames)
+                            subjects[program][semester][code_value] = subject_name_value
+                            subject_faculty_map[program][semester][code_value] = normalize_faculty_codes(faculty_codes)
+                            subject_metadata[program][semester][code_value] = {
+                                "hours_per_week": int(hours_per_week or default_hours_for_subject_code(code_value)),
+                                "is_common": bool(is_common)
+                            }
+                            occupancy.update_mapping(program, semester, code_value)
+                            if renaming:
+                                occupancy.update_mapping(program, semester, original_code)
 
-                    save_all_state()
-                    st.success("✅ Subject saved.")
+                            save_all_state()
+                        if renaming:
+                            st.success(f"✅ Renamed {original_code} to {code_value} and updated timetable entries.")
+                        st.success("✅ Subject saved.")
 
         with action_col2:
             if original_code and st.button("Delete Subject", key="delete_subject_btn"):
-                delete_subject(program, semester, original_code)
+                remaining = delete_subject(program, semester, original_code)
                 st.success("✅ Subject deleted.")
-                safe_rerun()
+                if remaining:
+                    st.warning(f"{remaining} timetable cells still use {original_code}.")
+                else:
+                    safe_rerun()
 
         st.markdown("#### Subject summary for selected semester")
         st.dataframe(
@@ -687,15 +627,27 @@ def show_admin():
         room_number_value = current_semester_metadata.get("room_number", "")
 
         st.markdown("#### Semester room assignment")
-        room_number_input = st.text_input(
-            "Room Number",
-            value=room_number_value,
-            key="semester_room_number"
-        ).strip()
+        room_col1, room_col2 = st.columns(2)
+        with room_col1:
+            room_number_input = st.text_input(
+                "Room Number",
+                value=room_number_value,
+                key="semester_room_number"
+            ).strip()
+        with room_col2:
+            students_input = st.number_input(
+                "Students",
+                min_value=0,
+                value=rooms.semester_size(current_semester_metadata),
+                step=1,
+                key="semester_students"
+            )
 
         if st.button("Save Room Number", key="save_room_number_btn"):
             ensure_nested_dict(semester_metadata, program, semester)
             semester_metadata[program][semester]["room_number"] = room_number_input
+            semester_metadata[program][semester]["students"] = int(students_input)
+            room_index.update_semester(program, semester)
             save_all_state()
             st.success("✅ Room number saved for selected semester.")
 
@@ -713,15 +665,25 @@ def show_admin():
     )
 
     st.markdown("Use subject codes in the timetable cells, e.g. `P1 (RL)`. Leave breaks blank or use `Lunch break`.")
+    if scenario:
+        st.info(f"Editing scenario **{scenario.name}**; saving records the changed cells there and leaves the live timetable alone.")
     edited_df = st.data_editor(
         timetable_df,
         num_rows="fixed",
         use_container_width=True,
-        key="selected_timetable_editor"
+        key=f"selected_timetable_editor_{scenario_name}"
     )
     if st.button("Save Timetable", key="save_timetable_btn"):
-        save_updated_timetable(program, semester, edited_df)
-        st.success("✅ Timetable saved successfully")
+        if scenario:
+            changed = scenario.update_table(program, semester, edited_df.values.tolist())
+            scenarios.save(scenario, store)
+            st.success(f"✅ {changed} cells saved to scenario {scenario.name}")
+        else:
+            edit_clashes = save_updated_timetable(program, semester, edited_df, parity=semester_type)
+            st.success("✅ Timetable saved successfully")
+            if edit_clashes:
+                st.error("❌ This timetable now clashes with other programs")
+                render_clashes(edit_clashes)
 
     st.markdown(
         "<div style='padding:16px; border-radius:12px; background:#fff3e0; border:1px solid #ffcc80; margin-top:24px;'>"
@@ -732,18 +694,241 @@ def show_admin():
     )
 
     if st.button("Check Clashes", key="admin_clash_btn"):
-        clashes = check_clashes(timetables, subject_faculty_map, parity=semester_type)
+        if scenario:
+            clashes = check_scenario_clashes(scenario, parity=semester_type)
+        else:
+            clashes = check_clashes(timetables, subject_faculty_map, parity=semester_type)
         if clashes:
             st.error("❌ Faculty clashes found")
-            for c in clashes:
-                st.write(
-                    f"👤 **{c['faculty']}** ⛔ {c['time']} | "
-                    f"{c['program1']} {c['semester1']} ({c['subject1']}) "
-                    f"vs {c['program2']} {c['semester2']} ({c['subject2']})"
-                )
+            render_clashes(clashes)
         else:
             st.success("✅ No clashes found")
 
+    st.markdown(
+        "<div style='padding:16px; border-radius:12px; background:#e0f7fa; border:1px solid #80deea; margin-top:24px;'>"
+        "<h3 style='margin:0; color:#006064;'>5. Bulk Export</h3>"
+        "<p style='margin:4px 0 0; color:#37474f;'>Render every program, semester and faculty timetable into one PDF or ZIP of PNGs.</p>"
+        "</div>",
+        unsafe_allow_html=True,
+    )
+
+    export_col1, export_col2 = st.columns([1, 2])
+    with export_col1:
+        export_format = st.radio("Format", ["PDF", "ZIP"], horizontal=True, key="bulk_export_format")
+    with export_col2:
+        export_parity_only = st.checkbox(f"Only {semester_type.lower()} semesters", value=True, key="bulk_export_parity")
+        export_faculty = st.checkbox("Include faculty timetables", value=True, key="bulk_export_faculty")
+
+    export_key = (export_format, semester_type if export_parity_only else None, export_faculty, store.version)
+    if st.button("Build Export", key="bulk_export_btn"):
+        tables = bulk_export.all_tables(
+            timetables,
+            semester_metadata,
+            faculties,
+            parity=export_key[1],
+            include_faculty=export_faculty,
+            subject_faculty_map=subject_faculty_map,
+            faculty_index=FacultyIndex.for_store(store),
+        )
+        with st.spinner("Rendering timetables..."):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                export_path = os.path.join(tmp_dir, f"timetables.{export_format.lower()}")
+                count = bulk_export.export(export_path, export_format.lower(), tables)
+                with open(export_path, "rb") as f:
+                    st.session_state["bulk_export"] = (export_key, f.read(), count)
+
+    exported = st.session_state.get("bulk_export")
+    if exported and exported[0] == export_key:
+        _, export_bytes, count = exported
+        st.download_button(
+            label=f"📥 Download {count} timetables ({export_format})",
+            data=export_bytes,
+            file_name=f"timetables.{export_format.lower()}",
+            mime="application/pdf" if export_format == "PDF" else "application/zip",
+            key="bulk_export_download"
+        )
+
+
+    st.markdown(
+        "<div style='padding:16px; border-radius:12px; background:#e8f5e9; border:1px solid #a5d6a7; margin-top:24px;'>"
+        "<h3 style='margin:0; color:#1b5e20;'>6. Rooms</h3>"
+        "<p style='margin:4px 0 0; color:#2e4732;'>Room inventory, room clashes and automatic room assignment.</p>"
+        "</div>",
+        unsafe_allow_html=True,
+    )
+
+    room_inventory = store.rooms
+    rooms_df = pd.DataFrame(
+        [{"Room": room, "Capacity": capacity} for room, capacity in rooms.room_capacities(room_inventory).items()],
+        columns=["Room", "Capacity"]
+    )
+    edited_rooms = st.data_editor(rooms_df, num_rows="dynamic", use_container_width=True, key="rooms_editor")
+    if st.button("Save Rooms", key="save_rooms_btn"):
+        store.save("rooms.json", {
+            str(row["Room"]).strip(): {"capacity": int(row["Capacity"] or 0)}
+            for _, row in edited_rooms.dropna(subset=["Room"]).iterrows()
+            if str(row["Room"]).strip()
+        })
+        st.success("✅ Rooms saved.")
+
+    room_col1, room_col2 = st.columns(2)
+    with room_col1:
+        if st.button("Check Room Clashes", key="admin_room_clash_btn"):
+            room_clashes = check_room_clashes(parity=semester_type)
+            if room_clashes:
+                st.error("❌ Room clashes found")
+                render_room_clashes(room_clashes)
+            else:
+                st.success("✅ No room clashes found")
+    with room_col2:
+        if st.button(f"Assign rooms to {semester_type.lower()} semesters", key="admin_assign_rooms_btn"):
+            if not room_inventory:
+                st.warning("Add rooms to the inventory first.")
+            else:
+                room_index.bind(timetables, semester_metadata, subject_metadata)
+                assignments, unplaced = rooms.assign_rooms(room_index, room_inventory, parity=semester_type)
+                rooms.apply_assignments(semester_metadata, assignments)
+                for owner in assignments:
+                    room_index.update_semester(*owner)
+                store.save("semester_metadata.json", semester_metadata)
+                moved = sum(len(item["room_overrides"]) for item in assignments.values())
+                st.success(f"✅ Assigned rooms to {len(assignments)} semesters ({moved} sessions moved from their home room).")
+                if unplaced:
+                    st.error(f"❌ {len(unplaced)} sessions have no free room that fits")
+                    for program_name, semester_name, session in unplaced:
+                        st.write(f"🚪 {program_name} {semester_name} — {session}")
+
+    st.markdown(
+        "<div style='padding:16px; border-radius:12px; background:#ede7f6; border:1px solid #b39ddb; margin-top:24px;'>"
+        "<h3 style='margin:0; color:#4527a0;'>7. Scenarios</h3>"
+        "<p style='margin:4px 0 0; color:#37334a;'>Try alternative timetables without touching live data, compare them and merge one back.</p>"
+        "</div>",
+        unsafe_allow_html=True,
+    )
+
+    new_col1, new_col2 = st.columns([2, 1])
+    with new_col1:
+        new_scenario_name = st.text_input("New scenario name", key="new_scenario_name").strip()
+    with new_col2:
+        copy_current = st.checkbox("Copy the scenario being edited", value=bool(scenario), key="new_scenario_copy")
+    if st.button("Create Scenario", key="create_scenario_btn"):
+        if not new_scenario_name or new_scenario_name == "Live timetable":
+            st.warning("Enter a scenario name.")
+        elif new_scenario_name in scenario_names:
+            st.error(f"Scenario {new_scenario_name} already exists.")
+        else:
+            if scenario and copy_current:
+                scenarios.fork(scenario, new_scenario_name, store)
+            else:
+                scenarios.save(scenarios.Scenario(new_scenario_name, timetables), store)
+            st.success(f"✅ Scenario {new_scenario_name} created. Select it under \"Working on\" to edit it.")
+            safe_rerun()
+
+    if scenario:
+        changes = scenario.diff()
+        conflicts = [change for change in changes if change[6]]
+        st.markdown(f"#### {scenario.name}: {len(changes)} cells differ from the live timetable")
+        if changes:
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "Program": program_name,
+                            "Semester": semester_name,
+                            "Time": scenario.get(program_name, semester_name, row, 0),
+                            "Day": DEFAULT_DAY_NAMES[day - 1] if day <= len(DEFAULT_DAY_NAMES) else f"DAY {day}",
+                            "Live": live,
+                            "Scenario": value,
+                            "Conflict": "Yes" if conflict else "",
+                        }
+                        for program_name, semester_name, row, day, live, value, conflict in changes
+                    ]
+                ),
+                use_container_width=True,
+                hide_index=True
+            )
+        if conflicts:
+            st.warning(f"{len(conflicts)} cells changed in the live timetable since they were edited here.")
+
+        merge_col1, merge_col2, merge_col3 = st.columns(3)
+        with merge_col1:
+            force_merge = st.checkbox("Overwrite conflicting cells", key="scenario_force_merge")
+        with merge_col2:
+            if st.button("Merge into Live Timetable", key="merge_scenario_btn"):
+                merged, merge_conflicts = scenarios.merge(scenario, store, force=force_merge)
+                if merge_conflicts and not force_merge:
+                    st.error(f"❌ {len(merge_conflicts)} conflicting cells; nothing was merged.")
+                else:
+                    for program_name, semester_name in merged:
+                        occupancy.update_semester(program_name, semester_name)
+                        room_index.update_semester(program_name, semester_name)
+                    st.success(f"✅ Merged {scenario.name} into {len(merged)} semesters.")
+                    safe_rerun()
+        with merge_col3:
+            if st.button("Delete Scenario", key="delete_scenario_btn"):
+                scenarios.delete(scenario.name, store)
+                st.success(f"✅ Scenario {scenario.name} deleted.")
+                safe_rerun()
+
+    st.markdown(
+        "<div style='padding:16px; border-radius:12px; background:#eceff1; border:1px solid #b0bec5; margin-top:24px;'>"
+        "<h3 style='margin:0; color:#263238;'>8. History</h3>"
+        "<p style='margin:4px 0 0; color:#37474f;'>Every save is journaled as a small delta; undo, redo or go back to any earlier state.</p>"
+        "</div>",
+        unsafe_allow_html=True,
+    )
+
+    if not journal.enabled(store):
+        st.caption("The change journal is off. Start the app with `TIMETABLE_JOURNAL=1` to record history.")
+        return
+
+    history_col1, history_col2, history_col3 = st.columns(3)
+    with history_col1:
+        if st.button("↶ Undo", key="journal_undo_btn"):
+            entry = journal.undo(store)
+            if entry:
+                st.success(f"✅ Undid #{entry['target']}.")
+                safe_rerun()
+            else:
+                st.info("Nothing to undo.")
+    with history_col2:
+        if st.button("↷ Redo", key="journal_redo_btn"):
+            entry = journal.redo(store)
+            if entry:
+                st.success(f"✅ Redid #{entry['target']}.")
+                safe_rerun()
+            else:
+                st.info("Nothing to redo.")
+    with history_col3:
+        if st.button("Compact Journal", key="journal_compact_btn"):
+            seq = journal.compact(store)
+            st.success(f"✅ Compacted into snapshot #{seq}." if seq else "Nothing to compact.")
+
+    entries = journal.log(store, limit=50)
+    if entries:
+        st.dataframe(
+            pd.DataFrame([{"Change": journal.describe(entry)} for entry in entries]),
+            use_container_width=True,
+            hide_index=True
+        )
+        restore_col1, restore_col2 = st.columns([2, 1])
+        with restore_col1:
+            restore_seq = st.number_input(
+                "Restore the state after change #",
+                min_value=0,
+                max_value=entries[0]["seq"],
+                value=entries[0]["seq"],
+                step=1,
+                key="journal_restore_seq"
+            )
+        with restore_col2:
+            if st.button("Restore", key="journal_restore_btn"):
+                restored = journal.restore(int(restore_seq), store)
+                st.success(f"✅ Restored {', '.join(restored)} to #{int(restore_seq)}; undo reverts the restore.")
+                safe_rerun()
+    else:
+        st.caption("No changes recorded yet.")
+
 
 if __name__ == "__main__":
     show_admin()
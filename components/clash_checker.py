@@ -1,50 +1,79 @@
-import re
-from difflib import SequenceMatcher
+from collections import defaultdict
+from functools import lru_cache
+from utils.cell_parser import parse_cell
 
 
 def extract_faculties_from_cell(cell):
-    return re.findall(r"\((.*?)\)", cell)
+    return list(parse_cell(cell).faculty)
 
 
 def extract_subject_from_cell(cell):
-    return cell.split(" ")[0] if cell else ""
+    return parse_cell(cell).code
+
+
+@lru_cache(maxsize=4096)
+def subject_similarity(subj1, subj2):
+    from difflib import SequenceMatcher
+
+    return SequenceMatcher(None, subj1.lower(), subj2.lower()).ratio()
 
 
 def is_similar_subject(subj1, subj2, threshold=0.85):
-    return SequenceMatcher(None, subj1.lower(), subj2.lower()).ratio() >= threshold
+    return subject_similarity(subj1, subj2) >= threshold
 
 
 def find_all_clashes_and_common_subjects(timetables):
+    tables = [
+        (program, semester, table)
+        for program, semesters in timetables.items()
+        for semester, table in semesters.items()
+    ]
+
+    # Only cells in the same row, time and day can clash, so bucket on that.
+    buckets = defaultdict(list)
+    for position, (_, _, table) in enumerate(tables):
+        for row_index, row in enumerate(table):
+            time, *cells = row
+            for day_index, cell in enumerate(cells):
+                faculties = extract_faculties_from_cell(cell)
+                if faculties:
+                    buckets[(row_index, time, day_index)].append((position, cell, faculties))
+
+    found = []
+    for (row_index, time, day_index), entries in buckets.items():
+        by_faculty = defaultdict(list)
+        for entry_index, (_, _, faculties) in enumerate(entries):
+            for faculty in set(faculties):
+                by_faculty[faculty].append(entry_index)
+
+        pairs = {(entry_index, entry_index) for entry_index in range(len(entries))}
+        for entry_indexes in by_faculty.values():
+            for i, first in enumerate(entry_indexes):
+                for second in entry_indexes[i + 1:]:
+                    pairs.add((first, second))
+
+        for first, second in pairs:
+            pos1, cell1, faculties1 = entries[first]
+            pos2, cell2, faculties2 = entries[second]
+            # Same ordering rule as the pairwise scan: the lower (program, semester) comes first.
+            if tables[pos1][:2] > tables[pos2][:2]:
+                pos1, cell1, faculties1, pos2, cell2, faculties2 = pos2, cell2, faculties2, pos1, cell1, faculties1
+            found.append(((pos1, pos2, row_index, day_index), time, cell1, faculties1, cell2, faculties2))
+
     clashes = []
     common_subjects = []
+    found.sort(key=lambda item: item[0])
+    for (pos1, pos2, _, _), time, cell1, faculties1, cell2, faculties2 in found:
+        prog1, sem1, _ = tables[pos1]
+        prog2, sem2, _ = tables[pos2]
+        common = set(faculties1).intersection(faculties2)
+        subj1 = extract_subject_from_cell(cell1)
+        subj2 = extract_subject_from_cell(cell2)
 
-    for prog1, sems1 in timetables.items():
-        for sem1, table1 in sems1.items():
-            for prog2, sems2 in timetables.items():
-                for sem2, table2 in sems2.items():
-                    # Avoid duplicate checks
-                    if (prog1, sem1) > (prog2, sem2):
-                        continue
-
-                    for row1, row2 in zip(table1, table2):
-                        time1, *cells1 = row1
-                        time2, *cells2 = row2
-                        if time1 != time2:
-                            continue
-
-                        for day_index, (cell1, cell2) in enumerate(zip(cells1, cells2)):
-                            faculties1 = extract_faculties_from_cell(cell1)
-                            faculties2 = extract_faculties_from_cell(cell2)
-                            common = set(faculties1).intersection(faculties2)
-
-                            if common:
-                                subj1 = extract_subject_from_cell(cell1)
-                                subj2 = extract_subject_from_cell(cell2)
-
-                                if is_similar_subject(subj1, subj2):
-                                    common_subjects.append(f"{subj1} ≈ {subj2} at {time1} ({prog1}-{sem1} & {prog2}-{sem2})")
-                                else:
-                                    for f in common:
-                                        clashes.append(f"Faculty {f} assigned in both {prog1}-{sem1} and {prog2}-{sem2} at {time1}")
+        if is_similar_subject(subj1, subj2):
+            common_subjects.append(f"{subj1} ≈ {subj2} at {time} ({prog1}-{sem1} & {prog2}-{sem2})")
+        else:
+            for f in common:
+                clashes.append(f"Faculty {f} assigned in both {prog1}-{sem1} and {prog2}-{sem2} at {time}")
 
     return clashes, common_subjects
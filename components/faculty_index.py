@@ -0,0 +1,96 @@
+from collections import Counter
+from data import sqlite_backend
+from data.assignments import resolved
+from data.master import store as default_store
+from data.timetable import days, semester_parity_matches, short_label, time_slots
+from utils import profiler
+
+
+class FacultyIndex:
+    """Faculty code -> taught slots, from the resolved assignments.
+
+    ``for_store`` keeps one index per ``store.version`` so the faculty view
+    only rescans the timetable after the data actually changed.
+    """
+
+    def __init__(self, timetables, resolved_assignments):
+        self.timetables = timetables
+        self.entries = resolved_assignments.by_faculty  # faculty -> [Assignment]
+
+    def faculty_codes(self):
+        return sorted(self.entries)
+
+    def entries_for(self, faculty_code):
+        return self.entries.get(faculty_code, [])
+
+    # ------------------ Views ------------------
+    def consolidated(self, faculty_code, parity=None):
+        grid = [[slot] + [""] * (len(days) - 1) for slot in time_slots]
+        for entry in self.entries_for(faculty_code):
+            if parity is not None and not semester_parity_matches(entry.semester, parity):
+                continue
+            if entry.row < len(grid) and entry.day < len(days):
+                grid[entry.row][entry.day] = self.label(entry, faculty_code)
+        return grid
+
+    def program_tables(self, faculty_code):
+        """{"program - semester": rows} with only this faculty's slots filled in."""
+        tables = {}
+        for entry in self.entries_for(faculty_code):
+            key = f"{entry.program} - {entry.semester}"
+            rows = tables.get(key)
+            if rows is None:
+                source = self.timetables[entry.program][entry.semester]
+                rows = tables[key] = [[row[0]] + [""] * (len(row) - 1) for row in source]
+            rows[entry.row][entry.day] = self.label(entry, faculty_code)
+        return tables
+
+    def load_summary(self, faculty_code):
+        """Sorted [(program, semester, subject, hours)]."""
+        counts = Counter(
+            (entry.program, entry.semester, entry.subject)
+            for entry in self.entries_for(faculty_code)
+        )
+        return [key + (hours,) for key, hours in sorted(counts.items())]
+
+    def label(self, entry, faculty_code):
+        # e.g. P1 (RJ) [CS1]
+        return f"{entry.subject} ({faculty_code}) [{short_label(entry.program, entry.semester)}]"
+
+    @classmethod
+    def for_store(cls, store=default_store):
+        """On SQLite (``TIMETABLE_DB``) a ``QueryFacultyIndex``, otherwise one built from ``resolved(store)``."""
+        backend = sqlite_backend.queries(store)
+        # Load first so the version below is current
+        resolved_assignments = resolved(store) if backend is None else None
+        timetables = store.timetables
+        cached = _indexes.get(id(store))
+        if cached is None or cached[0] != store.version:
+            with profiler.span("faculty_index"):
+                if backend is None:
+                    index = cls(timetables, resolved_assignments)
+                else:
+                    index = QueryFacultyIndex(timetables, backend)
+                cached = _indexes[id(store)] = (store.version, index)
+        return cached[1]
+
+
+class QueryFacultyIndex(FacultyIndex):
+    """``FacultyIndex`` that asks SQLite for one faculty's slots at a time instead of resolving every cell."""
+
+    def __init__(self, timetables, backend):
+        self.timetables = timetables
+        self.backend = backend
+        self.entries = {}  # faculty -> [Assignment], filled on first use
+
+    def faculty_codes(self):
+        return sorted(self.backend.faculty_load())
+
+    def entries_for(self, faculty_code):
+        entries = self.entries.get(faculty_code)
+        if entries is None:
+            entries = self.entries[faculty_code] = self.backend.faculty_cells(faculty_code)
+        return entries
+
+
+_indexes = {}
@@ -1,59 +1,55 @@
 import streamlit as st
-import pandas as pd
-import json
-import re
 from collections import defaultdict
+from data.master import store
+from data import availability, sqlite_backend
+from data.assignments import ResolvedAssignments, resolved
 
 
 # --- Load Data ---
 def load_data():
-    with open("data/timetable.json") as f:
-        timetables = json.load(f)
-    with open("data/faculties.json") as f:
-        faculties = json.load(f)
-    return timetables, faculties
+    return store.timetables, store.faculties
 
 
 # --- Calculate Load Distribution ---
-def calculate_faculty_load(timetables):
-    faculty_hours = defaultdict(int)
-
-    for program, semesters in timetables.items():
-        for semester, timetable_data in semesters.items():
-            if isinstance(timetable_data, dict) and "Semester I" in timetable_data:
-                timetable = timetable_data["Semester I"]
-            elif isinstance(timetable_data, list):  # fallback for direct list structure
-                timetable = timetable_data
-            else:
-                continue
-
-            for row in timetable:
-                for cell in row[1:]:  # skip time column
-                    if not isinstance(cell, str) or not cell.strip():
-                        continue
-                    # Extract all (...) groups
-                    matches = re.findall(r"\(([^)]+)\)", cell)
-                    for match in matches:
-                        # Handle comma-separated faculty codes inside the same parenthesis
-                        faculty_codes = [code.strip() for code in match.split(',')]
-                        for code in faculty_codes:
-                            if code:  # skip empty strings
-                                faculty_hours[code] += 1
-    return faculty_hours
+def calculate_faculty_load(timetables, backend="python", subject_faculty_map=None):
+    """Hours per faculty; cells without faculty fall back to ``subject_faculty_map`` when given."""
+    if backend == "numpy":
+        from data import tensor
+        return defaultdict(int, tensor.faculty_load(tensor.build_tensor(timetables, subject_faculty_map)))
+    return defaultdict(int, ResolvedAssignments(timetables, subject_faculty_map or {}).faculty_load())
 
 # --- Display UI ---
 def show_faculty_load_distribution():
+    import pandas as pd
+
     st.title("📊 Faculty Load Distribution")
 
     timetables, faculties = load_data()
-    faculty_hours = calculate_faculty_load(timetables)
+    faculty_availability = availability.for_store(store)
+    backend = sqlite_backend.queries(store)
+    if backend is not None:
+        # Hours from one GROUP BY; slots only for the faculty that set availability
+        faculty_hours = backend.faculty_load()
+        assignments = [
+            assignment
+            for faculty in set(faculty_availability.unavailable) | set(faculty_availability.preferred)
+            for assignment in backend.faculty_cells(faculty)
+        ]
+    else:
+        resolved_assignments = resolved(store)  # rebuilt only when the data version changes
+        faculty_hours = resolved_assignments.faculty_load()
+        assignments = resolved_assignments.assignments
+    flagged = availability.violations(faculty_availability, availability.teaching_masks(assignments))
 
     # Convert to DataFrame
     data = [
         {
             "Faculty Code": f,
             "Name": faculties.get(f, "Unknown"),
-            "Total Hours/Week": h
+            "Total Hours/Week": h,
+            "Unavailable Slots": bin(faculty_availability.unavailable.get(f, 0)).count("1"),
+            "Taught While Unavailable": bin(flagged.get(f, (0, 0))[0]).count("1"),
+            "Outside Preferred": bin(flagged.get(f, (0, 0))[1]).count("1"),
         }
         for f, h in faculty_hours.items()
     ]
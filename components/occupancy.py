@@ -0,0 +1,239 @@
+from collections import defaultdict
+from data.assignments import resolve_faculty
+from data.timetable import semester_parity_matches
+from utils.cell_parser import parse_cell
+
+
+class OccupancyIndex:
+    """Faculty occupancy keyed by (faculty, day, time slot).
+
+    Faculty per cell follow ``data.assignments.resolve_faculty``: the cell's
+    own ``(RJ, CK)`` if present, otherwise the subject-faculty map.
+
+    The index is built once from the timetable and the subject-faculty map and
+    then kept current through the ``update_*`` / ``remove_*`` hooks, so a clash
+    query only has to look at the slots that hold more than one entry.
+    """
+
+    def __init__(self):
+        self.timetables = None
+        self.subject_faculty_map = None
+        self.subject_metadata = None
+        # (faculty, day_idx, time_slot) -> {(program, semester, row_idx): (subject_cell, subject_key, faculty_pos)}
+        self._slots = defaultdict(dict)
+        # (program, semester) -> {(row_idx, day_idx): (time_slot, subject_cell, subject_key, faculty_list)}
+        self._cells = {}
+        self._contended = set()
+
+    # ------------------ Binding ------------------
+    def bind(self, timetables, subject_faculty_map, subject_metadata=None):
+        subject_metadata = {} if subject_metadata is None else subject_metadata
+        if (
+            timetables is self.timetables
+            and subject_faculty_map is self.subject_faculty_map
+            and subject_metadata is self.subject_metadata
+        ):
+            return
+        self.timetables = timetables
+        self.subject_faculty_map = subject_faculty_map
+        self.subject_metadata = subject_metadata
+        self.rebuild()
+
+    def copy(self, timetables=None):
+        """An independent index over ``timetables`` (default: the same data), starting from this one's
+        entries; follow it with ``update_cells`` for the semesters that differ."""
+        index = OccupancyIndex()
+        index.timetables = self.timetables if timetables is None else timetables
+        index.subject_faculty_map = self.subject_faculty_map
+        index.subject_metadata = self.subject_metadata
+        index._slots = defaultdict(dict, {key: dict(bucket) for key, bucket in self._slots.items()})
+        index._cells = {owner: dict(cells) for owner, cells in self._cells.items()}
+        index._contended = set(self._contended)
+        return index
+
+    @classmethod
+    def from_slots(cls, timetables, subject_faculty_map, subject_metadata, slots):
+        """A query-only index over ``slots`` ({key: {(program, semester, row_idx): entry}}), e.g.
+        ``SqliteBackend.contended_slots()``; it holds no cells, so skip the ``update_*`` hooks."""
+        index = cls()
+        index.timetables = timetables
+        index.subject_faculty_map = subject_faculty_map
+        index.subject_metadata = {} if subject_metadata is None else subject_metadata
+        for key, entries in slots.items():
+            for owner, entry in entries.items():
+                index._add(key, owner, entry)
+        return index
+
+    def rebuild(self):
+        self._slots.clear()
+        self._cells.clear()
+        self._contended.clear()
+        for program, semesters in self.timetables.items():
+            for semester in semesters:
+                self.update_semester(program, semester)
+
+    # ------------------ Incremental updates ------------------
+    def _add(self, key, owner, entry):
+        bucket = self._slots[key]
+        bucket[owner] = entry
+        if len(bucket) > 1:
+            self._contended.add(key)
+
+    def _discard(self, key, owner):
+        bucket = self._slots.get(key)
+        if bucket is None:
+            return
+        bucket.pop(owner, None)
+        if len(bucket) < 2:
+            self._contended.discard(key)
+        if not bucket:
+            del self._slots[key]
+
+    def _drop_cell(self, program, semester, row_idx, day_idx):
+        cells = self._cells.get((program, semester))
+        if not cells:
+            return set()
+        indexed = cells.pop((row_idx, day_idx), None)
+        if indexed is None:
+            return set()
+        time_slot, _, _, faculty_list = indexed
+        keys = {(faculty, day_idx, time_slot) for faculty in faculty_list}
+        for key in keys:
+            self._discard(key, (program, semester, row_idx))
+        return keys
+
+    def update_cell(self, program, semester, row_idx, day_idx):
+        """Re-index one cell; returns the (faculty, day, slot) keys it left or joined."""
+        keys = self._drop_cell(program, semester, row_idx, day_idx)
+        table = self.timetables.get(program, {}).get(semester, [])
+        if row_idx >= len(table) or day_idx >= len(table[row_idx]):
+            return keys
+        row = table[row_idx]
+        time_slot = row[0]
+        subject_code = row[day_idx]
+        cell = parse_cell(subject_code)
+        if not cell.is_class:
+            return keys
+        subject_key = cell.code
+        faculty_list, _ = resolve_faculty(cell, self.subject_faculty_map.get(program, {}).get(semester, {}))
+        if not faculty_list:
+            return keys
+        self._cells.setdefault((program, semester), {})[(row_idx, day_idx)] = (
+            time_slot, subject_code, subject_key, faculty_list
+        )
+        for faculty_pos, faculty in enumerate(faculty_list):
+            key = (faculty, day_idx, time_slot)
+            keys.add(key)
+            self._add(key, (program, semester, row_idx), (subject_code, subject_key, faculty_pos))
+        return keys
+
+    def remove_semester(self, program, semester):
+        for row_idx, day_idx in list(self._cells.get((program, semester), {})):
+            self._drop_cell(program, semester, row_idx, day_idx)
+        self._cells.pop((program, semester), None)
+
+    def update_semester(self, program, semester):
+        self.remove_semester(program, semester)
+        for row_idx, row in enumerate(self.timetables.get(program, {}).get(semester, [])):
+            for day_idx in range(1, len(row)):
+                self.update_cell(program, semester, row_idx, day_idx)
+
+    def update_cells(self, program, semester, previous_table):
+        """Re-index only the cells that differ from ``previous_table``; returns the touched keys."""
+        table = self.timetables.get(program, {}).get(semester, [])
+        keys = set()
+        if len(table) != len(previous_table) or any(
+            len(row) != len(old_row) or row[0] != old_row[0] for row, old_row in zip(table, previous_table)
+        ):
+            for row_idx, day_idx in list(self._cells.get((program, semester), {})):
+                keys |= self._drop_cell(program, semester, row_idx, day_idx)
+            for row_idx, row in enumerate(table):
+                for day_idx in range(1, len(row)):
+                    keys |= self.update_cell(program, semester, row_idx, day_idx)
+            return keys
+        for row_idx, (row, old_row) in enumerate(zip(table, previous_table)):
+            for day_idx in range(1, len(row)):
+                if row[day_idx] != old_row[day_idx]:
+                    keys |= self.update_cell(program, semester, row_idx, day_idx)
+        return keys
+
+    def remove_program(self, program):
+        for indexed_program, semester in list(self._cells):
+            if indexed_program == program:
+                self.remove_semester(program, semester)
+
+    def update_mapping(self, program, semester, subject_key=None):
+        if subject_key is None:
+            self.update_semester(program, semester)
+            return
+        table = self.timetables.get(program, {}).get(semester, [])
+        for row_idx, row in enumerate(table):
+            for day_idx in range(1, len(row)):
+                if parse_cell(row[day_idx]).code == subject_key:
+                    self.update_cell(program, semester, row_idx, day_idx)
+
+    def update_faculty(self, faculty_code):
+        affected = {
+            (program, semester)
+            for key, bucket in self._slots.items() if key[0] == faculty_code
+            for program, semester, _ in bucket
+        }
+        for program, semesters in self.subject_faculty_map.items():
+            for semester, mapping in semesters.items():
+                if any(faculty_code in faculty_list for faculty_list in mapping.values()):
+                    affected.add((program, semester))
+        for program, semester in affected:
+            self.update_semester(program, semester)
+
+    # ------------------ Queries ------------------
+    def is_common(self, program, semester, subject_key):
+        return bool(self.subject_metadata.get(program, {}).get(semester, {}).get(subject_key, {}).get("is_common", False))
+
+    def _order(self):
+        return {
+            (program, semester): position
+            for position, (program, semester) in enumerate(
+                (program, semester)
+                for program, semesters in self.timetables.items()
+                for semester in semesters
+            )
+        }
+
+    def _slot_clashes(self, key, order, parity):
+        faculty, day_idx, time_slot = key
+        entries = sorted(
+            (
+                (order.get((program, semester), len(order)), row_idx, entry[2], program, semester, entry)
+                for (program, semester, row_idx), entry in self._slots.get(key, {}).items()
+                if parity is None or semester_parity_matches(semester, parity)
+            ),
+            key=lambda item: item[:3]
+        )
+        if len(entries) < 2:
+            return []
+        _, _, _, first_program, first_semester, first_entry = entries[0]
+        first_common = self.is_common(first_program, first_semester, first_entry[1])
+        clashes = []
+        for position, row_idx, faculty_pos, program, semester, entry in entries[1:]:
+            if first_common and self.is_common(program, semester, entry[1]):
+                continue
+            clashes.append(((position, row_idx, day_idx, faculty_pos), {
+                "faculty": faculty,
+                "time": time_slot,
+                "program1": first_program,
+                "semester1": first_semester,
+                "subject1": first_entry[0],
+                "program2": program,
+                "semester2": semester,
+                "subject2": entry[0]
+            }))
+        return clashes
+
+    def clashes(self, parity=None, keys=None):
+        keys = self._contended if keys is None else [key for key in keys if key in self._contended]
+        order = self._order()
+        found = []
+        for key in keys:
+            found.extend(self._slot_clashes(key, order, parity))
+        found.sort(key=lambda item: item[0])
+        return [clash for _, clash in found]
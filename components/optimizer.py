@@ -0,0 +1,491 @@
+"""Improve existing timetables by simulated annealing.
+
+A move swaps two cells of the same semester: a class with another class or
+with a free cell. Lunch, Library/Mentoring and the time column never move,
+so every subject keeps its weekly hours. The score combines:
+
+* hard: faculty clashes under the ``check_clashes`` rules (faculty
+  resolved by ``data.assignments.resolve_faculty``, double bookings of two
+  ``is_common`` subjects allowed);
+* gaps: free slots between a faculty member's first and last class of a day;
+* labs: lab (``L*``) hours without an adjacent hour of the same lab;
+* spread: uneven class load across the days of a semester and theory
+  subjects taught twice on one day.
+
+Only the columns and faculty-days touched by a move are rescored, so a
+chain runs tens of thousands of moves per second. Independent chains run
+in a process pool, one per core. Chains and the final pick compare
+results by (clashes, soft cost), so a clash-free result always beats one
+with clashes, whatever their soft penalties; the result has clashes only
+if no chain removed them all. A result with more clashes than the input
+is never returned (the report's ``kept`` says which layout came back).
+
+    python -m components.optimizer --time 60 --seed 1 -o optimized.json
+    python -m components.optimizer --moves 2000000 --seed 1 --write
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from data.assignments import resolve_faculty
+from data.timetable import parse_semester_number, time_slots
+from utils.cell_parser import CLASS, EMPTY, parse_cell
+
+LUNCH_SLOT = "01.00 - 02.00"
+WEIGHTS = {"hard": 1000, "gaps": 3, "labs": 10, "spread": 1}
+START_TEMPERATURE = 4.0
+END_TEMPERATURE = 0.05
+TIME_CHECK_EVERY = 2048
+
+
+def slot_start(label):
+    """Sort key for a slot label such as ``02.00 - 03.00``; hours before 8 are afternoon."""
+    match = re.match(r"\s*(\d{1,2})[.:](\d{2})", str(label))
+    if not match:
+        return (99, 0)
+    hour, minute = int(match.group(1)), int(match.group(2))
+    return (hour + 12 if hour < 8 else hour, minute)
+
+
+def term_of(semester):
+    number = parse_semester_number(semester)
+    if number is None:
+        return None
+    return "Odd" if number % 2 else "Even"
+
+
+# ------------------ Problem ------------------
+class Problem:
+    """Integer encoding of the timetables shared by all chains.
+
+    ``grids[s][row][day]`` holds an item id, ``-1`` for a free cell or ``None``
+    for a fixed one. Faculty ids are per (term, faculty), so odd and even
+    semesters never clash with each other; semesters without a number are
+    kept fixed and occupy their faculty in both terms.
+    """
+
+    def __init__(self, timetables, subject_faculty_map, subject_metadata=None, parity=None):
+        subject_metadata = subject_metadata or {}
+        self.slot_labels = list(time_slots)
+        self.semesters = []          # [(program, semester)]
+        self.grids = []
+        self.row_slots = []          # per semester: slot ordinal of each row
+        self.items = []              # [(text, code, faculty_ids, is_common, is_lab)]
+        self.faculty_ids = {}
+        self.fixed_entries = []      # [(faculty_id, day, slot, is_common)] from fixed semesters
+        self.lunch_slot = self._slot(LUNCH_SLOT)
+
+        terms = ("Odd", "Even") if parity is None else (parity,)
+        for program, semesters in timetables.items():
+            for semester, table in semesters.items():
+                if not isinstance(table, list) or not table:
+                    continue
+                term = term_of(semester)
+                mapping = subject_faculty_map.get(program, {}).get(semester, {})
+                metadata = subject_metadata.get(program, {}).get(semester, {})
+                if term not in terms:
+                    if term is None:
+                        self._add_fixed(table, mapping, metadata, terms)
+                    continue
+                self._add_semester(program, semester, table, term, mapping, metadata)
+        self.day_count = max((len(row) for grid in self.grids for row in grid), default=0)
+        self.slot_count = len(self.slot_labels)
+        self._sort_slots()
+
+    def _slot(self, label):
+        if label not in self.slot_labels:
+            self.slot_labels.append(label)
+        return self.slot_labels.index(label)
+
+    def _sort_slots(self):
+        # Programs use different slot labels; order them by start time so
+        # faculty gaps are measured in wall-clock order
+        order = sorted(range(self.slot_count), key=lambda slot: slot_start(self.slot_labels[slot]))
+        remap = {old: new for new, old in enumerate(order)}
+        self.slot_labels = [self.slot_labels[old] for old in order]
+        self.row_slots = [[remap[slot] for slot in slots] for slots in self.row_slots]
+        self.fixed_entries = [
+            (faculty, day, remap[slot], is_common) for faculty, day, slot, is_common in self.fixed_entries
+        ]
+        self.lunch_slot = remap[self.lunch_slot]
+
+    def _faculty(self, term, faculty):
+        return self.faculty_ids.setdefault((term, faculty), len(self.faculty_ids))
+
+    def _add_fixed(self, table, mapping, metadata, terms):
+        for row in table:
+            slot = self._slot(row[0])
+            for day in range(1, len(row)):
+                cell = parse_cell(row[day])
+                if not cell.is_class:
+                    continue
+                is_common = bool(metadata.get(cell.code, {}).get("is_common", False))
+                for faculty in resolve_faculty(cell, mapping)[0]:
+                    for term in terms:
+                        self.fixed_entries.append((self._faculty(term, faculty), day - 1, slot, is_common))
+
+    def _add_semester(self, program, semester, table, term, mapping, metadata):
+        grid = []
+        for row in table:
+            cells = []
+            for raw in row[1:]:
+                cell = parse_cell(raw)
+                if cell.kind == EMPTY:
+                    cells.append(-1)
+                elif cell.kind == CLASS:
+                    faculty = tuple(self._faculty(term, code) for code in dict.fromkeys(resolve_faculty(cell, mapping)[0]))
+                    self.items.append((
+                        raw,
+                        cell.code,
+                        faculty,
+                        bool(metadata.get(cell.code, {}).get("is_common", False)),
+                        cell.code.upper().startswith("L"),
+                    ))
+                    cells.append(len(self.items) - 1)
+                else:
+                    cells.append(None)
+            grid.append(cells)
+        self.semesters.append((program, semester))
+        self.grids.append(grid)
+        self.row_slots.append([self._slot(row[0]) for row in table])
+
+    def movable(self):
+        """Per semester, the (row, day) cells a move may touch."""
+        return [
+            [(row_idx, day) for row_idx, row in enumerate(grid) for day, item in enumerate(row) if item is not None]
+            for grid in self.grids
+        ]
+
+    def apply(self, timetables, grids):
+        """Return a copy of ``timetables`` with the cells laid out as in ``grids``."""
+        result = copy.deepcopy(timetables)
+        for (program, semester), original, grid in zip(self.semesters, self.grids, grids):
+            table = result[program][semester]
+            for row_idx, (old_row, row) in enumerate(zip(original, grid)):
+                for day, (old_item, item) in enumerate(zip(old_row, row)):
+                    if old_item is None:
+                        continue
+                    table[row_idx][day + 1] = "" if item == -1 else self.items[item][0]
+        return result
+
+
+# ------------------ Chain ------------------
+class Chain:
+    def __init__(self, problem, seed):
+        self.problem = problem
+        self.rng = random.Random(seed)
+        self.grids = [[list(row) for row in grid] for grid in problem.grids]
+        self.cells = problem.movable()
+        self.flat = [(s, cell) for s, cells in enumerate(self.cells) for cell in cells]
+        self.last_move = None
+        size = problem.day_count * problem.slot_count
+        self.total = [[0] * size for _ in problem.faculty_ids]
+        self.plain = [[0] * size for _ in problem.faculty_ids]
+        for faculty, day, slot, is_common in problem.fixed_entries:
+            if day < problem.day_count:
+                self._occupy(faculty, day * problem.slot_count + slot, is_common, 1)
+        for s, grid in enumerate(self.grids):
+            for row_idx, row in enumerate(grid):
+                for day, item in enumerate(row):
+                    if item is not None and item >= 0:
+                        self._occupy_item(item, day, problem.row_slots[s][row_idx], 1)
+        self.moves = 0
+        self.accepted = 0
+
+    def _occupy(self, faculty, pos, is_common, step):
+        self.total[faculty][pos] += step
+        if not is_common:
+            self.plain[faculty][pos] += step
+
+    def _occupy_item(self, item, day, slot, step):
+        _, _, faculty_ids, is_common, _ = self.problem.items[item]
+        pos = day * self.problem.slot_count + slot
+        for faculty in faculty_ids:
+            self._occupy(faculty, pos, is_common, step)
+
+    # ------------------ Score terms ------------------
+    def _clash(self, faculty, pos):
+        # check_clashes reports a slot unless every entry in it is a common subject
+        return self.total[faculty][pos] > 1 and self.plain[faculty][pos] > 0
+
+    def _gaps(self, faculty, day):
+        slot_count = self.problem.slot_count
+        occupied = self.total[faculty][day * slot_count:(day + 1) * slot_count]
+        first = last = -1
+        count = 0
+        for slot, n in enumerate(occupied):
+            if n:
+                if first < 0:
+                    first = slot
+                last = slot
+                count += 1
+        if count < 2:
+            return 0
+        gaps = last - first + 1 - count
+        lunch = self.problem.lunch_slot
+        if first < lunch < last and not occupied[lunch]:
+            gaps -= 1
+        return gaps
+
+    def _column(self, s, day):
+        """(isolated lab hours, spread penalty) of one day of one semester."""
+        items = self.problem.items
+        grid = self.grids[s]
+        codes = [None if row[day] is None or row[day] < 0 else items[row[day]][1] for row in grid]
+        isolated = 0
+        load = 0
+        seen = {}
+        for row_idx, code in enumerate(codes):
+            if code is None:
+                continue
+            load += 1
+            if items[grid[row_idx][day]][4]:
+                if not (
+                    (row_idx > 0 and codes[row_idx - 1] == code)
+                    or (row_idx + 1 < len(codes) and codes[row_idx + 1] == code)
+                ):
+                    isolated += 1
+            else:
+                seen[code] = seen.get(code, 0) + 1
+        repeats = sum(n - 1 for n in seen.values())
+        return isolated, load * load + repeats
+
+    def _local(self, s, days, faculty_days, clash_keys):
+        """(clashes, weighted soft cost) of the columns and faculty-days a move touches."""
+        soft = 0
+        for day in days:
+            isolated, spread = self._column(s, day)
+            soft += WEIGHTS["labs"] * isolated + WEIGHTS["spread"] * spread
+        for faculty, day in faculty_days:
+            soft += WEIGHTS["gaps"] * self._gaps(faculty, day)
+        hard = sum(1 for faculty, pos in clash_keys if self._clash(faculty, pos))
+        return hard, soft
+
+    def breakdown(self):
+        """Unweighted totals; ``hard`` counts double-booked (faculty, day, slot)s."""
+        problem = self.problem
+        result = {"hard": 0, "gaps": 0, "labs": 0, "spread": 0}
+        for faculty in range(len(problem.faculty_ids)):
+            for day in range(problem.day_count):
+                result["gaps"] += self._gaps(faculty, day)
+            for pos in range(problem.day_count * problem.slot_count):
+                if self._clash(faculty, pos):
+                    result["hard"] += 1
+        for s, grid in enumerate(self.grids):
+            for day in range(max((len(row) for row in grid), default=0)):
+                isolated, spread = self._column(s, day)
+                result["labs"] += isolated
+                result["spread"] += spread
+        return result
+
+    def cost(self):
+        """(clashes, weighted soft cost); compared as a tuple, fewer clashes always win."""
+        breakdown = self.breakdown()
+        hard = breakdown.pop("hard")
+        return hard, sum(WEIGHTS[term] * value for term, value in breakdown.items())
+
+    # ------------------ Moves ------------------
+    def _swap(self, s, a, b):
+        grid = self.grids[s]
+        row_slots = self.problem.row_slots[s]
+        (r1, d1), (r2, d2) = a, b
+        item_a, item_b = grid[r1][d1], grid[r2][d2]
+        if item_a >= 0:
+            self._occupy_item(item_a, d1, row_slots[r1], -1)
+            self._occupy_item(item_a, d2, row_slots[r2], 1)
+        if item_b >= 0:
+            self._occupy_item(item_b, d2, row_slots[r2], -1)
+            self._occupy_item(item_b, d1, row_slots[r1], 1)
+        grid[r1][d1], grid[r2][d2] = item_b, item_a
+
+    def step(self, temperature):
+        """Propose one swap and accept it by the Metropolis rule.
+
+        The Metropolis rule sees the weighted delta. Returns the (clashes,
+        soft cost) change of an accepted move, ``None`` if it was rejected.
+        """
+        self.moves += 1
+        s, a = self.flat[self.rng.randrange(len(self.flat))]
+        cells = self.cells[s]
+        b = cells[self.rng.randrange(len(cells))]
+        grid = self.grids[s]
+        item_a, item_b = grid[a[0]][a[1]], grid[b[0]][b[1]]
+        if item_a == item_b:
+            return None
+        items = self.problem.items
+        if item_a >= 0 and item_b >= 0 and items[item_a][0] == items[item_b][0]:
+            return None
+
+        slot_count = self.problem.slot_count
+        row_slots = self.problem.row_slots[s]
+        faculty = set()
+        for item in (item_a, item_b):
+            if item >= 0:
+                faculty.update(items[item][2])
+        days = {a[1], b[1]}
+        faculty_days = [(f, day) for f in faculty for day in days]
+        clash_keys = [(f, day * slot_count + row_slots[row]) for f in faculty for row, day in (a, b)]
+
+        hard_before, soft_before = self._local(s, days, faculty_days, clash_keys)
+        self._swap(s, a, b)
+        hard_after, soft_after = self._local(s, days, faculty_days, clash_keys)
+        hard, soft = hard_after - hard_before, soft_after - soft_before
+        delta = WEIGHTS["hard"] * hard + soft
+        if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+            self.accepted += 1
+            self.last_move = (s, a, b)
+            return hard, soft
+        self._swap(s, a, b)
+        return None
+
+    def _copy_grids(self):
+        return [[list(row) for row in grid] for grid in self.grids]
+
+    def run(self, time_budget=None, max_moves=None):
+        """Anneal until the time or move budget runs out; returns (best cost, best grids).
+
+        The best layout is the one with the fewest clashes, then the lowest soft cost.
+        """
+        current = best = self.cost()
+        if not self.flat:
+            return best, self._copy_grids()
+        best_grids = None
+        best_is_current = True
+        started = time.monotonic()
+        temperature = START_TEMPERATURE
+        while True:
+            if max_moves is not None and self.moves >= max_moves:
+                break
+            if not self.moves % TIME_CHECK_EVERY:
+                if max_moves is not None:
+                    progress = self.moves / max_moves
+                else:
+                    progress = (time.monotonic() - started) / time_budget
+                    if progress >= 1.0:
+                        break
+                temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** progress
+            change = self.step(temperature)
+            if change is None or change == (0, 0):
+                continue
+            moved = (current[0] + change[0], current[1] + change[1])
+            if moved > best and best_is_current:
+                # Leaving the best layout: copy it now (undo, copy, redo)
+                self._swap(*self.last_move)
+                best_grids = self._copy_grids()
+                self._swap(*self.last_move)
+                best_is_current = False
+            current = moved
+            if current < best:
+                best = current
+                best_is_current = True
+        if best_is_current:
+            best_grids = self._copy_grids()
+        return best, best_grids
+
+
+# ------------------ Entry point ------------------
+def _run_chain(problem, seed, time_budget, max_moves):
+    chain = Chain(problem, seed)
+    best, grids = chain.run(time_budget=time_budget, max_moves=max_moves)
+    return best, grids, chain.moves, chain.accepted
+
+
+def score(timetables, subject_faculty_map, subject_metadata=None, parity=None):
+    """Score breakdown of ``timetables`` as the optimiser sees it."""
+    return Chain(Problem(timetables, subject_faculty_map, subject_metadata, parity), 0).breakdown()
+
+
+def optimize(timetables, subject_faculty_map, subject_metadata=None, time_budget=10.0, seed=0,
+             workers=None, chains=None, max_moves=None, parity=None):
+    """Run ``chains`` annealing chains (default: one per worker) and return
+    ``(optimized_timetables, report)``.
+
+    With ``max_moves`` each chain stops after that many proposals and the run
+    is reproducible for a given ``seed``; otherwise chains stop after
+    ``time_budget`` seconds. The returned layout may still have clashes
+    (``report["after"]["hard"]``).
+    """
+    problem = Problem(timetables, subject_faculty_map, subject_metadata, parity)
+    workers = workers or os.cpu_count() or 1
+    chains = chains or workers
+    seeds = [seed * 1000 + i for i in range(chains)]
+    started = time.perf_counter()
+    if workers <= 1 or chains == 1:
+        results = [_run_chain(problem, chain_seed, time_budget, max_moves) for chain_seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, chains)) as executor:
+            results = list(executor.map(
+                _run_chain,
+                [problem] * chains,
+                seeds,
+                [time_budget] * chains,
+                [max_moves] * chains,
+            ))
+    elapsed = time.perf_counter() - started
+
+    best_index = min(range(len(results)), key=lambda i: (results[i][0], i))
+    best_cost, best_grids, _, _ = results[best_index]
+    optimized = problem.apply(timetables, best_grids)
+    report = {
+        "before": score(timetables, subject_faculty_map, subject_metadata, parity),
+        "after": score(optimized, subject_faculty_map, subject_metadata, parity),
+        "chains": len(results),
+        "best_chain": best_index,
+        "moves": sum(result[2] for result in results),
+        "accepted": sum(result[3] for result in results),
+        "seconds": round(elapsed, 3),
+        "kept": "optimized",
+    }
+    if report["after"]["hard"] > report["before"]["hard"]:
+        # Never hand back a layout with more clashes than we started with
+        return copy.deepcopy(timetables), dict(report, after=report["before"], kept="original")
+    return optimized, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m components.optimizer", description="Optimise the existing timetables.")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--output", "-o", help="Write the optimised timetable.json to this file (default: stdout).")
+    output.add_argument("--write", action="store_true", help="Replace data/timetable.json with the result.")
+    parser.add_argument("--time", type=float, default=10.0, help="Seconds per chain (default: 10).")
+    parser.add_argument("--moves", type=int, default=None, help="Moves per chain; makes the run reproducible.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--chains", type=int, default=None, help="Number of chains (default: one per worker).")
+    parser.add_argument("--parity", type=str.capitalize, choices=["Odd", "Even"], help="Only optimise one term.")
+    args = parser.parse_args(argv)
+
+    from data.master import store
+
+    optimized, report = optimize(
+        store.timetables,
+        store.subject_faculty_map,
+        store.subject_metadata,
+        time_budget=args.time,
+        seed=args.seed,
+        workers=args.workers,
+        chains=args.chains,
+        max_moves=args.moves,
+        parity=args.parity,
+    )
+    if args.write:
+        store.save("timetable.json", optimized)
+    elif args.output:
+        with open(args.output, "w") as f:
+            json.dump(optimized, f, indent=2)
+    else:
+        json.dump(optimized, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    print(json.dumps(report, indent=2), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
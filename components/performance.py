@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import streamlit as st
+from data.master import store
+from utils import profiler
+
+PROFILE_DIR = Path(os.environ.get("TIMETABLE_PROFILE_DIR", tempfile.gettempdir()))
+
+
+# ------------------ Switches ------------------
+def is_enabled():
+    """The panel stays hidden unless the server sets TIMETABLE_PERF."""
+    return os.environ.get("TIMETABLE_PERF", "").lower() in ("1", "true", "yes")
+
+
+def profiling_allowed():
+    """Read-only replicas serve the public, so no tracemalloc or .prof files there."""
+    return not store.read_only
+
+
+def profile_requested():
+    """True once after "Profile next rerun" was ticked."""
+    return st.session_state.pop("perf_profile_next", False) and profiling_allowed()
+
+
+def profile_path():
+    return PROFILE_DIR / f"timetable-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+
+
+# ------------------ Panel ------------------
+def show_performance():
+    import pandas as pd
+
+    with st.sidebar.expander("🔬 Performance", expanded=False):
+        if profiling_allowed():
+            memory = st.checkbox("Track memory (tracemalloc)", key="perf_memory")
+            profiler.enable_memory(memory)
+            if st.button("Profile next rerun", key="perf_profile_btn"):
+                st.session_state["perf_profile_next"] = True
+                st.caption("The next rerun is written to a cProfile file.")
+        else:
+            profiler.enable_memory(False)
+            st.caption("Memory tracking and profiling are off on a read-only store.")
+
+        dumped = st.session_state.get("perf_profile_path")
+        if dumped and Path(dumped).exists() and profiling_allowed():
+            st.caption(f"Last profile: `{dumped}`")
+            st.download_button(
+                "📥 Download .prof",
+                Path(dumped).read_bytes(),
+                file_name=Path(dumped).name,
+                key="perf_profile_download"
+            )
+
+        runs = profiler.recent_runs()
+        if not runs:
+            st.caption("No reruns recorded yet.")
+            return
+        labels = [
+            f"{time.strftime('%H:%M:%S', time.localtime(run['started']))} — {run['label']}"
+            for run in runs
+        ]
+        choice = st.selectbox("Rerun", range(len(runs)), format_func=labels.__getitem__, key="perf_run")
+        rows = [
+            {
+                "Span": name,
+                "Calls": entry["calls"],
+                "Total (ms)": round(entry["seconds"] * 1000, 2),
+                "Max (ms)": round(entry["max"] * 1000, 2),
+                "Memory (KiB)": None if entry["memory"] is None else round(entry["memory"] / 1024, 1),
+            }
+            for name, entry in profiler.summarize(runs[choice]).items()
+        ]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+        st.markdown("**Since start**")
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {"Span": name, "Calls": calls, "Total (ms)": round(seconds * 1000, 1)}
+                    for name, (calls, seconds) in sorted(profiler.totals().items(), key=lambda item: -item[1][1])
+                ]
+            ),
+            use_container_width=True,
+            hide_index=True
+        )
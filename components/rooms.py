@@ -0,0 +1,364 @@
+"""Room occupancy, room clashes and automatic room assignment.
+
+A semester holds its classes in its ``room_number`` from
+``semester_metadata.json``; ``room_overrides`` moves single sessions to
+another room, keyed like ``"MON 10.00 - 11.00"``. Two semesters in one room
+at the same day and slot clash unless both sessions are ``is_common``
+subjects (one combined class), the same rule ``check_clashes`` applies to
+faculty.
+
+Rooms and their capacities come from ``rooms.json`` (``{"R101":
+{"capacity": 60}}``); a semester's size is ``students`` in its metadata.
+
+    python -m components.rooms check [--parity odd]
+    python -m components.rooms assign [--parity odd] [--write]
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+from data.timetable import days, semester_parity_matches
+from utils.cell_parser import parse_cell
+
+
+def session_key(day_idx, time_slot):
+    day = days[day_idx] if day_idx < len(days) else f"DAY {day_idx}"
+    return f"{day} {time_slot}"
+
+
+def room_capacities(rooms):
+    capacities = {}
+    for room, info in rooms.items():
+        try:
+            capacities[room] = int((info or {}).get("capacity", 0) or 0)
+        except (AttributeError, TypeError, ValueError):
+            capacities[room] = 0
+    return capacities
+
+
+def semester_size(metadata):
+    try:
+        return int(metadata.get("students", 0) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class RoomIndex:
+    """Room occupancy keyed by (day, time slot), kept current per semester.
+
+    Mirrors ``OccupancyIndex``: ``bind`` builds it once, ``update_semester``
+    / ``remove_semester`` re-index one semester after an edit, and clash
+    queries only look at (day, slot, room) keys with more than one semester.
+    """
+
+    def __init__(self):
+        self.timetables = None
+        self.semester_metadata = None
+        self.subject_metadata = None
+        # (program, semester) -> {(day_idx, time_slot): (subject_cell, subject_key, is_common)}
+        self._sessions = {}
+        # (program, semester) -> {(day_idx, time_slot): room}
+        self._rooms = {}
+        # (day_idx, time_slot) -> {room: {(program, semester): session}}
+        self._slots = defaultdict(dict)
+        self._contended = set()
+
+    # ------------------ Binding ------------------
+    def bind(self, timetables, semester_metadata, subject_metadata=None):
+        subject_metadata = {} if subject_metadata is None else subject_metadata
+        if (
+            timetables is self.timetables
+            and semester_metadata is self.semester_metadata
+            and subject_metadata is self.subject_metadata
+        ):
+            return
+        self.timetables = timetables
+        self.semester_metadata = semester_metadata
+        self.subject_metadata = subject_metadata
+        self.rebuild()
+
+    def rebuild(self):
+        self._sessions.clear()
+        self._rooms.clear()
+        self._slots.clear()
+        self._contended.clear()
+        for program, semesters in self.timetables.items():
+            for semester in semesters:
+                self.update_semester(program, semester)
+
+    # ------------------ Incremental updates ------------------
+    def _place(self, owner, time_key, room):
+        rooms = self._slots[time_key]
+        bucket = rooms.setdefault(room, {})
+        bucket[owner] = self._sessions[owner][time_key]
+        if len(bucket) > 1:
+            self._contended.add(time_key + (room,))
+
+    def _unplace(self, owner, time_key, room):
+        rooms = self._slots.get(time_key, {})
+        bucket = rooms.get(room)
+        if bucket is None:
+            return
+        bucket.pop(owner, None)
+        if len(bucket) < 2:
+            self._contended.discard(time_key + (room,))
+        if not bucket:
+            del rooms[room]
+        if not rooms:
+            self._slots.pop(time_key, None)
+
+    def remove_semester(self, program, semester):
+        owner = (program, semester)
+        for time_key, room in self._rooms.pop(owner, {}).items():
+            self._unplace(owner, time_key, room)
+        self._sessions.pop(owner, None)
+
+    def update_semester(self, program, semester):
+        """Re-index one semester after its timetable, subjects or room changed."""
+        self.remove_semester(program, semester)
+        owner = (program, semester)
+        metadata = self.subject_metadata.get(program, {}).get(semester, {})
+        sessions = {}
+        for row in self.timetables.get(program, {}).get(semester, []):
+            for day_idx in range(1, len(row)):
+                cell = parse_cell(row[day_idx])
+                if cell.is_class:
+                    is_common = bool(metadata.get(cell.code, {}).get("is_common", False))
+                    sessions[(day_idx, row[0])] = (row[day_idx], cell.code, is_common)
+        self._sessions[owner] = sessions
+
+        semester_info = self.semester_metadata.get(program, {}).get(semester, {})
+        home = str(semester_info.get("room_number", "") or "").strip()
+        overrides = semester_info.get("room_overrides", {}) or {}
+        rooms = {}
+        for time_key in sessions:
+            room = str(overrides.get(session_key(*time_key), home) or "").strip()
+            if room:
+                rooms[time_key] = room
+                self._place(owner, time_key, room)
+        self._rooms[owner] = rooms
+
+    def remove_program(self, program):
+        for indexed_program, semester in list(self._sessions):
+            if indexed_program == program:
+                self.remove_semester(program, semester)
+
+    # ------------------ Queries ------------------
+    def sessions(self, program, semester):
+        return self._sessions.get((program, semester), {})
+
+    def occupants(self, day_idx, time_slot, parity=None):
+        """{room: [(program, semester)]} at one day and slot."""
+        return {
+            room: [owner for owner in bucket if parity is None or semester_parity_matches(owner[1], parity)]
+            for room, bucket in self._slots.get((day_idx, time_slot), {}).items()
+        }
+
+    def _order(self):
+        return {
+            (program, semester): position
+            for position, (program, semester) in enumerate(
+                (program, semester)
+                for program, semesters in self.timetables.items()
+                for semester in semesters
+            )
+        }
+
+    def clashes(self, parity=None):
+        order = self._order()
+        found = []
+        for day_idx, time_slot, room in self._contended:
+            entries = sorted(
+                (order.get(owner, len(order)), owner, session)
+                for owner, session in self._slots[(day_idx, time_slot)][room].items()
+                if parity is None or semester_parity_matches(owner[1], parity)
+            )
+            if len(entries) < 2:
+                continue
+            first_position, (first_program, first_semester), first = entries[0]
+            for position, (program, semester), session in entries[1:]:
+                if first[2] and session[2]:
+                    continue
+                found.append(((first_position, position, day_idx, time_slot), {
+                    "room": room,
+                    "day": days[day_idx] if day_idx < len(days) else f"DAY {day_idx}",
+                    "time": time_slot,
+                    "program1": first_program,
+                    "semester1": first_semester,
+                    "subject1": first[0],
+                    "program2": program,
+                    "semester2": semester,
+                    "subject2": session[0]
+                }))
+        found.sort(key=lambda item: item[0])
+        return [clash for _, clash in found]
+
+
+# ------------------ Assignment ------------------
+def _fits(capacities, size):
+    return [room for room, capacity in capacities.items() if capacity >= size]
+
+
+def assign_rooms(index, rooms, semesters=None, parity=None):
+    """Choose rooms for ``semesters`` (default: every indexed semester of ``parity``).
+
+    Other semesters keep their rooms and only block them. Each semester first
+    gets a home room: the existing one if it still fits and is free, else the
+    room whose occupied slots overlap its sessions least, smallest fitting
+    capacity first (session sets are bitmasks, so this is one AND per room).
+    Then every (day, slot) where homes collide is solved as a bipartite
+    matching between the semesters there and the free rooms that fit them:
+    best-fit greedy by descending size, repaired with augmenting paths.
+
+    Returns ({(program, semester): {"room_number", "room_overrides"}},
+    [unplaced (program, semester, session key)]).
+    """
+    capacities = room_capacities(rooms)
+    if semesters is None:
+        semesters = [
+            owner for owner in index._sessions
+            if parity is None or semester_parity_matches(owner[1], parity)
+        ]
+    targets = set(semesters)
+
+    def size_of(owner):
+        return semester_size(index.semester_metadata.get(owner[0], {}).get(owner[1], {}))
+
+    # Rooms held by semesters that are not being reassigned, per time key
+    bits = {}
+    blocked = defaultdict(set)
+    room_masks = defaultdict(int)
+    for time_key, by_room in index._slots.items():
+        for room, bucket in by_room.items():
+            if any(
+                owner not in targets and (parity is None or semester_parity_matches(owner[1], parity))
+                for owner in bucket
+            ):
+                blocked[time_key].add(room)
+                room_masks[room] |= 1 << bits.setdefault(time_key, len(bits))
+
+    # -------- Home rooms --------
+    homes = {}
+    for owner in sorted(targets, key=lambda owner: (-size_of(owner), owner)):
+        mask = 0
+        for time_key in index.sessions(*owner):
+            mask |= 1 << bits.setdefault(time_key, len(bits))
+        candidates = _fits(capacities, size_of(owner))
+        current = str(index.semester_metadata.get(owner[0], {}).get(owner[1], {}).get("room_number", "") or "").strip()
+        if current in candidates and not room_masks[current] & mask:
+            home = current
+        elif candidates:
+            home = min(candidates, key=lambda room: (bin(room_masks[room] & mask).count("1"), capacities[room], room))
+        else:
+            home = ""
+        homes[owner] = home
+        if home:
+            room_masks[home] |= mask
+
+    # -------- Per-slot matching where homes collide --------
+    by_time = defaultdict(list)
+    for owner in targets:
+        for time_key in index.sessions(*owner):
+            by_time[time_key].append(owner)
+
+    placed = {owner: {} for owner in targets}
+    unplaced = []
+    for time_key, owners in by_time.items():
+        taken = {}
+        waiting = []
+        for owner in sorted(owners, key=lambda owner: (-size_of(owner), owner)):
+            home = homes[owner]
+            if home and home not in blocked[time_key] and home not in taken:
+                taken[home] = owner
+            else:
+                waiting.append(owner)
+        if waiting:
+            free = sorted(
+                (room for room in capacities if room not in blocked[time_key] and room not in taken),
+                key=lambda room: (capacities[room], room)
+            )
+            for owner in waiting:
+                size = size_of(owner)
+                room = next((room for room in free if capacities[room] >= size), None)
+                if room is not None:
+                    free.remove(room)
+                    taken[room] = owner
+                elif _augment(owner, time_key, taken, blocked[time_key], capacities, size_of, set()):
+                    # The augmenting path may have moved a holder into a room that was still free.
+                    free = [room for room in free if room not in taken]
+                else:
+                    unplaced.append(owner + (session_key(*time_key),))
+        for room, owner in taken.items():
+            placed[owner][time_key] = room
+
+    assignments = {}
+    for owner in targets:
+        home = homes[owner]
+        assignments[owner] = {
+            "room_number": home,
+            "room_overrides": {
+                session_key(*time_key): room
+                for time_key, room in sorted(placed[owner].items())
+                if room != home
+            },
+        }
+    return assignments, sorted(unplaced)
+
+
+def _augment(owner, time_key, taken, blocked, capacities, size_of, visited):
+    """Kuhn's augmenting path: seat ``owner`` by moving current holders to other fitting rooms."""
+    size = size_of(owner)
+    for room, capacity in capacities.items():
+        if capacity < size or room in blocked or room in visited:
+            continue
+        visited.add(room)
+        holder = taken.get(room)
+        if holder is None or _augment(holder, time_key, taken, blocked, capacities, size_of, visited):
+            taken[room] = owner
+            return True
+    return False
+
+
+def apply_assignments(semester_metadata, assignments):
+    for (program, semester), rooms in assignments.items():
+        info = semester_metadata.setdefault(program, {}).setdefault(semester, {})
+        info["room_number"] = rooms["room_number"]
+        if rooms["room_overrides"]:
+            info["room_overrides"] = rooms["room_overrides"]
+        else:
+            info.pop("room_overrides", None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m components.rooms", description="Check or assign rooms.")
+    parser.add_argument("command", choices=["check", "assign"])
+    parser.add_argument("--parity", type=str.capitalize, choices=["Odd", "Even"], help="Only odd or even semesters.")
+    parser.add_argument("--write", action="store_true", help="Save assigned rooms to semester_metadata.json.")
+    args = parser.parse_args(argv)
+
+    from data.master import store
+
+    index = RoomIndex()
+    index.bind(store.timetables, store.semester_metadata, store.subject_metadata)
+    if args.command == "check":
+        clashes = index.clashes(args.parity)
+        json.dump(clashes, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return 1 if clashes else 0
+
+    assignments, unplaced = assign_rooms(index, store.rooms, parity=args.parity)
+    json.dump({
+        "assignments": {f"{program} / {semester}": rooms for (program, semester), rooms in sorted(assignments.items())},
+        "unplaced": unplaced,
+    }, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+    if args.write:
+        semester_metadata = store.semester_metadata
+        apply_assignments(semester_metadata, assignments)
+        store.save("semester_metadata.json", semester_metadata)
+    return 1 if unplaced else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
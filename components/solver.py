@@ -0,0 +1,440 @@
+"""Automatic timetable generation.
+
+Every subject of every program/semester is split into blocks: one hour for
+theory, two consecutive hours for labs. ``Solver.run`` first places them
+greedily, longest and busiest-faculty blocks first, each into a free
+position on the semester's least loaded day. Blocks left over are then
+repaired by ``_relocate``: it tries positions that clash with at most
+MAX_DISPLACED placed blocks, moves those out of the way and places each of
+them again the same way, up to REPAIR_DEPTH levels deep. Every place and
+remove is journalled, so a chain that fails is rolled back and the earlier
+placements stand; nothing is requeued, and blocks no chain can fit are
+reported as unplaced. Semester and faculty occupancy are bitsets over
+(day, slot), so checking a position costs a few integer operations.
+
+Odd and even semesters run in different terms and are scheduled separately,
+so a faculty member can teach in both. Lunch and Library/Mentoring cells of
+the current timetable stay where they are.
+
+    python -m components.solver --output generated.json --seed 7
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from collections import Counter
+
+from data.timetable import days, default_hours_for_subject_code, parse_semester_number, time_slots
+from utils.cell_parser import LIBRARY, LUNCH, parse_cell
+
+DAY_COUNT = len(days) - 1
+SLOT_COUNT = len(time_slots)
+CELL_COUNT = DAY_COUNT * SLOT_COUNT
+FULL_MASK = (1 << CELL_COUNT) - 1
+DAY_MASKS = [((1 << SLOT_COUNT) - 1) << (day * SLOT_COUNT) for day in range(DAY_COUNT)]
+
+LUNCH_SLOT = "01.00 - 02.00"
+LUNCH_CELL = "Lunch break"
+LAB_BLOCK_HOURS = 2
+MAX_ITERATIONS = 200000
+REPAIR_DEPTH = 3
+MAX_DISPLACED = 2
+MOVES_PER_STEP = 6
+
+
+def _start_mask(length):
+    mask = 0
+    for day in range(DAY_COUNT):
+        for slot in range(SLOT_COUNT - length + 1):
+            mask |= 1 << (day * SLOT_COUNT + slot)
+    return mask
+
+
+START_MASKS = {length: _start_mask(length) for length in (1, LAB_BLOCK_HOURS)}
+
+
+def _starts(avail, length):
+    starts = avail
+    for offset in range(1, length):
+        starts &= avail >> offset
+    return starts & START_MASKS[length]
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Block:
+    __slots__ = ("program", "semester", "code", "faculty", "length", "text")
+
+    def __init__(self, program, semester, code, faculty, length):
+        self.program = program
+        self.semester = semester
+        self.code = code
+        self.faculty = faculty
+        self.length = length
+        self.text = f"{code} ({', '.join(faculty)})" if faculty else code
+
+    def __repr__(self):
+        return f"Block({self.program!r}, {self.semester!r}, {self.text!r}, length={self.length})"
+
+
+# ------------------ Problem ------------------
+def is_lab(subject_code):
+    return subject_code.strip().upper().startswith("L")
+
+
+def subject_hours(program, semester, subject_code, subject_metadata):
+    metadata = subject_metadata.get(program, {}).get(semester, {}).get(subject_code, {})
+    try:
+        return int(metadata.get("hours_per_week", default_hours_for_subject_code(subject_code)) or 0)
+    except (TypeError, ValueError):
+        return default_hours_for_subject_code(subject_code)
+
+
+def semester_keys(timetables, subjects, subject_faculty_map):
+    seen = {}
+    for source in (timetables, subjects, subject_faculty_map):
+        for program, semesters in source.items():
+            for semester in semesters:
+                seen.setdefault((program, semester), None)
+    return list(seen)
+
+
+def fixed_cells(table):
+    """Lunch/Library cells of ``table`` as {bit position: text}; a default lunch row if there is no table."""
+    cells = {}
+    rows = {row[0]: row for row in table or [] if row}
+    for slot, time_slot in enumerate(time_slots):
+        row = rows.get(time_slot)
+        for day in range(DAY_COUNT):
+            pos = day * SLOT_COUNT + slot
+            if row is None:
+                if not rows and time_slot == LUNCH_SLOT:
+                    cells[pos] = LUNCH_CELL
+                continue
+            raw = row[day + 1] if day + 1 < len(row) else ""
+            if parse_cell(raw).kind in (LUNCH, LIBRARY):
+                cells[pos] = str(raw).strip()
+    return cells
+
+
+def build_blocks(program, semester, subjects, subject_faculty_map, subject_metadata):
+    mapping = subject_faculty_map.get(program, {}).get(semester, {})
+    codes = list(dict.fromkeys(list(subjects.get(program, {}).get(semester, {})) + list(mapping)))
+    blocks = []
+    for code in codes:
+        hours = subject_hours(program, semester, code, subject_metadata)
+        faculty = tuple(dict.fromkeys(mapping.get(code, [])))
+        if is_lab(code):
+            lengths = [LAB_BLOCK_HOURS] * (hours // LAB_BLOCK_HOURS) + [1] * (hours % LAB_BLOCK_HOURS)
+        else:
+            lengths = [1] * hours
+        blocks.extend(Block(program, semester, code, faculty, length) for length in lengths)
+    return blocks
+
+
+# ------------------ Search ------------------
+class Solver:
+    """Places the blocks of one term; ``busy`` seeds faculty bitsets with slots taken elsewhere."""
+
+    def __init__(self, blocks, fixed, busy=None, seed=None):
+        self.blocks = blocks
+        self.fixed = fixed                       # (program, semester) -> fixed-cell bitset
+        self.rng = random.Random(seed)
+        self.starts = [None] * len(blocks)
+        self.unassigned = len(blocks)
+        self.semester_used = {key: mask for key, mask in fixed.items()}
+        self.faculty_busy = dict(busy or {})
+        self.faculty_base = dict(busy or {})
+        self.semester_owner = {key: [None] * CELL_COUNT for key in fixed}
+        self.faculty_owner = {}
+        self.day_load = {key: [0] * DAY_COUNT for key in fixed}
+        self.subject_days = {}
+        self.day_limit = {}
+        self.demand = Counter()
+        self._journal = []
+        self.iterations = 0
+        self._max_iterations = MAX_ITERATIONS
+        for block in blocks:
+            subject = (block.program, block.semester, block.code)
+            self.subject_days.setdefault(subject, [0] * DAY_COUNT)
+            self.day_limit[subject] = self.day_limit.get(subject, 0) + 1
+            for faculty in block.faculty:
+                self.demand[faculty] += block.length
+                self.faculty_busy.setdefault(faculty, 0)
+                self.faculty_owner.setdefault(faculty, [None] * CELL_COUNT)
+        for subject, count in self.day_limit.items():
+            self.day_limit[subject] = -(-count // DAY_COUNT)
+
+    def _allowed_days(self, block, starts):
+        subject = (block.program, block.semester, block.code)
+        limit = self.day_limit[subject]
+        restricted = starts
+        for day, count in enumerate(self.subject_days[subject]):
+            if count >= limit:
+                restricted &= ~DAY_MASKS[day]
+        return restricted or starts
+
+    def _place(self, block_id, start, log=True):
+        block = self.blocks[block_id]
+        if log:
+            self._journal.append((True, block_id, start))
+        key = (block.program, block.semester)
+        mask = ((1 << block.length) - 1) << start
+        self.starts[block_id] = start
+        self.unassigned -= 1
+        self.semester_used[key] |= mask
+        for pos in range(start, start + block.length):
+            self.semester_owner[key][pos] = block_id
+        for faculty in block.faculty:
+            self.faculty_busy[faculty] |= mask
+            for pos in range(start, start + block.length):
+                self.faculty_owner[faculty][pos] = block_id
+        day = start // SLOT_COUNT
+        self.day_load[key][day] += block.length
+        self.subject_days[(block.program, block.semester, block.code)][day] += 1
+
+    def _remove(self, block_id, log=True):
+        block = self.blocks[block_id]
+        start = self.starts[block_id]
+        if log:
+            self._journal.append((False, block_id, start))
+        key = (block.program, block.semester)
+        mask = ((1 << block.length) - 1) << start
+        self.starts[block_id] = None
+        self.unassigned += 1
+        self.semester_used[key] &= ~mask
+        for pos in range(start, start + block.length):
+            self.semester_owner[key][pos] = None
+        for faculty in block.faculty:
+            self.faculty_busy[faculty] &= ~mask
+            for pos in range(start, start + block.length):
+                self.faculty_owner[faculty][pos] = None
+        day = start // SLOT_COUNT
+        self.day_load[key][day] -= block.length
+        self.subject_days[(block.program, block.semester, block.code)][day] -= 1
+
+    def _conflicts(self, block, start):
+        key = (block.program, block.semester)
+        owners = set()
+        for pos in range(start, start + block.length):
+            owners.add(self.semester_owner[key][pos])
+            for faculty in block.faculty:
+                owners.add(self.faculty_owner[faculty][pos])
+        owners.discard(None)
+        return owners
+
+    def _pick(self, block, starts):
+        key = (block.program, block.semester)
+        load = self.day_load[key]
+        return min(
+            _bits(starts),
+            key=lambda start: (load[start // SLOT_COUNT], self.rng.random())
+        )
+
+    def _free_starts(self, block):
+        avail = ~self.semester_used[(block.program, block.semester)] & FULL_MASK
+        for faculty in block.faculty:
+            avail &= ~self.faculty_busy[faculty]
+        return _starts(avail, block.length)
+
+    def _try_place(self, block_id):
+        block = self.blocks[block_id]
+        starts = self._free_starts(block)
+        if not starts:
+            return False
+        self._place(block_id, self._pick(block, self._allowed_days(block, starts)))
+        return True
+
+    def _rollback(self, mark):
+        while len(self._journal) > mark:
+            placed, block_id, start = self._journal.pop()
+            if placed:
+                self._remove(block_id, log=False)
+            else:
+                self._place(block_id, start, log=False)
+
+    def _relocate(self, block_id, depth, chain):
+        """Place ``block_id``, moving up to MAX_DISPLACED placed blocks elsewhere
+        (recursively, ``depth`` levels deep). Leaves the state untouched on failure."""
+        self.iterations += 1
+        if self._try_place(block_id):
+            return True
+        if not depth or self.iterations >= self._max_iterations:
+            return False
+        block = self.blocks[block_id]
+        open_cells = ~self.fixed[(block.program, block.semester)] & FULL_MASK
+        for faculty in block.faculty:
+            open_cells &= ~self.faculty_base.get(faculty, 0)
+        moves = []
+        for start in _bits(_starts(open_cells, block.length)):
+            displaced = self._conflicts(block, start)
+            if len(displaced) <= MAX_DISPLACED and not displaced & chain:
+                moves.append((len(displaced), self.rng.random(), start, displaced))
+        moves.sort(key=lambda move: move[:2])
+        chain = chain | {block_id}
+        for _, _, start, displaced in moves[:MOVES_PER_STEP]:
+            mark = len(self._journal)
+            for other in displaced:
+                self._remove(other)
+            self._place(block_id, start)
+            if all(self._relocate(other, depth - 1, chain | displaced) for other in displaced):
+                return True
+            self._rollback(mark)
+        return False
+
+    def run(self, max_iterations=MAX_ITERATIONS, time_limit=None):
+        """Greedy placement, most constrained blocks first, followed by repair
+        rounds that place leftovers by moving other blocks along short chains.
+        Returns the ids of the blocks that could not be placed."""
+        self.iterations = 0
+        self._max_iterations = max_iterations
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        order = sorted(
+            range(len(self.blocks)),
+            key=lambda block_id: (
+                -self.blocks[block_id].length,
+                -sum(self.demand[faculty] for faculty in self.blocks[block_id].faculty),
+                self.rng.random(),
+            )
+        )
+        for block_id in order:
+            self.iterations += 1
+            self._try_place(block_id)
+        self._journal.clear()
+
+        improved = True
+        while improved and self.unassigned and self.iterations < max_iterations:
+            improved = False
+            pending = [block_id for block_id in order if self.starts[block_id] is None]
+            for block_id in pending:
+                if deadline is not None and time.monotonic() > deadline:
+                    break
+                if self._relocate(block_id, REPAIR_DEPTH, frozenset()):
+                    improved = True
+                self._journal.clear()
+        return [block_id for block_id, start in enumerate(self.starts) if start is None]
+
+
+# ------------------ Entry point ------------------
+def term_of(semester):
+    number = parse_semester_number(semester)
+    if number is None:
+        return None
+    return "Odd" if number % 2 else "Even"
+
+
+def solve(timetables, subjects, subject_faculty_map, subject_metadata, parity=None, seed=None,
+          max_iterations=MAX_ITERATIONS, time_limit=None):
+    """Generate clash-free timetables.
+
+    Returns ``(generated, unplaced)``: ``generated`` has the ``timetable.json``
+    shape for every scheduled semester; ``unplaced`` lists the subject hours
+    that could not be placed within the iteration/time budget.
+    """
+    keys = semester_keys(timetables, subjects, subject_faculty_map)
+    fixed_text = {key: fixed_cells(timetables.get(key[0], {}).get(key[1])) for key in keys}
+
+    # Semesters without a number belong to every term: schedule them with the
+    # odd term and keep their faculty busy during the even term as well.
+    terms = [{"Odd", None}, {"Even"}]
+    if parity is not None:
+        terms = [{parity, None}]
+
+    generated = {}
+    unplaced = []
+    shared_busy = {}
+    for term in terms:
+        term_keys = [key for key in keys if term_of(key[1]) in term]
+        blocks = []
+        for program, semester in term_keys:
+            blocks.extend(build_blocks(program, semester, subjects, subject_faculty_map, subject_metadata))
+        fixed = {key: sum(1 << pos for pos in fixed_text[key]) for key in term_keys}
+        solver = Solver(blocks, fixed, busy=shared_busy, seed=seed)
+        missing = set(solver.run(max_iterations=max_iterations, time_limit=time_limit))
+
+        grids = {key: [[""] * DAY_COUNT for _ in time_slots] for key in term_keys}
+        for key in term_keys:
+            for pos, text in fixed_text[key].items():
+                grids[key][pos % SLOT_COUNT][pos // SLOT_COUNT] = text
+        for block_id, block in enumerate(blocks):
+            start = solver.starts[block_id]
+            if start is None:
+                continue
+            for pos in range(start, start + block.length):
+                grids[(block.program, block.semester)][pos % SLOT_COUNT][pos // SLOT_COUNT] = block.text
+            if term_of(block.semester) is None:
+                mask = ((1 << block.length) - 1) << start
+                for faculty in block.faculty:
+                    shared_busy[faculty] = shared_busy.get(faculty, 0) | mask
+        for block_id in sorted(missing):
+            block = blocks[block_id]
+            unplaced.append({
+                "program": block.program,
+                "semester": block.semester,
+                "subject": block.code,
+                "hours": block.length,
+            })
+        for program, semester in term_keys:
+            rows = [[time_slot] + grids[(program, semester)][slot] for slot, time_slot in enumerate(time_slots)]
+            generated.setdefault(program, {})[semester] = rows
+
+    ordered = {}
+    for program, semester in keys:
+        if semester in generated.get(program, {}):
+            ordered.setdefault(program, {})[semester] = generated[program][semester]
+    return ordered, unplaced
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m components.solver", description="Generate clash-free timetables.")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--output", "-o", help="Write the generated timetable.json to this file (default: stdout).")
+    output.add_argument("--write", action="store_true", help="Replace data/timetable.json with the result.")
+    parser.add_argument("--parity", type=str.capitalize, choices=["Odd", "Even"], help="Only generate one term.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-iterations", type=int, default=MAX_ITERATIONS)
+    parser.add_argument("--time-limit", type=float, default=None, help="Seconds per term.")
+    args = parser.parse_args(argv)
+
+    from data.master import store
+
+    started = time.perf_counter()
+    generated, unplaced = solve(
+        store.timetables,
+        store.subjects,
+        store.subject_faculty_map,
+        store.subject_metadata,
+        parity=args.parity,
+        seed=args.seed,
+        max_iterations=args.max_iterations,
+        time_limit=args.time_limit,
+    )
+    elapsed = time.perf_counter() - started
+
+    if args.write:
+        timetables = store.timetables
+        for program, semesters in generated.items():
+            timetables.setdefault(program, {}).update(semesters)
+        store.save("timetable.json", timetables)
+    elif args.output:
+        with open(args.output, "w") as f:
+            json.dump(generated, f, indent=2)
+    else:
+        json.dump(generated, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    semester_count = sum(len(semesters) for semesters in generated.values())
+    print(f"Scheduled {semester_count} semesters in {elapsed:.2f}s", file=sys.stderr)
+    for item in unplaced:
+        print(f"Unplaced: {item['program']} {item['semester']} {item['subject']} ({item['hours']}h)", file=sys.stderr)
+    return 1 if unplaced else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,219 +1,68 @@
-import copy
-import re
 import streamlit as st
-import pandas as pd
-import json
 from collections import defaultdict
-from utils.image_exporter import generate_table_image, subject_colors
+from data import tensor
+from data.master import store
+from data.timetable import semester_parity_matches, sort_semesters
+from utils import html_renderer
+from utils.cell_parser import CLASS, parse_cell
+from utils.image_exporter import png_download_button
 
 # ------------------ Load JSON ------------------
-with open("data/timetable.json") as f:
-    timetables = json.load(f)
+def load_state():
+    global timetables, subjects, subject_metadata, faculties, subject_faculty_map, semester_metadata
+    timetables = store.timetables
+    subjects = store.subjects
+    subject_metadata = store.subject_metadata
+    faculties = store.faculties
+    subject_faculty_map = store.subject_faculty_map
+    semester_metadata = store.semester_metadata
 
 
-ROMAN_TO_INT = {
-    "I": 1,
-    "II": 2,
-    "III": 3,
-    "IV": 4,
-    "V": 5,
-    "VI": 6,
-    "VII": 7,
-    "VIII": 8,
-    "IX": 9,
-    "X": 10
-}
-
-
-def sort_semesters(semesters):
-    return sorted(
-        semesters,
-        key=lambda sem: (
-            parse_semester_number(sem) if parse_semester_number(sem) is not None else 999,
-            sem
-        )
-    )
-
-
-def parse_semester_number(semester_name):
-    if not isinstance(semester_name, str):
-        return None
-    digits = [int(d) for d in re.findall(r"\d+", semester_name)]
-    if digits:
-        return digits[0]
-    roman_match = re.search(r"\b(I|II|III|IV|V|VI|VII|VIII|IX|X)\b", semester_name.upper())
-    if roman_match:
-        return ROMAN_TO_INT.get(roman_match.group(1))
-    return None
-
-
-def save_json(data, path):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-
-def clone_semester_data(program, source_semester, target_semester):
-    timetables.setdefault(program, {})
-    subjects.setdefault(program, {})
-    subject_metadata.setdefault(program, {})
-    subject_faculty_map.setdefault(program, {})
-    semester_metadata.setdefault(program, {})
-    if source_semester in timetables.get(program, {}):
-        timetables[program][target_semester] = copy.deepcopy(timetables[program][source_semester])
-    if source_semester in subjects.get(program, {}):
-        subjects[program][target_semester] = copy.deepcopy(subjects[program][source_semester])
-    if source_semester in subject_metadata.get(program, {}):
-        subject_metadata[program][target_semester] = copy.deepcopy(subject_metadata[program][source_semester])
-    if source_semester in subject_faculty_map.get(program, {}):
-        subject_faculty_map[program][target_semester] = copy.deepcopy(subject_faculty_map[program][source_semester])
-    if source_semester in semester_metadata.get(program, {}):
-        semester_metadata[program][target_semester] = copy.deepcopy(semester_metadata[program][source_semester])
-
-
-def create_blank_semester(program, target_semester, template_semester=None):
-    timetables.setdefault(program, {})
-    subjects.setdefault(program, {})
-    subject_faculty_map.setdefault(program, {})
-    if template_semester in timetables.get(program, {}):
-        template = timetables[program][template_semester]
-        rows = len(template)
-        cols = len(template[0]) if template else 6
-    else:
-        rows = 10
-        cols = 6
-    timetables[program][target_semester] = [["" for _ in range(cols)] for _ in range(rows)]
-    subjects[program][target_semester] = {}
-    subject_faculty_map[program][target_semester] = {}
-
-
-def is_bsc_program(program):
-    if not isinstance(program, str):
-        return False
-    identifier = program.lower().replace(".", "").replace(" ", "")
-    return "bsc" in identifier or "baccalaure" in identifier
-
-
-def ensure_bsc_semesters(program, total_semesters=10):
-    if not is_bsc_program(program):
-        return False
-
-    existing = set(sort_semesters(timetables.get(program, {}).keys()))
-    base_odd = "Semester I"
-    base_even = "Semester II"
-    changed = False
-
-    for sem_number in range(1, total_semesters + 1):
-        sem_name = f"Semester {sem_number}" if sem_number > 10 else ["", "Semester I", "Semester II", "Semester III", "Semester IV", "Semester V", "Semester VI", "Semester VII", "Semester VIII", "Semester IX", "Semester X"][sem_number]
-        if sem_name in existing:
-            continue
-
-        if sem_number % 2 == 1:
-            if base_odd in existing:
-                clone_semester_data(program, base_odd, sem_name)
-            elif base_even in existing:
-                clone_semester_data(program, base_even, sem_name)
-            else:
-                create_blank_semester(program, sem_name, template_semester=base_odd)
-        else:
-            if base_even in existing:
-                clone_semester_data(program, base_even, sem_name)
-            elif base_odd in existing:
-                clone_semester_data(program, base_odd, sem_name)
-            else:
-                create_blank_semester(program, sem_name, template_semester=base_even)
-
-        changed = True
-        existing.add(sem_name)
-
-    if changed:
-        save_json(timetables, "data/timetable.json")
-        save_json(subjects, "data/subjects.json")
-        save_json(subject_metadata, "data/subject_metadata.json")
-        save_json(subject_faculty_map, "data/subject_faculty_map.json")
-        save_json(semester_metadata, "data/semester_metadata.json")
-    return changed
-
-
-def semester_parity_matches(semester_name, parity):
-    sem_number = parse_semester_number(semester_name)
-    if sem_number is None:
-        return True
-    return (sem_number % 2 == 1) if parity == "Odd" else (sem_number % 2 == 0)
+load_state()
 
 
 def extract_subject_code(cell):
-    if not isinstance(cell, str):
-        return ""
-    cell = cell.strip()
-    return cell.split()[0] if cell else ""
-
-with open("data/subjects.json") as f:
-    subjects = json.load(f)
-
-try:
-    with open("data/subject_metadata.json") as f:
-        subject_metadata = json.load(f)
-except FileNotFoundError:
-    subject_metadata = {}
-
-with open("data/faculties.json") as f:
-    faculties = json.load(f)
-
-with open("data/subject_faculty_map.json") as f:
-    subject_faculty_map = json.load(f)
-
-try:
-    with open("data/semester_metadata.json") as f:
-        semester_metadata = json.load(f)
-except FileNotFoundError:
-    semester_metadata = {}
+    return parse_cell(cell).code
 
 # ------------------ Subject Summary ------------------
-def subject_summary(data):
+def subject_summary(data, program=None, semester=None):
+    """Classes per subject code in ``data``.
+
+    When ``data`` is the store's grid of ``program``/``semester`` and NumPy
+    is available, this is a bincount over the cached store tensor. The tensor
+    keys rows by time slot, so grids with a blank or repeated time use the loop.
+    """
+    slots = [row[0] if row else "" for row in data]
+    if (
+        tensor.np is not None
+        and program is not None
+        and store.timetables.get(program, {}).get(semester) is data
+        and all(slots) and len(set(slots)) == len(slots)
+    ):
+        return defaultdict(int, tensor.subject_counts(tensor.for_store(store), program, semester))
     counts = defaultdict(int)
     for row in data:
         for cell in row[1:]:
-            cell = str(cell).strip()
-            if cell and cell not in ["Lunch break", "Library/Mentoring"]:
-                code = extract_subject_code(cell)
-                if code:
-                    counts[code] += 1
+            parsed = parse_cell(cell)
+            if parsed.kind == CLASS and parsed.code:
+                counts[parsed.code] += 1
     return counts
 
 
-DEFAULT_SUBJECT_COLOR = "#eef"
-
-def render_subject_summary(summary, subject_names):
+def render_subject_summary(summary, subject_names, cache_key=None):
     if not summary:
         return
-
-    html = (
-        "<table style='border-collapse:collapse;width:100%;font-family:Arial,sans-serif;'>"
-        "<tr>"
-        "<th style='background:#333;color:#fff;padding:10px;border:1px solid #999;text-align:left;'>Code</th>"
-        "<th style='background:#333;color:#fff;padding:10px;border:1px solid #999;text-align:left;'>Subject</th>"
-        "<th style='background:#333;color:#fff;padding:10px;border:1px solid #999;text-align:right;'>Classes / Week</th>"
-        "</tr>"
-    )
-
-    for code, count in sorted(summary.items(), key=lambda item: (-item[1], item[0])):
-        color = subject_colors.get(code, DEFAULT_SUBJECT_COLOR)
-        subject_name = subject_names.get(code, "Unknown Subject")
-        html += (
-            "<tr>"
-            f"<td style='background:{color};padding:10px;border:1px solid #999;font-weight:bold;'>{code}</td>"
-            f"<td style='background:{color};padding:10px;border:1px solid #999;'>{subject_name}</td>"
-            f"<td style='background:{color};padding:10px;border:1px solid #999;text-align:right;'>{count}</td>"
-            "</tr>"
-        )
-
-    html += "</table>"
+    build = lambda: html_renderer.summary_html(summary, subject_names)
+    html = html_renderer.cached_html(cache_key, build) if cache_key else build()
     st.markdown(html, unsafe_allow_html=True)
 
 
 # ------------------ Viewer UI ------------------
 def show_viewer():
+    import pandas as pd
+
     st.title("🗓️ Timetable Viewer")
+    load_state()
 
     semester_type = st.radio(
         "Semester type",
@@ -230,8 +79,6 @@ def show_viewer():
         key="viewer_program"
     )
 
-    ensure_bsc_semesters(program, total_semesters=10)
-
     filtered_semesters = [
         sem for sem in sort_semesters(timetables[program].keys())
         if semester_parity_matches(sem, semester_type)
@@ -259,81 +106,32 @@ def show_viewer():
         timetable_heading += f" — Room {room_number}"
     st.markdown(timetable_heading)
 
-    html = "<table style='border-collapse:collapse;width:100%;text-align:center;'>"
-
-    # Header
-    html += "<tr>" + "".join(
-        f"<th style='background:#333;color:#fff;padding:6px;border:1px solid #999;'>{d}</th>"
-        for d in days
-    ) + "</tr>"
-
-    # Body
-    for row in data:
-        html += "<tr>"
-        for i, cell in enumerate(row):
-            cell = str(cell).strip()
-
-            # Time column
-            if i == 0:
-                html += (
-                    "<td style='background:#f1f1f1;"
-                    "font-weight:bold;padding:4px;border:1px solid #999;'>"
-                    f"{cell}</td>"
-                )
-
-            # Lunch / Library
-            elif cell in ["Lunch break", "Library/Mentoring"]:
-                html += (
-                    "<td style='background:#d9d9d9;"
-                    "font-weight:bold;border:1px solid #999;'>"
-                    f"{cell}</td>"
-                )
-
-            # Subject cells
-            elif cell:
-                code = extract_subject_code(cell)
-                color = subject_colors.get(code, DEFAULT_SUBJECT_COLOR)
-
-                faculty_list = (
-                    subject_faculty_map
-                    .get(program, {})
-                    .get(semester, {})
-                    .get(code, [])
-                )
-                faculty_suffix = ""
-                if faculty_list:
-                    faculty_suffix = " (" + ",".join(faculty_list) + ")"
-
-                display_text = f"{cell}{faculty_suffix}"
-
-                html += (
-                    "<td style='background:"
-                    f"{color};font-weight:bold;border:1px solid #999;'>"
-                    f"{display_text}</td>"
-                )
-            else:
-                html += "<td style='border:1px solid #999;'></td>"
-
-        html += "</tr>"
-
-    html += "</table>"
-
+    html = html_renderer.cached_html(
+        ("timetable", program, semester, store.version),
+        lambda: html_renderer.timetable_html(
+            data, days, subject_faculty_map.get(program, {}).get(semester, {})
+        )
+    )
+    html_renderer.inject_styles()
     st.markdown(html, unsafe_allow_html=True)
 
     if room_number:
         st.markdown(f"**Room:** {room_number}")
+    room_overrides = semester_metadata.get(program, {}).get(semester, {}).get("room_overrides", {})
+    if room_overrides:
+        st.caption("Sessions in other rooms: " + ", ".join(f"{session} → {room}" for session, room in room_overrides.items()))
 
     # -------- Download Image --------
-    df_image = pd.DataFrame(data, columns=days)
     title_text = f"{program} - {semester}"
     if room_number:
         title_text += f"\nRoom {room_number}"
-    img = generate_table_image(df_image, title_text)
-    st.download_button(
-        label="📥 Download Timetable as PNG",
-        data=img,
+    png_download_button(
+        data,
+        days,
+        title_text,
         file_name=f"{program}_{semester}_timetable.png".replace(" ", "_"),
-        mime="image/png"
+        key="viewer_png",
+        label="📥 Download Timetable as PNG"
     )
 
     # -------- Subject–Faculty Mapping --------
@@ -361,9 +159,9 @@ def show_viewer():
     # -------- Subject-wise Load --------
     st.markdown("## 📊 Subject-wise Class Count")
 
-    summary = subject_summary(data)
+    summary = subject_summary(data, program, semester)
     if summary:
-        render_subject_summary(summary, subject_names)
+        render_subject_summary(summary, subject_names, ("summary", program, semester, store.version))
     else:
         st.info("No classes found.")
 
@@ -0,0 +1,81 @@
+"""Resolved faculty assignments.
+
+A class cell can name its faculty in parentheses (``P3 (RJ)``) and
+``subject_faculty_map.json`` lists faculty per subject; the two often
+disagree. Everything that counts load or clashes goes through
+``resolve_faculty`` so they all apply the same rule:
+
+* faculty written in the cell are authoritative for that slot;
+* otherwise the slot falls back to the subject's faculty in the map;
+* a class with neither is unassigned.
+
+``resolved(store)`` keeps one ``ResolvedAssignments`` per ``store.version``.
+"""
+from collections import Counter, namedtuple
+
+from utils import profiler
+from utils.cell_parser import parse_cell
+
+CELL = "cell"
+MAP = "map"
+
+Assignment = namedtuple("Assignment", "program semester row day slot subject faculty source")
+
+
+def resolve_faculty(cell, mapping):
+    """(faculty tuple, source) for a parsed class cell; ``mapping`` is {code: [faculty]} of its semester."""
+    if cell.faculty:
+        return cell.faculty, CELL
+    faculty = tuple(mapping.get(cell.code, ()))
+    return faculty, (MAP if faculty else None)
+
+
+class ResolvedAssignments:
+    def __init__(self, timetables, subject_faculty_map):
+        self.assignments = []
+        self.by_faculty = {}
+        self.unassigned = []
+        self.conflicts = {}  # (program, semester, subject) -> (cell faculty, map faculty)
+        for program, semesters in timetables.items():
+            for semester, table in semesters.items():
+                if not isinstance(table, list):
+                    continue
+                mapping = subject_faculty_map.get(program, {}).get(semester, {})
+                for i, row in enumerate(table):
+                    for j in range(1, len(row)):
+                        cell = parse_cell(row[j])
+                        if not cell.is_class:
+                            continue
+                        faculty, source = resolve_faculty(cell, mapping)
+                        assignment = Assignment(program, semester, i, j, row[0], cell.code, faculty, source)
+                        if source is None:
+                            self.unassigned.append(assignment)
+                            continue
+                        self.assignments.append(assignment)
+                        for code in faculty:
+                            self.by_faculty.setdefault(code, []).append(assignment)
+                        mapped = tuple(mapping.get(cell.code, ()))
+                        if source == CELL and mapped and set(mapped) != set(faculty):
+                            self.conflicts.setdefault((program, semester, cell.code), (faculty, mapped))
+
+    def faculty_load(self):
+        """Weekly hours per faculty code."""
+        return Counter({code: len(slots) for code, slots in self.by_faculty.items()})
+
+    def faculty_codes(self):
+        return sorted(self.by_faculty)
+
+
+def resolved(store=None):
+    if store is None:
+        from data.master import store
+    timetables = store.timetables  # load first so the version below is current
+    subject_faculty_map = store.subject_faculty_map
+    cached = _resolved.get(id(store))
+    if cached is None or cached[0] != store.version:
+        with profiler.span("resolve_assignments"):
+            cached = _resolved[id(store)] = (store.version, ResolvedAssignments(timetables, subject_faculty_map))
+    return cached[1]
+
+
+_resolved = {}
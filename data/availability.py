@@ -0,0 +1,151 @@
+"""Faculty availability and slot preferences as bitmasks.
+
+``faculty_availability.json`` sits next to ``faculties.json``::
+
+    {"RJ": {"unavailable": {"MON": 3, "FRI": 127}, "preferred": {"TUE": 12}}}
+
+Each day holds an int whose bit ``i`` is ``time_slots[i]`` (bit 0 is the
+first slot), so ``3`` means the first two slots and ``127`` the whole day.
+Internally a faculty member's week is one int with bit
+``day * SLOT_COUNT + slot``; a cell check is a shift and an AND, and
+``violations`` compares every faculty's teaching week against their
+availability with one AND per faculty instead of looping over cells.
+Slots outside ``time_slots`` have no bit and always count as available.
+"""
+from data.timetable import days, semester_parity_matches, time_slots
+
+DAY_NAMES = days[1:]
+SLOT_COUNT = len(time_slots)
+SLOT_BITS = {slot: i for i, slot in enumerate(time_slots)}
+DAY_MASK = (1 << SLOT_COUNT) - 1
+
+
+def slot_bit(day_idx, time_slot):
+    """Bit position of a grid cell (``day_idx`` is 1-based like the grid), or None."""
+    slot = SLOT_BITS.get(time_slot)
+    if slot is None or not 1 <= day_idx <= len(DAY_NAMES):
+        return None
+    return (day_idx - 1) * SLOT_COUNT + slot
+
+
+def week_mask(days_to_slots):
+    """{"MON": 3, ...} -> one week int."""
+    mask = 0
+    for day_idx, day in enumerate(DAY_NAMES):
+        mask |= (int(days_to_slots.get(day, 0) or 0) & DAY_MASK) << (day_idx * SLOT_COUNT)
+    return mask
+
+
+def day_masks(mask):
+    """One week int -> {"MON": 3, ...}, leaving out empty days."""
+    per_day = {}
+    for day_idx, day in enumerate(DAY_NAMES):
+        value = (mask >> (day_idx * SLOT_COUNT)) & DAY_MASK
+        if value:
+            per_day[day] = value
+    return per_day
+
+
+def cells(mask):
+    """[(day_idx, time_slot)] of the set bits, day_idx 1-based."""
+    found = []
+    while mask:
+        low = mask & -mask
+        bit = low.bit_length() - 1
+        found.append((bit // SLOT_COUNT + 1, time_slots[bit % SLOT_COUNT]))
+        mask ^= low
+    return found
+
+
+class Availability:
+    def __init__(self, document=None):
+        self.unavailable = {}
+        self.preferred = {}
+        for faculty, entry in (document or {}).items():
+            unavailable = week_mask(entry.get("unavailable", {}))
+            preferred = week_mask(entry.get("preferred", {}))
+            if unavailable:
+                self.unavailable[faculty] = unavailable
+            if preferred:
+                self.preferred[faculty] = preferred
+
+    def is_available(self, faculty, day_idx, time_slot):
+        bit = slot_bit(day_idx, time_slot)
+        return bit is None or not (self.unavailable.get(faculty, 0) >> bit) & 1
+
+    def is_preferred(self, faculty, day_idx, time_slot):
+        """True when the faculty has no preferences or the slot is one of them."""
+        preferred = self.preferred.get(faculty)
+        bit = slot_bit(day_idx, time_slot)
+        return preferred is None or bit is None or bool((preferred >> bit) & 1)
+
+    def to_document(self):
+        document = {}
+        for faculty in sorted(set(self.unavailable) | set(self.preferred)):
+            entry = {}
+            if self.unavailable.get(faculty):
+                entry["unavailable"] = day_masks(self.unavailable[faculty])
+            if self.preferred.get(faculty):
+                entry["preferred"] = day_masks(self.preferred[faculty])
+            document[faculty] = entry
+        return document
+
+
+def for_store(store=None):
+    """``Availability`` of ``faculty_availability.json``, rebuilt when ``store.version`` changes."""
+    if store is None:
+        from data.master import store
+    document = store.faculty_availability  # load first so the version below is current
+    cached = _availability.get(id(store))
+    if cached is None or cached[0] != store.version:
+        cached = _availability[id(store)] = (store.version, Availability(document))
+    return cached[1]
+
+
+_availability = {}
+
+
+# ------------------ Bulk checks ------------------
+def teaching_masks(assignments, parity=None):
+    """{faculty: week int} of the slots each faculty teaches, from resolved assignments."""
+    masks = {}
+    for assignment in assignments:
+        if parity is not None and not semester_parity_matches(assignment.semester, parity):
+            continue
+        bit = slot_bit(assignment.day, assignment.slot)
+        if bit is None:
+            continue
+        for faculty in assignment.faculty:
+            masks[faculty] = masks.get(faculty, 0) | (1 << bit)
+    return masks
+
+
+def violations(availability, taught):
+    """{faculty: (unavailable week int, outside-preferred week int)} where either is non-zero."""
+    found = {}
+    for faculty, teaching in taught.items():
+        blocked = teaching & availability.unavailable.get(faculty, 0)
+        preferred = availability.preferred.get(faculty)
+        outside = teaching & ~preferred if preferred is not None else 0
+        if blocked or outside:
+            found[faculty] = (blocked, outside)
+    return found
+
+
+def unavailable_assignments(availability, assignments, parity=None):
+    """Assignments that put a faculty member in a slot marked unavailable."""
+    flagged = violations(availability, teaching_masks(assignments, parity))
+    blocked = {faculty: masks[0] for faculty, masks in flagged.items() if masks[0]}
+    if not blocked:
+        return []
+    found = []
+    for assignment in assignments:
+        if parity is not None and not semester_parity_matches(assignment.semester, parity):
+            continue
+        bit = slot_bit(assignment.day, assignment.slot)
+        if bit is None:
+            continue
+        for faculty in assignment.faculty:
+            if (blocked.get(faculty, 0) >> bit) & 1:
+                found.append((faculty, assignment))
+    return found
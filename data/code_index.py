@@ -0,0 +1,270 @@
+"""Where each faculty and subject code is used, and renames that touch only those places.
+
+``CodeIndex`` maps every code to the timetable cells, subject-faculty map
+entries and per-semester documents that mention it. It is built from the
+resolved assignments, so it is kept per ``store.version`` like the rest.
+``rename`` applies any number of faculty and subject renames at once:
+
+* only the indexed cells and entries are rewritten, not every cell;
+* the renames apply together, so swaps like ``A -> B, B -> A`` work;
+* everything is saved in one ``store.batch()``, which is one SQLite
+  transaction or one journal entry.
+
+Renames in bulk come from a CSV with ``old,new`` columns, plus optional
+``kind`` (``faculty``/``subject``) and ``program``/``semester`` columns
+that limit a subject rename to one semester; see ``read_renames``.
+"""
+import csv
+
+from data.assignments import CELL, resolved
+from utils import profiler
+from utils.cell_parser import rename_codes
+
+FACULTY = "faculty"
+SUBJECT = "subject"
+SEMESTER_DOCUMENTS = ("subjects.json", "subject_faculty_map.json", "subject_metadata.json")
+
+
+class CodeIndex:
+    def __init__(self, assignments, subjects, subject_faculty_map, subject_metadata):
+        self.faculty_cells = {}  # faculty -> [(program, semester, row, day)] naming it in the cell
+        self.faculty_map = {}  # faculty -> [(program, semester, subject)] listing it in the map
+        self.subject_cells = {}  # (program, semester, subject) -> [(row, day)]
+        self.subject_semesters = {}  # subject -> {(program, semester)} with the code in a cell or document
+        for assignment in assignments.assignments + assignments.unassigned:
+            owner = (assignment.program, assignment.semester)
+            self.subject_cells.setdefault((*owner, assignment.subject), []).append((assignment.row, assignment.day))
+            self.subject_semesters.setdefault(assignment.subject, set()).add(owner)
+            if assignment.source == CELL:
+                for faculty in assignment.faculty:
+                    self.faculty_cells.setdefault(faculty, []).append((*owner, assignment.row, assignment.day))
+        for document in (subjects, subject_faculty_map, subject_metadata):
+            for program, semesters in document.items():
+                for semester, entries in semesters.items():
+                    for subject in entries:
+                        self.subject_semesters.setdefault(subject, set()).add((program, semester))
+        for program, semesters in subject_faculty_map.items():
+            for semester, mapping in semesters.items():
+                for subject, faculty_list in mapping.items():
+                    for faculty in faculty_list:
+                        self.faculty_map.setdefault(faculty, []).append((program, semester, subject))
+
+    def faculty_usage(self, faculty):
+        return len(self.faculty_cells.get(faculty, ())), len(self.faculty_map.get(faculty, ()))
+
+    def subject_usage(self, program, semester, subject):
+        return len(self.subject_cells.get((program, semester, subject), ()))
+
+
+def _store(store):
+    if store is None:
+        from data.master import store
+    return store
+
+
+def for_store(store=None):
+    store = _store(store)
+    assignments = resolved(store)  # loads the timetable first so the version below is current
+    documents = store.subjects, store.subject_faculty_map, store.subject_metadata
+    cached = _indexes.get(id(store))
+    if cached is None or cached[0] != store.version:
+        with profiler.span("code_index"):
+            cached = _indexes[id(store)] = (store.version, CodeIndex(assignments, *documents))
+    return cached[1]
+
+
+_indexes = {}
+
+
+# ------------------ Renames ------------------
+def _rename_keys(mapping, renames):
+    """Rename dict keys in place, keeping their order."""
+    if not any(key in renames for key in mapping):
+        return False
+    items = [(renames.get(key, key), value) for key, value in mapping.items()]
+    mapping.clear()
+    mapping.update(items)
+    return True
+
+
+def rename_conflicts(faculty=None, subjects=None, store=None):
+    """Messages for renames onto a code that already exists (and is not itself renamed away)
+    or that more than one code is renamed to."""
+    store = _store(store)
+    faculty = faculty or {}
+    subjects = subjects or {}
+    conflicts = [
+        f"Faculty {old} -> {new}: {new} already exists."
+        for old, new in faculty.items() if new in store.faculties and new not in faculty
+    ]
+    targets = list(faculty.values())
+    conflicts.extend(
+        f"Faculty {', '.join(sorted(old for old, target in faculty.items() if target == new))} -> {new}: "
+        "more than one code renamed to it."
+        for new in sorted(set(targets)) if targets.count(new) > 1
+    )
+    subject_targets = {}
+    for (program, semester, old), new in subjects.items():
+        existing = set().union(*(store.load(name).get(program, {}).get(semester, {}) for name in SEMESTER_DOCUMENTS))
+        if new in existing and (program, semester, new) not in subjects:
+            conflicts.append(f"Subject {old} -> {new} in {program} {semester}: {new} already exists.")
+        subject_targets.setdefault((program, semester, new), []).append(old)
+    conflicts.extend(
+        f"Subject {', '.join(sorted(olds))} -> {new} in {program} {semester}: more than one code renamed to it."
+        for (program, semester, new), olds in sorted(subject_targets.items()) if len(olds) > 1
+    )
+    return conflicts
+
+
+def rename(faculty=None, subjects=None, store=None):
+    """Apply ``{old: new}`` faculty renames and ``{(program, semester, old): new}`` subject renames.
+
+    Returns ``(changed cells, affected {(program, semester)})``. Raises
+    ``ValueError`` without changing anything when a new code already exists.
+    """
+    store = _store(store)
+    faculty = {old: new for old, new in (faculty or {}).items() if old != new}
+    subjects = {key: new for key, new in (subjects or {}).items() if key[2] != new}
+    conflicts = rename_conflicts(faculty, subjects, store)
+    if conflicts:
+        raise ValueError("\n".join(conflicts))
+
+    index = for_store(store)
+    timetables = store.timetables
+    subject_faculty_map = store.subject_faculty_map
+    per_semester = {}  # (program, semester) -> {old: new}
+    for (program, semester, old), new in subjects.items():
+        per_semester.setdefault((program, semester), {})[old] = new
+
+    targets = set()
+    for old in faculty:
+        targets.update(index.faculty_cells.get(old, ()))
+    for (program, semester, old) in subjects:
+        targets.update((program, semester, row, day) for row, day in index.subject_cells.get((program, semester, old), ()))
+
+    changed = 0
+    affected = set()
+    for program, semester, row, day in targets:
+        table = timetables[program][semester]
+        raw = table[row][day]
+        updated = rename_codes(raw, per_semester.get((program, semester)), faculty)
+        if updated != raw:
+            table[row][day] = updated
+            changed += 1
+            affected.add((program, semester))
+
+    map_changed = False
+    entries = {entry for old in faculty for entry in index.faculty_map.get(old, ())}
+    for program, semester, subject in entries:
+        faculty_list = subject_faculty_map[program][semester][subject]
+        renamed = []
+        for code in faculty_list:
+            code = faculty.get(code, code)
+            if code not in renamed:
+                renamed.append(code)
+        if renamed != faculty_list:
+            faculty_list[:] = renamed
+            map_changed = True
+            affected.add((program, semester))
+
+    documents = {}
+    for name in SEMESTER_DOCUMENTS:
+        document = store.load(name)
+        for (program, semester), renames in per_semester.items():
+            if _rename_keys(document.get(program, {}).get(semester, {}), renames):
+                documents[name] = document
+                affected.add((program, semester))
+    if map_changed:
+        documents["subject_faculty_map.json"] = subject_faculty_map
+    for name in ("faculties.json", "faculty_availability.json"):
+        if _rename_keys(store.load(name), faculty):
+            documents[name] = store.load(name)
+
+    with store.batch():
+        if changed:
+            store.save("timetable.json", timetables)
+        for name, document in documents.items():
+            store.save(name, document)
+    return changed, affected
+
+
+def delete_faculty(faculty, store=None):
+    """Remove a faculty code and take it off the subject-faculty map; returns the affected semesters.
+
+    Cells that name the faculty are left as typed; ``cli.py validate``
+    reports them as unknown faculty.
+    """
+    store = _store(store)
+    index = for_store(store)
+    subject_faculty_map = store.subject_faculty_map
+    affected = set()
+    for program, semester, subject in index.faculty_map.get(faculty, ()):
+        faculty_list = subject_faculty_map[program][semester][subject]
+        faculty_list[:] = [code for code in faculty_list if code != faculty]
+        affected.add((program, semester))
+    with store.batch():
+        if store.faculties.pop(faculty, None) is not None:
+            store.save("faculties.json", store.faculties)
+        if affected:
+            store.save("subject_faculty_map.json", subject_faculty_map)
+        if store.faculty_availability.pop(faculty, None) is not None:
+            store.save("faculty_availability.json", store.faculty_availability)
+    return affected
+
+
+def delete_subject(program, semester, subject, store=None):
+    """Remove a subject from its semester's documents; returns how many cells still use the code."""
+    store = _store(store)
+    remaining = for_store(store).subject_usage(program, semester, subject)
+    with store.batch():
+        for name in SEMESTER_DOCUMENTS:
+            document = store.load(name)
+            if document.get(program, {}).get(semester, {}).pop(subject, None) is not None:
+                store.save(name, document)
+    return remaining
+
+
+# ------------------ CSV ------------------
+def read_renames(lines, store=None):
+    """``(faculty renames, subject renames)`` for ``rename`` from CSV lines.
+
+    A row without ``kind`` is a faculty rename when ``old`` is a known
+    faculty code and a subject rename otherwise. A subject row without
+    ``program``/``semester`` renames the code in every semester that uses
+    it. Raises ``ValueError`` listing the rows that cannot be applied.
+    """
+    store = _store(store)
+    index = for_store(store)
+    faculty = {}
+    subjects = {}
+    problems = []
+    reader = csv.DictReader(lines)
+    missing = {"old", "new"} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"The CSV needs the columns: {', '.join(sorted(missing))}.")
+    for line_number, row in enumerate(reader, start=2):
+        old = (row.get("old") or "").strip()
+        new = (row.get("new") or "").strip()
+        kind = (row.get("kind") or "").strip().lower() or (FACULTY if old in store.faculties else SUBJECT)
+        if not old or not new:
+            problems.append(f"line {line_number}: old and new are required")
+        elif kind == FACULTY:
+            if old not in store.faculties and old not in index.faculty_cells and old not in index.faculty_map:
+                problems.append(f"line {line_number}: faculty {old} is not used anywhere")
+            faculty[old] = new
+        elif kind == SUBJECT:
+            program = (row.get("program") or "").strip()
+            semester = (row.get("semester") or "").strip()
+            owners = [
+                owner for owner in sorted(index.subject_semesters.get(old, ()))
+                if (not program or owner[0] == program) and (not semester or owner[1] == semester)
+            ]
+            if not owners:
+                problems.append(f"line {line_number}: subject {old} is not used anywhere")
+            for owner in owners:
+                subjects[(*owner, old)] = new
+        else:
+            problems.append(f"line {line_number}: unknown kind {kind!r}")
+    if problems:
+        raise ValueError("\n".join(problems))
+    return faculty, subjects
@@ -0,0 +1,439 @@
+"""Append-only change journal with undo/redo and point-in-time restore.
+
+``JournalBackend`` wraps a store backend (JSON files or SQLite). A save no
+longer rewrites the document. The backend diffs it against the last state
+it wrote and appends the delta to ``journal.jsonl`` as one line per flush::
+
+    {"seq": 42, "ts": "2026-03-01T10:00:00", "kind": "edit",
+     "changes": {"timetable.json": [{"path": ["MSc CS", "Semester I", 2, 3],
+                                     "old": "P3 (RJ)", "new": "P5 (CK)"}]}}
+
+``old``/``new`` are left out when the key did not or does not exist.
+The first time a document is saved, a ``track`` entry records it whole
+(path ``[]``), so replays never depend on the files as they were before
+journaling started. Reading a document means reading the wrapped backend
+and replaying the current entries.
+
+Every ``compact_every`` entries (or on ``compact()``) the documents are
+written back to the wrapped backend and to ``snapshot-<seq>.json``, and
+the journal moves to ``segment-<first>-<last>.jsonl``. Any past state is
+the nearest snapshot at or before it plus the deltas that follow.
+
+Undo and redo are journal entries too (``kind`` ``undo``/``redo`` with the
+``target`` edit), so history is never rewritten. A flush is one undo step,
+which makes a ``store.batch()`` undo as a unit.
+
+Everything that reads or writes the documents has to go through a
+journaled store. The wrapped JSON files or SQLite tables only hold the
+state of the last compaction.
+
+    TIMETABLE_JOURNAL=1 streamlit run app.py
+    python -m data.journal log|undo|redo|compact
+    python -m data.journal restore SEQ
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+JOURNAL_FILE = "journal.jsonl"
+COMPACT_EVERY = 200
+
+
+# ------------------ Deltas ------------------
+def diff(old, new, path=()):
+    """Ops turning ``old`` into ``new``: dicts key by key, equal-length lists item by item."""
+    if type(old) is type(new) and old == new:
+        return []  # one C-level comparison skips every unchanged subtree
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in old.items():
+            if key not in new:
+                ops.append({"path": [*path, key], "old": value})
+            else:
+                ops.extend(diff(value, new[key], (*path, key)))
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"path": [*path, key], "new": value})
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (old_value, new_value) in enumerate(zip(old, new)):
+            ops.extend(diff(old_value, new_value, (*path, index)))
+        return ops
+    return [{"path": list(path), "old": old, "new": new}]
+
+
+def invert(ops):
+    inverted = []
+    for op in reversed(ops):
+        flipped = {"path": op["path"]}
+        if "new" in op:
+            flipped["old"] = op["new"]
+        if "old" in op:
+            flipped["new"] = op["old"]
+        inverted.append(flipped)
+    return inverted
+
+
+def apply(document, ops):
+    """Apply ops in place; returns the document (``None`` once a whole-document op removed it)."""
+    for op in ops:
+        path = op["path"]
+        if not path:
+            document = copy.deepcopy(op["new"]) if "new" in op else None
+            continue
+        target = document
+        for key in path[:-1]:
+            target = target[key]
+        key = path[-1]
+        if "new" in op:
+            target[key] = copy.deepcopy(op["new"])
+        elif isinstance(target, dict):
+            target.pop(key, None)
+    return document
+
+
+# ------------------ Backend ------------------
+class JournalBackend:
+    def __init__(self, base, journal_dir, compact_every=COMPACT_EVERY):
+        self.base = base
+        self.dir = Path(journal_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.dir / JOURNAL_FILE
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._shadow = {}  # filename -> data as last read or written, for diffing
+        self._snapshot_cache = None
+        self._reset()
+
+    def _reset(self):
+        self.snapshot_seq = max(self._snapshot_seqs(), default=0)
+        self.seq = self.snapshot_seq
+        self._entries = []
+        self._last = {}  # filename -> seq of its latest entry in the current journal
+        self._offset = 0
+        self._inode = None
+        self._shadow.clear()
+
+    # ------------------ Journal file ------------------
+    def _snapshot_seqs(self):
+        return sorted(int(path.stem.split("-")[1]) for path in self.dir.glob("snapshot-*.json"))
+
+    def _sync(self):
+        """Pick up entries appended since the last look (possibly by another process)."""
+        try:
+            file_stat = self.path.stat()
+        except FileNotFoundError:
+            if self._offset:
+                self._reset()  # compacted by another process
+            return
+        if self._inode not in (None, file_stat.st_ino) or file_stat.st_size < self._offset:
+            self._reset()
+        self._inode = file_stat.st_ino
+        size = file_stat.st_size
+        if size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if line.strip():
+                self._add(json.loads(line))
+        self._offset += len(complete)
+
+    def _add(self, entry):
+        if entry["seq"] <= self.snapshot_seq:
+            return  # already folded into the snapshot
+        self._entries.append(entry)
+        self.seq = entry["seq"]
+        for filename in entry["changes"]:
+            self._last[filename] = entry["seq"]
+            self._shadow.pop(filename, None)
+
+    def _append(self, kind, changes, target=None):
+        entry = {"seq": self.seq + 1, "ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "kind": kind, "changes": changes}
+        if target is not None:
+            entry["target"] = target
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            self._inode = os.fstat(f.fileno()).st_ino
+        self._offset += len(line)
+        self._add(entry)
+        return entry
+
+    # ------------------ Store backend API ------------------
+    def signature(self, filename):
+        with self._lock:
+            self._sync()
+            base = self.base.signature(filename)
+            last = self._last.get(filename)
+            if base is None and last is None:
+                return None
+            return (base, self.snapshot_seq, last)
+
+    def read(self, filename):
+        with self._lock:
+            self._sync()
+            data = self._current(filename)
+            if data is None:
+                raise FileNotFoundError(filename)
+            raw = json.dumps(data, indent=2).encode("utf-8")
+            self._shadow[filename] = json.loads(raw)
+            return data, hashlib.sha1(raw).digest()
+
+    def _current(self, filename):
+        data = self.base.read(filename)[0] if self.base.signature(filename) is not None else None
+        for entry in self._entries:
+            if filename in entry["changes"]:
+                data = apply(data, entry["changes"][filename])
+        return data
+
+    def write_many(self, items):
+        with self._lock:
+            self._sync()
+            changes = {}
+            written = {}
+            untracked = {}
+            for filename, _, raw in items:
+                new = written[filename] = json.loads(raw)
+                if self._tracked(filename):
+                    old = self._shadow[filename] if filename in self._shadow else self._current(filename)
+                else:
+                    old = self.base.read(filename)[0] if self.base.signature(filename) is not None else {}
+                    untracked[filename] = [{"path": [], "new": old}]
+                ops = diff(old, new)
+                if ops:
+                    changes[filename] = ops
+            if untracked:
+                self._append("track", untracked)
+            if changes:
+                self._append("edit", changes)
+            self._shadow.update(written)
+            if len(self._entries) >= self.compact_every:
+                self.compact()
+
+    def _tracked(self, filename):
+        if filename in self._last:
+            return True
+        snapshot = self._snapshot(self.snapshot_seq)
+        return filename in snapshot["documents"]
+
+    # ------------------ History ------------------
+    def _snapshot(self, seq):
+        if not seq:
+            return {"seq": 0, "undo": [], "redo": [], "documents": {}}
+        cached = self._snapshot_cache
+        if cached is None or cached["seq"] != seq:
+            with open(self.dir / f"snapshot-{seq:06d}.json", encoding="utf-8") as f:
+                cached = self._snapshot_cache = json.load(f)
+        return cached
+
+    def history(self, since=0, until=None):
+        """Entries with ``since < seq <= until``, oldest first, across compacted segments."""
+        with self._lock:
+            self._sync()
+            entries = []
+            for path in sorted(self.dir.glob("segment-*.jsonl")):
+                _, first, last = path.stem.split("-")
+                if int(last) <= since or (until is not None and int(first) > until):
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    entries.extend(json.loads(line) for line in f if line.strip())
+            entries.extend(self._entries)
+            return [
+                entry for entry in entries
+                if entry["seq"] > since and (until is None or entry["seq"] <= until)
+            ]
+
+    def entry(self, seq):
+        found = self.history(seq - 1, seq)
+        return found[0] if found else None
+
+    def stacks(self):
+        """(undo stack, redo stack) of edit seqs, most recent last."""
+        snapshot = self._snapshot(self.snapshot_seq)
+        undo, redo = list(snapshot["undo"]), list(snapshot["redo"])
+        for entry in list(self._entries):
+            if entry["kind"] == "edit":
+                undo.append(entry["seq"])
+                redo.clear()
+            elif entry["kind"] == "undo":
+                undo.remove(entry["target"])
+                redo.append(entry["target"])
+            elif entry["kind"] == "redo":
+                redo.remove(entry["target"])
+                undo.append(entry["target"])
+        return undo, redo
+
+    def undo(self):
+        with self._lock:
+            self._sync()
+            undo, _ = self.stacks()
+            if not undo:
+                return None
+            target = self.entry(undo[-1])
+            changes = {filename: invert(ops) for filename, ops in target["changes"].items()}
+            return self._append("undo", changes, target["seq"])
+
+    def redo(self):
+        with self._lock:
+            self._sync()
+            _, redo = self.stacks()
+            if not redo:
+                return None
+            target = self.entry(redo[-1])
+            return self._append("redo", target["changes"], target["seq"])
+
+    def state_at(self, seq):
+        """{filename: data} of every journaled document as of ``seq``."""
+        with self._lock:
+            snapshot_seq = max([s for s in self._snapshot_seqs() if s <= seq], default=0)
+            documents = copy.deepcopy(self._snapshot(snapshot_seq)["documents"])
+            for entry in self.history(snapshot_seq):
+                for filename, ops in entry["changes"].items():
+                    if entry["seq"] <= seq or (entry["kind"] == "track" and filename not in documents):
+                        # A document tracked after seq was unchanged until then.
+                        documents[filename] = apply(documents.get(filename), ops)
+            return {filename: data for filename, data in documents.items() if data is not None}
+
+    def compact(self):
+        """Write the current documents to the wrapped backend and a snapshot, and start a new journal."""
+        with self._lock:
+            self._sync()
+            if not self._entries:
+                return None
+            undo, redo = self.stacks()
+            documents = dict(self._snapshot(self.snapshot_seq)["documents"])
+            for filename in self._last:
+                documents[filename] = self._current(filename)
+            documents = {filename: data for filename, data in documents.items() if data is not None}
+            self.base.write_many([
+                (filename, documents[filename], json.dumps(documents[filename], indent=2).encode("utf-8"))
+                for filename in self._last if filename in documents
+            ])
+            snapshot = {"seq": self.seq, "ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "undo": undo, "redo": redo, "documents": documents}
+            snapshot_path = self.dir / f"snapshot-{self.seq:06d}.json"
+            tmp_path = snapshot_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(snapshot), encoding="utf-8")
+            os.replace(tmp_path, snapshot_path)
+            first = self._entries[0]["seq"]
+            os.replace(self.path, self.dir / f"segment-{first:06d}-{self.seq:06d}.jsonl")
+            self._reset()
+            return snapshot["seq"]
+
+
+def journal_dir(backend):
+    """Where the journal of ``backend`` lives: ``data/journal/`` or ``<db>.journal/``."""
+    if hasattr(backend, "db_path"):
+        return backend.db_path.with_name(backend.db_path.name + ".journal")
+    return backend.data_dir / "journal"
+
+
+# ------------------ Store helpers ------------------
+def _journal(store):
+    if store is None:
+        from data.master import store
+    if not isinstance(store.backend, JournalBackend):
+        raise ValueError("The store has no change journal; set TIMETABLE_JOURNAL=1.")
+    return store, store.backend
+
+
+def enabled(store=None):
+    if store is None:
+        from data.master import store
+    return isinstance(store.backend, JournalBackend)
+
+
+def log(store=None, limit=50):
+    """The latest ``limit`` entries, newest first."""
+    store, backend = _journal(store)
+    store.flush()
+    return list(backend.history(max(backend.seq - limit, 0)))[::-1]
+
+
+def undo(store=None):
+    store, backend = _journal(store)
+    store.flush()
+    return backend.undo()
+
+
+def redo(store=None):
+    store, backend = _journal(store)
+    store.flush()
+    return backend.redo()
+
+
+def restore(seq, store=None):
+    """Bring every journaled document back to its state at ``seq``, as one new (undoable) edit."""
+    store, backend = _journal(store)
+    store.flush()
+    documents = backend.state_at(seq)
+    with store.batch():
+        for filename, data in documents.items():
+            store.save(filename, data)
+    return sorted(documents)
+
+
+def compact(store=None):
+    store, backend = _journal(store)
+    store.flush()
+    return backend.compact()
+
+
+def describe(entry):
+    """One-line summary of a journal entry."""
+    parts = []
+    for filename, ops in entry["changes"].items():
+        if entry["kind"] == "track":
+            parts.append(f"{filename}: journaling started")
+            continue
+        paths = {" / ".join(str(key) for key in op["path"][:2]) for op in ops if op["path"]}
+        where = f" ({', '.join(sorted(paths)[:3])}{', ...' if len(paths) > 3 else ''})" if paths else ""
+        parts.append(f"{filename}: {len(ops)} change{'s' if len(ops) != 1 else ''}{where}")
+    action = f"{entry['kind']} #{entry['target']}" if "target" in entry else entry["kind"]
+    return f"#{entry['seq']} {entry['ts']} {action} — " + "; ".join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m data.journal", description="Inspect and rewind the change journal.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    log_parser = sub.add_parser("log", help="List recent journal entries.")
+    log_parser.add_argument("--limit", type=int, default=20)
+    sub.add_parser("undo", help="Undo the latest edit.")
+    sub.add_parser("redo", help="Redo the latest undone edit.")
+    restore_parser = sub.add_parser("restore", help="Restore every document to its state at SEQ.")
+    restore_parser.add_argument("seq", type=int)
+    sub.add_parser("compact", help="Fold the journal into a snapshot.")
+    args = parser.parse_args(argv)
+
+    from data.master import store
+    try:
+        if args.command == "log":
+            for entry in log(store, args.limit):
+                print(describe(entry))
+        elif args.command in ("undo", "redo"):
+            entry = undo(store) if args.command == "undo" else redo(store)
+            print(describe(entry) if entry else f"Nothing to {args.command}.")
+        elif args.command == "restore":
+            print(f"Restored {', '.join(restore(args.seq, store)) or 'nothing'} to #{args.seq}.")
+        else:
+            seq = compact(store)
+            print(f"Compacted into snapshot #{seq}." if seq else "Nothing to compact.")
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
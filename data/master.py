@@ -1,16 +1,234 @@
 # data/master.py
+import atexit
+import hashlib
 import json
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+from utils import profiler
+
+DATA_DIR = Path(__file__).parent
+
+
+class JsonFileBackend:
+    """One JSON file per document under ``data_dir``."""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = Path(data_dir)
+
+    def path(self, filename):
+        return self.data_dir / filename
+
+    def signature(self, filename):
+        try:
+            file_stat = self.path(filename).stat()
+        except FileNotFoundError:
+            return None
+        return (file_stat.st_mtime_ns, file_stat.st_size)
+
+    def read(self, filename):
+        with open(self.path(filename), "rb") as f:
+            raw = f.read()
+        return json.loads(raw), hashlib.sha1(raw).digest()
+
+    def write_many(self, items):
+        for filename, _, raw in items:
+            self._write_atomic(self.path(filename), raw)
+
+    def _write_atomic(self, path, raw):
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(path.stat().st_mode) if path.exists() else 0o644)
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+class TimetableStore:
+    """Process-wide cache of the data documents (``timetable.json`` etc.).
+
+    Each document is parsed once and kept until its signature (file
+    mtime/size, or the row version in SQLite) changes, so every tab works on
+    the same objects and Streamlit reruns skip the disk entirely. ``version``
+    increases whenever any document is (re)loaded or saved and can be used as
+    a cache key for derived data.
+
+    Saves are write-behind: inside ``batch()`` (or when ``flush_delay`` is
+    set) documents are only marked dirty and written together on flush. A
+    document is rewritten only if its serialized contents changed; the JSON
+    backend writes through a temp file plus rename so readers never see a
+    torn file, the SQLite backend writes one transaction per flush.
+
+    With ``TIMETABLE_JOURNAL=1`` the backend is wrapped in
+    ``data.journal.JournalBackend``, which appends each flush as a delta to
+    a JSON Lines journal (with undo/redo) instead of rewriting documents.
+
+    A ``read_only`` store (``TIMETABLE_READ_ONLY=1``) refuses saves, so a
+    viewer replica can run against a shared or read-only data directory.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, flush_delay=0, backend=None, read_only=False):
+        self.backend = JsonFileBackend(data_dir) if backend is None else backend
+        self.flush_delay = flush_delay
+        self.read_only = read_only
+        self.version = 0
+        self._cache = {}
+        self._digests = {}
+        self._dirty = set()
+        self._batch_depth = 0
+        self._timer = None
+        self._lock = threading.RLock()
+
+    def load(self, filename):
+        with self._lock:
+            signature = self.backend.signature(filename)
+            cached = self._cache.get(filename)
+            if cached is not None and (cached[0] == signature or filename in self._dirty):
+                return cached[1]
+            if signature is None:
+                data = {}
+                self._digests.pop(filename, None)
+            else:
+                with profiler.span(f"load {filename}"):
+                    data, self._digests[filename] = self.backend.read(filename)
+            self._cache[filename] = (signature, data)
+            self._dirty.discard(filename)
+            self.version += 1
+            return data
+
+    def save(self, filename, data):
+        if self.read_only:
+            raise PermissionError(f"Cannot save {filename}: the timetable store is read-only.")
+        with self._lock:
+            self._cache[filename] = (self._cache.get(filename, (None,))[0], data)
+            self._dirty.add(filename)
+            self.version += 1
+            if self._batch_depth:
+                return
+            if self.flush_delay > 0:
+                self._schedule_flush()
+            else:
+                self.flush()
+
+    @contextmanager
+    def batch(self):
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    if self.flush_delay > 0:
+                        self._schedule_flush()
+                    else:
+                        self.flush()
+
+    def _schedule_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.flush_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            changed = []
+            for filename in sorted(self._dirty):
+                data = self._cache[filename][1]
+                raw = json.dumps(data, indent=2).encode("utf-8")
+                digest = hashlib.sha1(raw).digest()
+                if self._digests.get(filename) == digest and self.backend.signature(filename) is not None:
+                    continue
+                changed.append((filename, data, raw, digest))
+            if changed:
+                self.backend.write_many([(filename, data, raw) for filename, data, raw, _ in changed])
+            for filename, data, _, digest in changed:
+                self._digests[filename] = digest
+                self._cache[filename] = (self.backend.signature(filename), data)
+            self._dirty.clear()
+
+    def invalidate(self, filename=None):
+        with self._lock:
+            if filename is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(filename, None)
+
+    @property
+    def timetables(self):
+        return self.load("timetable.json")
+
+    @property
+    def subjects(self):
+        return self.load("subjects.json")
+
+    @property
+    def faculties(self):
+        return self.load("faculties.json")
+
+    @property
+    def subject_faculty_map(self):
+        return self.load("subject_faculty_map.json")
+
+    @property
+    def subject_metadata(self):
+        return self.load("subject_metadata.json")
+
+    @property
+    def semester_metadata(self):
+        return self.load("semester_metadata.json")
+
+    @property
+    def rooms(self):
+        return self.load("rooms.json")
+
+    @property
+    def faculty_availability(self):
+        return self.load("faculty_availability.json")
+
+
+def default_backend():
+    db_path = os.environ.get("TIMETABLE_DB")
+    if db_path:
+        from data.sqlite_backend import SqliteBackend
+        backend = SqliteBackend(db_path)
+    else:
+        backend = JsonFileBackend(DATA_DIR)
+    if os.environ.get("TIMETABLE_JOURNAL", "").lower() in ("1", "true", "yes"):
+        from data.journal import JournalBackend, journal_dir
+        backend = JournalBackend(backend, journal_dir(backend))
+    return backend
+
+
+store = TimetableStore(
+    backend=default_backend(),
+    read_only=os.environ.get("TIMETABLE_READ_ONLY", "").lower() in ("1", "true", "yes"),
+)
+atexit.register(store.flush)
+
+
 def load_json(filename):
-    path = Path(__file__).parent / filename
-    with open(path, "r") as f:
-        return json.load(f)
+    return store.load(filename)
+
 
 def save_json(filename, data):
-    path = Path(__file__).parent / filename
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+    store.save(filename, data)
+
 
 faculties = load_json("faculties.json")
 subjects = load_json("subjects.json")
@@ -0,0 +1,135 @@
+"""Explicit, idempotent data migrations.
+
+Views never write; anything that fills in or reshapes the data files runs
+from here, either through the admin panel or the command line:
+
+    python -m data.migrations bsc-semesters [--semesters 10] [--dry-run]
+
+Running a migration twice is a no-op the second time.
+"""
+import argparse
+import copy
+import sys
+
+from data.master import store as default_store
+from data.timetable import build_semester_name, parse_semester_number, sort_semesters
+
+SEMESTER_DOCUMENTS = (
+    "timetable.json",
+    "subjects.json",
+    "subject_faculty_map.json",
+    "subject_metadata.json",
+    "semester_metadata.json",
+)
+
+
+def get_program_semesters(program, store=default_store):
+    return sort_semesters(set().union(*(store.load(name).get(program, {}) for name in SEMESTER_DOCUMENTS)))
+
+
+def is_bsc_program(program):
+    if not isinstance(program, str):
+        return False
+    name = program.lower().replace(".", "").replace(" ", "")
+    return "bsc" in name or "bachelor" in name
+
+
+# ------------------ Semester helpers ------------------
+def clone_semester_data(program, source_semester, target_semester, store=default_store):
+    for name in SEMESTER_DOCUMENTS:
+        program_data = store.load(name).setdefault(program, {})
+        if source_semester in program_data:
+            program_data[target_semester] = copy.deepcopy(program_data[source_semester])
+
+
+def create_blank_semester(program, target_semester, template_semester=None, store=default_store):
+    timetables = store.timetables.setdefault(program, {})
+    if template_semester in timetables:
+        template = timetables[template_semester]
+        rows = len(template)
+        cols = len(template[0]) if template else 6
+    else:
+        rows = 10
+        cols = 6
+    timetables[target_semester] = [["" for _ in range(cols)] for _ in range(rows)]
+    for name in SEMESTER_DOCUMENTS[1:]:
+        store.load(name).setdefault(program, {})[target_semester] = {}
+
+
+# ------------------ Migrations ------------------
+def missing_bsc_semesters(program, total_semesters=10, store=default_store):
+    if not is_bsc_program(program):
+        return []
+    existing = set(get_program_semesters(program, store))
+    return [
+        build_semester_name(number)
+        for number in range(1, total_semesters + 1)
+        if build_semester_name(number) not in existing
+    ]
+
+
+def ensure_bsc_semesters(program, total_semesters=10, store=default_store, dry_run=False):
+    """Create the missing semesters of a BSc program.
+
+    Odd semesters are cloned from Semester I and even ones from Semester II,
+    falling back to the other one and then to a blank grid. Returns the
+    names of the semesters that were (or, with ``dry_run``, would be) created.
+    """
+    missing = missing_bsc_semesters(program, total_semesters, store)
+    if dry_run or not missing:
+        return missing
+
+    existing = set(get_program_semesters(program, store))
+    base_odd = build_semester_name(1)
+    base_even = build_semester_name(2)
+    with store.batch():
+        for sem_name in missing:
+            number = parse_semester_number(sem_name)
+            first, second = (base_odd, base_even) if number % 2 == 1 else (base_even, base_odd)
+            if first in existing:
+                clone_semester_data(program, first, sem_name, store)
+            elif second in existing:
+                clone_semester_data(program, second, sem_name, store)
+            else:
+                create_blank_semester(program, sem_name, template_semester=first, store=store)
+            existing.add(sem_name)
+        for name in SEMESTER_DOCUMENTS:
+            store.save(name, store.load(name))
+    return missing
+
+
+def ensure_all_bsc_semesters(total_semesters=10, store=default_store, dry_run=False):
+    """Run ``ensure_bsc_semesters`` for every program; returns {program: created semesters}."""
+    programs = sorted(set().union(*(store.load(name) for name in SEMESTER_DOCUMENTS)))
+    created = {}
+    with store.batch():
+        for program in programs:
+            semesters = ensure_bsc_semesters(program, total_semesters, store, dry_run)
+            if semesters:
+                created[program] = semesters
+    return created
+
+
+MIGRATIONS = {
+    "bsc-semesters": ensure_all_bsc_semesters,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m data.migrations", description="Run data migrations.")
+    parser.add_argument("migration", choices=sorted(MIGRATIONS))
+    parser.add_argument("--semesters", type=int, default=10, help="Semesters per BSc program (default: 10).")
+    parser.add_argument("--dry-run", action="store_true", help="Report the changes without saving them.")
+    args = parser.parse_args(argv)
+
+    created = MIGRATIONS[args.migration](total_semesters=args.semesters, dry_run=args.dry_run)
+    verb = "Would create" if args.dry_run else "Created"
+    for program, semesters in created.items():
+        print(f"{verb} {', '.join(semesters)} for {program}")
+    if not created:
+        print("Nothing to do.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
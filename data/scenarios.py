@@ -0,0 +1,196 @@
+"""What-if scenario branches over the live timetable.
+
+A scenario stores only the cells it changes, each with the live value it
+replaced, in ``scenarios.json``::
+
+    {"Plan B": {"created": "2026-03-01T10:00:00", "note": "",
+                "cells": {"MSc CS": {"Semester I": {"2,3": ["P3 (RJ)", "P5 (CK)"]}}}}}
+
+``"2,3"`` is ``row,day`` in the grid and the pair is ``[base, value]``.
+Reading a scenario overlays its edits on the live data: untouched programs,
+semesters and rows are the live objects themselves and only edited rows are
+copied, so creating, switching and materializing a branch costs time and
+memory in proportion to its edits, not to the dataset.
+
+The recorded base value makes merging a three-way check: a cell whose live
+value moved away from the base since the edit (and not to the scenario's
+value) is a conflict, and ``merge`` refuses to overwrite it unless forced.
+"""
+import time
+
+SCENARIOS_FILE = "scenarios.json"
+
+
+class Scenario:
+    def __init__(self, name, base, document=None):
+        self.name = name
+        self.base = base
+        document = document or {}
+        self.created = document.get("created") or time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.note = document.get("note", "")
+        # (program, semester) -> {(row, day): (base value, value)}
+        self.edits = {}
+        for program, semesters in document.get("cells", {}).items():
+            for semester, cells in semesters.items():
+                target = self.edits.setdefault((program, semester), {})
+                for position, (base_value, value) in cells.items():
+                    row, day = position.split(",")
+                    target[(int(row), int(day))] = (base_value, value)
+
+    # ------------------ Cells ------------------
+    def live(self, program, semester, row, day):
+        table = self.base.get(program, {}).get(semester, [])
+        if row < len(table) and day < len(table[row]):
+            return table[row][day]
+        return ""
+
+    def get(self, program, semester, row, day):
+        edit = self.edits.get((program, semester), {}).get((row, day))
+        return self.live(program, semester, row, day) if edit is None else edit[1]
+
+    def set(self, program, semester, row, day, value):
+        cells = self.edits.setdefault((program, semester), {})
+        base_value = cells[(row, day)][0] if (row, day) in cells else self.live(program, semester, row, day)
+        if value == base_value:
+            cells.pop((row, day), None)
+        else:
+            cells[(row, day)] = (base_value, value)
+        if not cells:
+            del self.edits[(program, semester)]
+
+    def revert(self, program, semester, row=None, day=None):
+        """Drop the edits of a semester, or of one cell."""
+        if row is None:
+            self.edits.pop((program, semester), None)
+            return
+        cells = self.edits.get((program, semester), {})
+        cells.pop((row, day), None)
+        if not cells:
+            self.edits.pop((program, semester), None)
+
+    def update_table(self, program, semester, table):
+        """Record an edited grid (e.g. from the admin editor) as cell edits; returns the changed count."""
+        changed = 0
+        for row_idx, row in enumerate(table):
+            for day_idx in range(1, len(row)):
+                if row[day_idx] != self.get(program, semester, row_idx, day_idx):
+                    self.set(program, semester, row_idx, day_idx, row[day_idx])
+                    changed += 1
+        return changed
+
+    def edit_count(self):
+        return sum(len(cells) for cells in self.edits.values())
+
+    # ------------------ Overlay ------------------
+    def semester_rows(self, program, semester):
+        """The semester grid with the edits applied; only edited rows are copies."""
+        table = self.base.get(program, {}).get(semester, [])
+        cells = self.edits.get((program, semester))
+        if not cells:
+            return table
+        rows = list(table)
+        copied = set()
+        for (row, day), (_, value) in cells.items():
+            while row >= len(rows):
+                rows.append([""] * (len(rows[0]) if rows else day + 1))
+                copied.add(len(rows) - 1)
+            if row not in copied:
+                rows[row] = list(rows[row])
+                copied.add(row)
+            if day >= len(rows[row]):
+                rows[row].extend([""] * (day + 1 - len(rows[row])))
+            rows[row][day] = value
+        return rows
+
+    def timetables(self):
+        """``{program: {semester: rows}}`` as the scenario sees it, sharing everything untouched."""
+        overlay = dict(self.base)
+        for program, semester in self.edits:
+            if overlay.get(program) is self.base.get(program):
+                overlay[program] = dict(self.base.get(program, {}))
+            overlay[program][semester] = self.semester_rows(program, semester)
+        return overlay
+
+    # ------------------ Diff / merge ------------------
+    def diff(self):
+        """[(program, semester, row, day, live, value, conflict)] for cells that differ from live data."""
+        changes = []
+        for (program, semester), cells in sorted(self.edits.items()):
+            for (row, day), (base_value, value) in sorted(cells.items()):
+                current = self.live(program, semester, row, day)
+                if current == value:
+                    continue
+                changes.append((program, semester, row, day, current, value, current != base_value))
+        return changes
+
+    def conflicts(self):
+        return [change for change in self.diff() if change[6]]
+
+    def to_document(self):
+        cells = {}
+        for (program, semester), edits in self.edits.items():
+            cells.setdefault(program, {})[semester] = {
+                f"{row},{day}": [base_value, value] for (row, day), (base_value, value) in sorted(edits.items())
+            }
+        return {"created": self.created, "note": self.note, "cells": cells}
+
+
+# ------------------ Store ------------------
+def _store(store):
+    if store is None:
+        from data.master import store
+    return store
+
+
+def names(store=None):
+    return sorted(_store(store).load(SCENARIOS_FILE))
+
+
+def load(name, store=None):
+    """The named ``Scenario`` over the store's live timetable; a new empty one if it does not exist."""
+    store = _store(store)
+    document = store.load(SCENARIOS_FILE)
+    return Scenario(name, store.timetables, document.get(name))
+
+
+def save(scenario, store=None):
+    store = _store(store)
+    document = store.load(SCENARIOS_FILE)
+    document[scenario.name] = scenario.to_document()
+    store.save(SCENARIOS_FILE, document)
+
+
+def fork(scenario, name, store=None):
+    """A copy of ``scenario`` under a new name (its edits are copied, the live data is not)."""
+    copy = Scenario(name, scenario.base, {"note": scenario.note})
+    copy.edits = {key: dict(cells) for key, cells in scenario.edits.items()}
+    save(copy, store)
+    return copy
+
+
+def delete(name, store=None):
+    store = _store(store)
+    document = store.load(SCENARIOS_FILE)
+    if document.pop(name, None) is not None:
+        store.save(SCENARIOS_FILE, document)
+
+
+def merge(scenario, store=None, force=False):
+    """Write the scenario's edits into the live timetable and drop the scenario.
+
+    Returns ``(merged semesters, conflicts)``. With conflicts and no
+    ``force`` nothing is written and the merged list is empty.
+    """
+    store = _store(store)
+    conflicts = scenario.conflicts()
+    if conflicts and not force:
+        return [], conflicts
+    timetables = store.timetables
+    merged = []
+    with store.batch():
+        for program, semester in sorted(scenario.edits):
+            timetables.setdefault(program, {})[semester] = scenario.semester_rows(program, semester)
+            merged.append((program, semester))
+        store.save("timetable.json", timetables)
+        delete(scenario.name, store)
+    return merged, conflicts
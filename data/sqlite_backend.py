@@ -0,0 +1,464 @@
+"""SQLite storage for the timetable documents.
+
+Plugs into ``TimetableStore`` in place of the JSON files (set ``TIMETABLE_DB``)
+and keeps the nested documents in indexed tables, so faculty, semester and
+slot lookups are queries instead of full scans. ``resolved_faculty`` applies
+the same rule as ``data.assignments.resolve_faculty`` in SQL: faculty named
+in the cell win, otherwise the subject's faculty in the map. ``queries(store)``
+hands out the backend for those lookups when the store runs on SQLite.
+
+    python -m data.sqlite_backend import data/timetable.db
+    python -m data.sqlite_backend export data/timetable.db --out data/
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from data.assignments import Assignment
+from utils.cell_parser import parse_cell
+
+DOCUMENTS = [
+    "timetable.json",
+    "faculties.json",
+    "subjects.json",
+    "subject_faculty_map.json",
+    "subject_metadata.json",
+    "semester_metadata.json",
+    "rooms.json",
+    "faculty_availability.json",
+    "scenarios.json",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    digest BLOB
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    name TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS semesters (
+    doc TEXT NOT NULL,
+    program TEXT NOT NULL,
+    semester TEXT,
+    ord INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cells (
+    program TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    row_idx INTEGER NOT NULL,
+    day_idx INTEGER NOT NULL,
+    slot TEXT,
+    raw TEXT,
+    subject_code TEXT,
+    PRIMARY KEY (program, semester, row_idx, day_idx)
+);
+CREATE TABLE IF NOT EXISTS timetable_rows (
+    program TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    row_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cell_faculty (
+    program TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    row_idx INTEGER NOT NULL,
+    day_idx INTEGER NOT NULL,
+    faculty TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS faculty (
+    code TEXT PRIMARY KEY,
+    name TEXT,
+    ord INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subjects (
+    program TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    code TEXT NOT NULL,
+    name TEXT,
+    ord INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subject_faculty_map (
+    program TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    code TEXT NOT NULL,
+    faculty TEXT,
+    ord INTEGER NOT NULL,
+    pos INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subject_metadata (
+    program TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    code TEXT NOT NULL,
+    data TEXT NOT NULL,
+    ord INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS semester_metadata (
+    program TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_semesters_doc ON semesters (doc, ord);
+CREATE INDEX IF NOT EXISTS idx_cells_slot ON cells (day_idx, slot);
+CREATE INDEX IF NOT EXISTS idx_cells_subject ON cells (program, semester, subject_code);
+CREATE INDEX IF NOT EXISTS idx_cell_faculty_faculty ON cell_faculty (faculty);
+CREATE INDEX IF NOT EXISTS idx_cell_faculty_cell ON cell_faculty (program, semester, row_idx, day_idx);
+CREATE INDEX IF NOT EXISTS idx_subjects_semester ON subjects (program, semester);
+CREATE INDEX IF NOT EXISTS idx_map_semester ON subject_faculty_map (program, semester, code);
+CREATE INDEX IF NOT EXISTS idx_map_faculty ON subject_faculty_map (faculty);
+CREATE INDEX IF NOT EXISTS idx_subject_metadata_semester ON subject_metadata (program, semester);
+
+-- One row per (class cell, faculty): the cell's own faculty, or the map's when the cell names none.
+-- pos orders the faculty of one cell (cell_faculty rows are inserted in cell order).
+CREATE VIEW IF NOT EXISTS resolved_faculty AS
+SELECT program, semester, row_idx, day_idx, faculty, rowid AS pos, 'cell' AS source FROM cell_faculty
+UNION ALL
+SELECT c.program, c.semester, c.row_idx, c.day_idx, m.faculty, m.pos, 'map'
+FROM cells c JOIN subject_faculty_map m
+    ON m.program = c.program AND m.semester = c.semester AND m.code = c.subject_code
+WHERE m.faculty IS NOT NULL AND c.day_idx > 0 AND NOT EXISTS (
+    SELECT 1 FROM cell_faculty f
+    WHERE f.program = c.program AND f.semester = c.semester AND f.row_idx = c.row_idx AND f.day_idx = c.day_idx
+);
+"""
+
+# Documents shaped {program: {semester: value}} and the table holding their values.
+NESTED_TABLES = {
+    "timetable.json": ("cells", "cell_faculty", "timetable_rows"),
+    "subjects.json": ("subjects",),
+    "subject_faculty_map.json": ("subject_faculty_map",),
+    "subject_metadata.json": ("subject_metadata",),
+    "semester_metadata.json": ("semester_metadata",),
+}
+
+
+def _is_nested(data, value_type):
+    return isinstance(data, dict) and all(
+        isinstance(semesters, dict) and all(isinstance(value, value_type) for value in semesters.values())
+        for semesters in data.values()
+    )
+
+
+class SqliteBackend:
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    # ------------------ Store backend API ------------------
+    def signature(self, name):
+        with self._lock:
+            row = self.conn.execute("SELECT version FROM documents WHERE name = ?", (name,)).fetchone()
+        return None if row is None else (row[0],)
+
+    def read(self, name):
+        with self._lock:
+            kind, digest = self.conn.execute(
+                "SELECT kind, digest FROM documents WHERE name = ?", (name,)
+            ).fetchone()
+            if kind == "blob":
+                (body,) = self.conn.execute("SELECT body FROM blobs WHERE name = ?", (name,)).fetchone()
+                return json.loads(body), digest
+            return getattr(self, "_read_" + kind)(name), digest
+
+    def write_many(self, items):
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            for name, data, raw in items:
+                self._delete(name)
+                kind = self._write_document(name, data, raw)
+                self.conn.execute(
+                    "INSERT INTO documents (name, kind, version, digest) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET kind = excluded.kind, "
+                    "version = documents.version + 1, digest = excluded.digest",
+                    (name, kind, hashlib.sha1(raw).digest())
+                )
+
+    # ------------------ Writers ------------------
+    def _delete(self, name):
+        self.conn.execute("DELETE FROM blobs WHERE name = ?", (name,))
+        if name == "faculties.json":
+            self.conn.execute("DELETE FROM faculty")
+        elif name in NESTED_TABLES:
+            self.conn.execute("DELETE FROM semesters WHERE doc = ?", (name,))
+            for table in NESTED_TABLES[name]:
+                self.conn.execute(f"DELETE FROM {table}")
+
+    def _write_document(self, name, data, raw):
+        if name == "faculties.json" and isinstance(data, dict) and all(isinstance(v, str) for v in data.values()):
+            self.conn.executemany(
+                "INSERT INTO faculty (code, name, ord) VALUES (?, ?, ?)",
+                [(code, faculty_name, ord_) for ord_, (code, faculty_name) in enumerate(data.items())]
+            )
+            return "faculty"
+        value_types = {
+            "timetable.json": list,
+            "subjects.json": dict,
+            "subject_faculty_map.json": dict,
+            "subject_metadata.json": dict,
+            "semester_metadata.json": dict,
+        }
+        if name in value_types and _is_nested(data, value_types[name]):
+            self._write_semesters(name, data)
+            getattr(self, "_write_" + name.split(".")[0])(data)
+            return name.split(".")[0]
+        self.conn.execute("INSERT INTO blobs (name, body) VALUES (?, ?)", (name, raw.decode("utf-8")))
+        return "blob"
+
+    def _write_semesters(self, name, data):
+        rows = []
+        for program, semesters in data.items():
+            if not semesters:
+                rows.append((name, program, None, len(rows)))
+            for semester in semesters:
+                rows.append((name, program, semester, len(rows)))
+        self.conn.executemany("INSERT INTO semesters (doc, program, semester, ord) VALUES (?, ?, ?, ?)", rows)
+
+    def _write_timetable(self, data):
+        cells = []
+        cell_faculty = []
+        row_counts = []
+        for program, semesters in data.items():
+            for semester, table in semesters.items():
+                row_counts.append((program, semester, len(table)))
+                for row_idx, row in enumerate(table):
+                    slot = row[0] if row else None
+                    for day_idx, raw in enumerate(row):
+                        cell = parse_cell(raw) if day_idx else None
+                        # subject_code is NULL for anything that is not a class
+                        code = cell.code if cell is not None and cell.is_class else None
+                        cells.append((program, semester, row_idx, day_idx, slot, raw, code))
+                        for faculty in (cell.faculty if code is not None else ()):
+                            cell_faculty.append((program, semester, row_idx, day_idx, faculty))
+        self.conn.executemany("INSERT INTO cells VALUES (?, ?, ?, ?, ?, ?, ?)", cells)
+        self.conn.executemany("INSERT INTO cell_faculty VALUES (?, ?, ?, ?, ?)", cell_faculty)
+        self.conn.executemany("INSERT INTO timetable_rows VALUES (?, ?, ?)", row_counts)
+
+    def _write_subjects(self, data):
+        self.conn.executemany("INSERT INTO subjects VALUES (?, ?, ?, ?, ?)", [
+            (program, semester, code, name, ord_)
+            for program, semesters in data.items()
+            for semester, codes in semesters.items()
+            for ord_, (code, name) in enumerate(codes.items())
+        ])
+
+    def _write_subject_faculty_map(self, data):
+        rows = []
+        for program, semesters in data.items():
+            for semester, mapping in semesters.items():
+                for ord_, (code, faculty_list) in enumerate(mapping.items()):
+                    # A NULL faculty row keeps subjects with an empty list.
+                    rows.append((program, semester, code, None, ord_, -1))
+                    for pos, faculty in enumerate(faculty_list):
+                        rows.append((program, semester, code, faculty, ord_, pos))
+        self.conn.executemany("INSERT INTO subject_faculty_map VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def _write_subject_metadata(self, data):
+        self.conn.executemany("INSERT INTO subject_metadata VALUES (?, ?, ?, ?, ?)", [
+            (program, semester, code, json.dumps(meta), ord_)
+            for program, semesters in data.items()
+            for semester, metas in semesters.items()
+            for ord_, (code, meta) in enumerate(metas.items())
+        ])
+
+    def _write_semester_metadata(self, data):
+        self.conn.executemany("INSERT INTO semester_metadata VALUES (?, ?, ?)", [
+            (program, semester, json.dumps(meta))
+            for program, semesters in data.items()
+            for semester, meta in semesters.items()
+        ])
+
+    # ------------------ Readers ------------------
+    def _read_semesters(self, name, empty):
+        data = {}
+        for program, semester in self.conn.execute(
+            "SELECT program, semester FROM semesters WHERE doc = ? ORDER BY ord", (name,)
+        ):
+            semesters = data.setdefault(program, {})
+            if semester is not None:
+                semesters[semester] = empty()
+        return data
+
+    def _read_faculty(self, name):
+        return dict(self.conn.execute("SELECT code, name FROM faculty ORDER BY ord"))
+
+    def _read_timetable(self, name):
+        data = self._read_semesters(name, list)
+        for program, semester, row_idx, raw in self.conn.execute(
+            "SELECT program, semester, row_idx, raw FROM cells ORDER BY program, semester, row_idx, day_idx"
+        ):
+            table = data[program][semester]
+            while len(table) <= row_idx:
+                table.append([])
+            table[row_idx].append(raw)
+        # Trailing empty rows have no cells
+        for program, semester, row_count in self.conn.execute("SELECT program, semester, row_count FROM timetable_rows"):
+            table = data[program][semester]
+            table.extend([] for _ in range(row_count - len(table)))
+        return data
+
+    def _read_subjects(self, name):
+        data = self._read_semesters(name, dict)
+        for program, semester, code, subject_name in self.conn.execute(
+            "SELECT program, semester, code, name FROM subjects ORDER BY program, semester, ord"
+        ):
+            data[program][semester][code] = subject_name
+        return data
+
+    def _read_subject_faculty_map(self, name):
+        data = self._read_semesters(name, dict)
+        for program, semester, code, faculty in self.conn.execute(
+            "SELECT program, semester, code, faculty FROM subject_faculty_map ORDER BY program, semester, ord, pos"
+        ):
+            faculty_list = data[program][semester].setdefault(code, [])
+            if faculty is not None:
+                faculty_list.append(faculty)
+        return data
+
+    def _read_subject_metadata(self, name):
+        data = self._read_semesters(name, dict)
+        for program, semester, code, meta in self.conn.execute(
+            "SELECT program, semester, code, data FROM subject_metadata ORDER BY program, semester, ord"
+        ):
+            data[program][semester][code] = json.loads(meta)
+        return data
+
+    def _read_semester_metadata(self, name):
+        data = self._read_semesters(name, dict)
+        for program, semester, meta in self.conn.execute(
+            "SELECT program, semester, data FROM semester_metadata"
+        ):
+            data[program][semester] = json.loads(meta)
+        return data
+
+    # ------------------ Indexed queries ------------------
+    def indexed(self):
+        """True when the timetable and the subject-faculty map are kept in tables, so the queries below see them."""
+        with self._lock:
+            kinds = dict(self.conn.execute(
+                "SELECT name, kind FROM documents WHERE name IN ('timetable.json', 'subject_faculty_map.json')"
+            ))
+        return kinds.get("timetable.json") == "timetable" and kinds.get("subject_faculty_map.json") in (
+            "subject_faculty_map", None
+        )
+
+    def faculty_cells(self, faculty):
+        """``Assignment``s of ``faculty`` in timetable order, as ``resolved(store).by_faculty`` lists them.
+
+        ``faculty`` of each assignment is just ``(faculty,)``.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT r.program, r.semester, r.row_idx, r.day_idx, c.slot, c.subject_code, r.source "
+                "FROM resolved_faculty r "
+                "JOIN cells c ON c.program = r.program AND c.semester = r.semester "
+                "AND c.row_idx = r.row_idx AND c.day_idx = r.day_idx "
+                "JOIN semesters s ON s.doc = 'timetable.json' AND s.program = r.program AND s.semester = r.semester "
+                "WHERE r.faculty = ? ORDER BY s.ord, r.row_idx, r.day_idx",
+                (faculty,)
+            ).fetchall()
+        return [
+            Assignment(program, semester, row_idx, day_idx, slot, subject, (faculty,), source)
+            for program, semester, row_idx, day_idx, slot, subject, source in rows
+        ]
+
+    def faculty_load(self):
+        """Weekly hours per faculty code, as ``ResolvedAssignments.faculty_load``."""
+        with self._lock:
+            return dict(self.conn.execute("SELECT faculty, COUNT(*) FROM resolved_faculty GROUP BY faculty"))
+
+    def slot_cells(self, day_idx, slot):
+        """[(faculty, program, semester, row_idx, raw, subject_code, pos)] taught at one day and time slot."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT r.faculty, c.program, c.semester, c.row_idx, c.raw, c.subject_code, r.pos "
+                "FROM cells c JOIN resolved_faculty r ON r.program = c.program AND r.semester = c.semester "
+                "AND r.row_idx = c.row_idx AND r.day_idx = c.day_idx "
+                "WHERE c.day_idx = ? AND c.slot = ?",
+                (day_idx, slot)
+            ).fetchall()
+
+    def contended_slots(self):
+        """{(faculty, day_idx, slot): {(program, semester, row_idx): (raw, subject_code, pos)}} booked more than once."""
+        with self._lock:
+            keys = self.conn.execute(
+                "SELECT r.faculty, r.day_idx, c.slot FROM resolved_faculty r "
+                "JOIN cells c ON c.program = r.program AND c.semester = r.semester "
+                "AND c.row_idx = r.row_idx AND c.day_idx = r.day_idx "
+                "GROUP BY r.faculty, r.day_idx, c.slot HAVING COUNT(*) > 1"
+            ).fetchall()
+            slots = {}
+            for day_idx, slot in sorted({(day_idx, slot) for _, day_idx, slot in keys}):
+                for faculty, program, semester, row_idx, raw, subject_code, pos in self.slot_cells(day_idx, slot):
+                    slots.setdefault((faculty, day_idx, slot), {})[(program, semester, row_idx)] = (raw, subject_code, pos)
+        wanted = set(keys)
+        return {key: entries for key, entries in slots.items() if key in wanted}
+
+    def close(self):
+        self.conn.close()
+
+
+def queries(store):
+    """The store's ``SqliteBackend`` for indexed lookups, or None (JSON files, a journal, or blob documents).
+
+    Pending saves are flushed first so the tables match the store.
+    """
+    backend = store.backend
+    if not isinstance(backend, SqliteBackend):
+        return None
+    store.flush()
+    return backend if backend.indexed() else None
+
+
+# ------------------ Import / export ------------------
+def import_json(db_path, data_dir):
+    backend = SqliteBackend(db_path)
+    items = []
+    for name in DOCUMENTS:
+        path = Path(data_dir) / name
+        if path.exists():
+            raw = path.read_bytes()
+            data = json.loads(raw)
+            items.append((name, data, json.dumps(data, indent=2).encode("utf-8")))
+    backend.write_many(items)
+    backend.close()
+    return [name for name, _, _ in items]
+
+
+def export_json(db_path, data_dir):
+    backend = SqliteBackend(db_path)
+    exported = []
+    for name in DOCUMENTS:
+        if backend.signature(name) is None:
+            continue
+        data, _ = backend.read(name)
+        (Path(data_dir) / name).write_text(json.dumps(data, indent=2))
+        exported.append(name)
+    backend.close()
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copy timetable data between the JSON files and SQLite.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("db", help="SQLite database path")
+    parser.add_argument("--data-dir", default=str(Path(__file__).parent), help="Directory holding the JSON files")
+    parser.add_argument("--out", help="Export directory (defaults to --data-dir)")
+    args = parser.parse_args(argv)
+
+    if args.action == "import":
+        names = import_json(args.db, args.data_dir)
+    else:
+        names = export_json(args.db, args.out or args.data_dir)
+    print(f"{args.action}ed: {', '.join(names) if names else 'nothing'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Optional NumPy backend: subject ids as (tables, slots, days), faculty
+occupancy as (faculty, days, slots), plus vocabularies to decode the ids.
+
+Entries of ``is_common`` subjects are also counted on their own, so a slot
+where every entry is common (one combined class) is not a clash, as in
+``check_clashes``."""
+from data.assignments import resolve_faculty
+from data.timetable import semester_parity_matches, time_slots
+from utils import profiler
+from utils.cell_parser import CLASS, LIBRARY, LUNCH, parse_cell
+
+try:
+    import numpy as np
+except ImportError:  # numpy ships with pandas, but keep the rest of the app importable without it
+    np = None
+
+EMPTY_ID = 0
+LUNCH_ID = 1
+LIBRARY_ID = 2
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The tensor backend needs numpy (pip install numpy).")
+
+
+class Vocabulary:
+    def __init__(self, items=()):
+        self.items = []
+        self.ids = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        item_id = self.ids.get(item)
+        if item_id is None:
+            item_id = self.ids[item] = len(self.items)
+            self.items.append(item)
+        return item_id
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, item_id):
+        return self.items[item_id]
+
+
+def new_vocabularies():
+    return {
+        "codes": Vocabulary(["", "Lunch break", "Library/Mentoring"]),
+        "faculty": Vocabulary(),
+        "slots": Vocabulary(time_slots),
+    }
+
+
+class TimetableTensor:
+    def __init__(self, tables, codes, faculty_counts, common_counts, assignments, vocab):
+        self.tables = tables                  # [(program, semester)] in table-axis order
+        self.codes = codes                    # int32 (tables, slots, days)
+        self.faculty_counts = faculty_counts  # int16 (faculty, days, slots)
+        self.common_counts = common_counts    # int16 (faculty, days, slots), is_common entries only
+        self.assignments = assignments        # int32 (n, 4): table, slot, day, faculty
+        self.vocab = vocab
+
+    @property
+    def occupancy(self):
+        return self.faculty_counts > 0
+
+    def table_index(self, program, semester):
+        return self.tables.index((program, semester))
+
+
+def build_tensor(timetables, subject_faculty_map=None, parity=None, vocab=None, days=5, subject_metadata=None):
+    """Encode ``timetables``.
+
+    Faculty come from the cell text, e.g. ``P1 (RJ)``; pass ``subject_faculty_map``
+    to fall back to the map for cells without faculty, as ``check_clashes``
+    does (see ``data.assignments.resolve_faculty``). Pass ``subject_metadata``
+    to mark ``is_common`` subjects for the clash reductions. Pass a shared
+    ``vocab`` (see ``new_vocabularies``) when encoding several candidates that will
+    be compared or stacked.
+    """
+    _require_numpy()
+    vocab = new_vocabularies() if vocab is None else vocab
+    code_ids, faculty_ids, slot_ids = vocab["codes"], vocab["faculty"], vocab["slots"]
+
+    tables = []
+    cell_rows = []
+    assignments = []
+    common = []
+    for program, semesters in timetables.items():
+        for semester, table in semesters.items():
+            if not isinstance(table, list):
+                continue
+            if parity is not None and not semester_parity_matches(semester, parity):
+                continue
+            table_idx = len(tables)
+            tables.append((program, semester))
+            mapping = (subject_faculty_map or {}).get(program, {}).get(semester, {})
+            metadata = (subject_metadata or {}).get(program, {}).get(semester, {})
+            for row in table:
+                if not row or not row[0]:
+                    continue
+                slot_idx = slot_ids.add(row[0])
+                for day_idx, raw in enumerate(row[1:days + 1]):
+                    cell = parse_cell(raw)
+                    if cell.kind == LUNCH:
+                        code_id = LUNCH_ID
+                    elif cell.kind == LIBRARY:
+                        code_id = LIBRARY_ID
+                    elif cell.kind == CLASS and cell.code:
+                        code_id = code_ids.add(cell.code)
+                    else:
+                        continue
+                    cell_rows.append((table_idx, slot_idx, day_idx, code_id))
+                    if cell.kind != CLASS:
+                        continue
+                    faculty = resolve_faculty(cell, mapping)[0]
+                    is_common = bool(metadata.get(cell.code, {}).get("is_common", False))
+                    for code in faculty:
+                        assignments.append((table_idx, slot_idx, day_idx, faculty_ids.add(code)))
+                        common.append(is_common)
+
+    codes = np.zeros((len(tables), len(slot_ids), days), dtype=np.int32)
+    if cell_rows:
+        cell_rows = np.asarray(cell_rows, dtype=np.int32)
+        codes[cell_rows[:, 0], cell_rows[:, 1], cell_rows[:, 2]] = cell_rows[:, 3]
+
+    assignments = np.asarray(assignments, dtype=np.int32).reshape(-1, 4)
+    faculty_counts = np.zeros((len(faculty_ids), days, len(slot_ids)), dtype=np.int16)
+    np.add.at(faculty_counts, (assignments[:, 3], assignments[:, 2], assignments[:, 1]), 1)
+    common_counts = np.zeros_like(faculty_counts)
+    shared = assignments[np.asarray(common, dtype=bool).reshape(-1)]
+    np.add.at(common_counts, (shared[:, 3], shared[:, 2], shared[:, 1]), 1)
+    return TimetableTensor(tables, codes, faculty_counts, common_counts, assignments, vocab)
+
+
+def stack(tensors):
+    """Stack codes, faculty counts and common counts of tensors built with one shared vocab.
+
+    Returns (codes, faculty_counts, common_counts) with a leading batch axis;
+    arrays are zero-padded to the final vocabulary sizes.
+    """
+    _require_numpy()
+    faculty = max(t.faculty_counts.shape[0] for t in tensors)
+    slots = max(t.codes.shape[1] for t in tensors)
+    table_count = max(t.codes.shape[0] for t in tensors)
+    days = tensors[0].codes.shape[2]
+    codes = np.zeros((len(tensors), table_count, slots, days), dtype=np.int32)
+    counts = np.zeros((len(tensors), faculty, days, slots), dtype=np.int16)
+    common = np.zeros_like(counts)
+    for i, t in enumerate(tensors):
+        codes[i, :t.codes.shape[0], :t.codes.shape[1]] = t.codes
+        counts[i, :t.faculty_counts.shape[0], :, :t.faculty_counts.shape[2]] = t.faculty_counts
+        common[i, :t.common_counts.shape[0], :, :t.common_counts.shape[2]] = t.common_counts
+    return codes, counts, common
+
+
+def for_store(store=None):
+    """Tensor of the store's timetables (map fallback and ``is_common`` included), rebuilt when ``store.version`` changes.
+
+    ``days`` covers the widest row, so no column is cut off.
+    """
+    _require_numpy()
+    if store is None:
+        from data.master import store
+    timetables = store.timetables  # load first so the version below is current
+    documents = store.subject_faculty_map, store.subject_metadata
+    cached = _tensors.get(id(store))
+    if cached is None or cached[0] != store.version:
+        days = max(
+            (len(row) - 1 for semesters in timetables.values() for table in semesters.values()
+             if isinstance(table, list) for row in table),
+            default=5
+        )
+        with profiler.span("build_tensor"):
+            built = build_tensor(timetables, documents[0], days=max(days, 1), subject_metadata=documents[1])
+        cached = _tensors[id(store)] = (store.version, built)
+    return cached[1]
+
+
+_tensors = {}
+
+
+# ------------------ Reductions ------------------
+def faculty_hours(faculty_counts):
+    """Weekly hours per faculty id; works on (F, D, S) or (batch, F, D, S)."""
+    return faculty_counts.sum(axis=(-2, -1))
+
+
+def clash_mask(faculty_counts, common_counts):
+    """(day, slot) pairs booked more than once, unless every booking is a common subject."""
+    return (faculty_counts > 1) & (common_counts < faculty_counts)
+
+
+def clash_counts(faculty_counts, common_counts):
+    """Number of double-booked (day, slot) pairs per faculty id."""
+    return clash_mask(faculty_counts, common_counts).sum(axis=(-2, -1))
+
+
+def faculty_load(tensor):
+    hours = faculty_hours(tensor.faculty_counts)
+    return {tensor.vocab["faculty"][f]: int(h) for f, h in enumerate(hours) if h}
+
+
+def subject_counts(tensor, program, semester):
+    """{subject code: classes per week} of one table, one bincount over its codes."""
+    counts = np.bincount(tensor.codes[tensor.table_index(program, semester)].ravel(), minlength=LIBRARY_ID + 1)
+    code_ids = np.flatnonzero(counts[LIBRARY_ID + 1:]) + LIBRARY_ID + 1
+    return {tensor.vocab["codes"][code_id]: int(counts[code_id]) for code_id in code_ids}
+
+
+def clash_slots(tensor):
+    """[(faculty, day_idx, time_slot)] booked more than once, day_idx 1-based like the grid."""
+    faculty_idx, day_idx, slot_idx = np.nonzero(clash_mask(tensor.faculty_counts, tensor.common_counts))
+    return [
+        (tensor.vocab["faculty"][f], int(d) + 1, tensor.vocab["slots"][s])
+        for f, d, s in zip(faculty_idx, day_idx, slot_idx)
+    ]
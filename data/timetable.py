@@ -1,3 +1,5 @@
+import re
+
 
 time_slots = [
     "10.00 - 11.00",
@@ -12,5 +14,80 @@ time_slots = [
 
 days = ["Time", "MON", "TUE", "WED", "THU", "FRI"]
 
+# Short labels for known programs
+PROGRAM_ABBR = {
+    "MSc CS": "CS",
+    "MSc DFIS": "DF",
+    "MTech AI & DS": "MT",
+    "MSc FS": "FS"
+}
+
+
+def short_label(program, semester):
+    """Compact program/semester tag used in faculty grids, e.g. ``CS1``."""
+    short_prog = PROGRAM_ABBR.get(program, program.replace(" ", "")[:2])
+    sem_short = "".join(filter(str.isdigit, semester)) or "1"
+    return f"{short_prog}{sem_short}"
+
+
+ROMAN_TO_INT = {
+    "I": 1,
+    "II": 2,
+    "III": 3,
+    "IV": 4,
+    "V": 5,
+    "VI": 6,
+    "VII": 7,
+    "VIII": 8,
+    "IX": 9,
+    "X": 10
+}
+
+INT_TO_ROMAN = {value: key for key, value in ROMAN_TO_INT.items()}
+
+
+def build_semester_name(number):
+    roman = INT_TO_ROMAN.get(number)
+    return f"Semester {roman}" if roman else f"Semester {number}"
+
+
+def sort_semesters(semesters):
+    return sorted(
+        semesters,
+        key=lambda sem: (
+            parse_semester_number(sem) if parse_semester_number(sem) is not None else 999,
+            sem
+        )
+    )
+
+
+def parse_semester_number(semester_name):
+    if not isinstance(semester_name, str):
+        return None
+    digits = re.findall(r"\d+", semester_name)
+    if digits:
+        return int(digits[0])
+    roman_match = re.search(r"\b(I|II|III|IV|V|VI|VII|VIII|IX|X)\b", semester_name.upper())
+    if roman_match:
+        return ROMAN_TO_INT.get(roman_match.group(1), None)
+    return None
+
+
+def semester_parity_matches(semester_name, parity):
+    sem_number = parse_semester_number(semester_name)
+    if sem_number is None:
+        return True
+    if parity == "Odd":
+        return sem_number % 2 == 1
+    return sem_number % 2 == 0
 
 
+def default_hours_for_subject_code(subject_code):
+    if not isinstance(subject_code, str) or not subject_code:
+        return 0
+    code = subject_code.strip().upper()
+    if code.startswith("P"):
+        return 3
+    if code.startswith("L"):
+        return 2
+    return 0
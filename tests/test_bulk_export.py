@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("PIL")
+from utils import bulk_export  # noqa: E402
+
+SLOT = "10.00 - 11.00"
+
+
+def jobs(count, pulled):
+    for i in range(count):
+        pulled.append(i)
+        yield f"page{i}.png", [[SLOT, f"P{i} (RJ)"]], ["Time", "DAY 1"], f"Page {i}"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_pages_keeps_order_and_a_bounded_window(workers):
+    pulled = []
+    pages = bulk_export.render_pages(jobs(12, pulled), workers=workers)
+    name, png = next(pages)
+    assert name == "page0.png" and png.startswith(b"\x89PNG")
+    assert len(pulled) <= 2 * workers + 1
+    assert [name for name, _ in pages] == [f"page{i}.png" for i in range(1, 12)]
+
+
+def test_faculty_grids_follow_the_faculty_view():
+    timetables = {
+        "MSc CS": {
+            "Semester I": [[SLOT, "P1 (RJ)", "P2", "", "", ""]],
+            "Semester II": [[SLOT, "", "P3 (CK)", "", "", ""]],
+        }
+    }
+    subject_faculty_map = {"MSc CS": {"Semester I": {"P2": ["CK"]}}}
+    grids = bulk_export.faculty_grids(timetables, "Odd", subject_faculty_map)
+    assert sorted(grids) == ["CK", "RJ"]
+    assert grids["RJ"][0][1] == "P1 (RJ) [CS1]"
+    assert grids["CK"][0][2] == "P2 (CK) [CS1]"
+    assert bulk_export.faculty_grids(timetables, "Even", subject_faculty_map).keys() == {"CK"}
@@ -0,0 +1,37 @@
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import cli
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for path in (ROOT / "data").glob("*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    return tmp_path
+
+
+def test_validate_does_not_load_the_default_store():
+    code = "import sys, cli; sys.exit('data.master' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
+
+
+@pytest.mark.parametrize("filename", ["timetable.json", "subjects.json"])
+def test_validate_exits_2_on_a_corrupt_file(data_dir, filename, capsys):
+    (data_dir / filename).write_text('{"MSc DFIS": {', encoding="utf-8")
+    assert cli.main(["validate", "--data-dir", str(data_dir)]) == 2
+    assert capsys.readouterr().err.startswith("error:")
+
+
+def test_validate_exits_2_without_a_data_directory(tmp_path):
+    assert cli.main(["validate", "--data-dir", str(tmp_path / "missing")]) == 2
+
+
+def test_validate_reports_issues_in_a_valid_directory(data_dir):
+    assert cli.main(["validate", "--data-dir", str(data_dir), "--json"]) in (0, 1)
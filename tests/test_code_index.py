@@ -0,0 +1,135 @@
+import copy
+import json
+import re
+import shutil
+from pathlib import Path
+
+import pytest
+
+from data import code_index
+from data.master import TimetableStore
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+@pytest.fixture
+def store(tmp_path):
+    for path in DATA_DIR.glob("*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    return TimetableStore(tmp_path)
+
+
+def on_disk(store, filename):
+    with open(store.backend.path(filename), encoding="utf-8") as f:
+        return json.load(f)
+
+
+# The full-scan implementations the index replaced.
+def full_scan_faculty_rename(timetables, subject_faculty_map, old_code, new_code):
+    for semesters in timetables.values():
+        for table in semesters.values():
+            for row_index, row in enumerate(table):
+                for col_index, cell in enumerate(row):
+                    if not isinstance(cell, str) or old_code not in cell:
+                        continue
+                    match = re.search(r"\(([^)]*)\)$", cell)
+                    if not match:
+                        continue
+                    faculty_list = [part.strip() for part in match.group(1).split(",")]
+                    if old_code not in faculty_list:
+                        continue
+                    updated = [new_code if part == old_code else part for part in faculty_list]
+                    row[col_index] = cell[:match.start()] + "(" + ", ".join(updated) + ")"
+    for semesters in subject_faculty_map.values():
+        for mapping in semesters.values():
+            for subject, faculty_list in mapping.items():
+                mapping[subject] = [new_code if code == old_code else code for code in faculty_list]
+
+
+def full_scan_subject_rename(table, old_code, new_code):
+    for row in table:
+        for col_index, cell in enumerate(row):
+            if not isinstance(cell, str) or not cell:
+                continue
+            parts = cell.split(" ", 1)
+            if parts[0] == old_code:
+                row[col_index] = new_code + (" " + parts[1] if len(parts) > 1 else "")
+
+
+def test_faculty_rename_matches_full_scan(store):
+    timetables = copy.deepcopy(store.timetables)
+    subject_faculty_map = copy.deepcopy(store.subject_faculty_map)
+    full_scan_faculty_rename(timetables, subject_faculty_map, "RJ", "RJX")
+
+    changed, affected = code_index.rename({"RJ": "RJX"}, store=store)
+
+    assert changed and affected
+    assert on_disk(store, "timetable.json") == timetables
+    assert on_disk(store, "subject_faculty_map.json") == subject_faculty_map
+    faculties = on_disk(store, "faculties.json")
+    assert "RJX" in faculties and "RJ" not in faculties
+
+
+def test_subject_rename_matches_full_scan(store):
+    program, semester = "MSc DFIS", "Semester II"
+    timetables = copy.deepcopy(store.timetables)
+    full_scan_subject_rename(timetables[program][semester], "P1", "P1X")
+    count = len(store.subjects[program][semester])
+
+    code_index.rename(subjects={(program, semester, "P1"): "P1X"}, store=store)
+
+    assert on_disk(store, "timetable.json") == timetables
+    for filename in code_index.SEMESTER_DOCUMENTS:
+        assert "P1" not in on_disk(store, filename).get(program, {}).get(semester, {})
+    assert "P1X" in on_disk(store, "subject_faculty_map.json")[program][semester]
+    assert len(on_disk(store, "subjects.json")[program][semester]) == count
+
+
+def test_swap_applies_renames_together(store):
+    before = copy.deepcopy(store.subject_faculty_map)
+    code_index.rename({"RJ": "CK", "CK": "RJ"}, store=store)
+    code_index.rename({"RJ": "CK", "CK": "RJ"}, store=store)
+    assert on_disk(store, "subject_faculty_map.json") == before
+
+
+@pytest.mark.parametrize("faculty, subjects", [
+    ({"RJ": "ZZ9", "CK": "ZZ9"}, None),
+    ({"RJ": "CK"}, None),
+    (None, {("MSc DFIS", "Semester II", "P1"): "ZZ9", ("MSc DFIS", "Semester II", "P2"): "ZZ9"}),
+    (None, {("MSc DFIS", "Semester II", "P1"): "P2"}),
+])
+def test_conflicting_renames_change_nothing(store, faculty, subjects):
+    documents = {name: copy.deepcopy(store.load(name)) for name in ("timetable.json", "faculties.json", *code_index.SEMESTER_DOCUMENTS)}
+    with pytest.raises(ValueError):
+        code_index.rename(faculty, subjects, store=store)
+    for name, document in documents.items():
+        assert store.load(name) == document
+
+
+def test_delete_faculty_matches_full_scan(store):
+    subject_faculty_map = copy.deepcopy(store.subject_faculty_map)
+    for semesters in subject_faculty_map.values():
+        for mapping in semesters.values():
+            for subject, faculty_list in mapping.items():
+                mapping[subject] = [code for code in faculty_list if code != "CK"]
+
+    code_index.delete_faculty("CK", store)
+
+    assert on_disk(store, "subject_faculty_map.json") == subject_faculty_map
+    assert "CK" not in on_disk(store, "faculties.json")
+
+
+def test_delete_subject_reports_remaining_cells(store):
+    program, semester = "MSc DFIS", "Semester II"
+    used = code_index.for_store(store).subject_usage(program, semester, "P1")
+    assert code_index.delete_subject(program, semester, "P1", store) == used > 0
+    for filename in code_index.SEMESTER_DOCUMENTS:
+        assert "P1" not in on_disk(store, filename).get(program, {}).get(semester, {})
+
+
+def test_read_renames_expands_subjects_and_reports_bad_rows(store):
+    faculty, subjects = code_index.read_renames(["old,new,kind,program,semester", "RJ,RJX,,,", "P1,P1X,subject,MSc DFIS,"], store)
+    assert faculty == {"RJ": "RJX"}
+    assert subjects and all(key[0] == "MSc DFIS" and key[2] == "P1" for key in subjects)
+    with pytest.raises(ValueError, match="line 2"):
+        code_index.read_renames(["old,new", "NOPE,X"], store)
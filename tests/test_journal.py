@@ -0,0 +1,94 @@
+import copy
+import shutil
+from pathlib import Path
+
+import pytest
+
+from data import journal
+from data.master import JsonFileBackend, TimetableStore
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+PROGRAM, SEMESTER = "MSc DFIS", "Semester II"
+
+
+def journaled_store(path, compact_every=journal.COMPACT_EVERY):
+    backend = journal.JournalBackend(JsonFileBackend(path), path / "journal", compact_every=compact_every)
+    return TimetableStore(backend=backend)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for path in DATA_DIR.glob("*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    return tmp_path
+
+
+def edit_cell(store, row, day, value):
+    timetables = store.timetables
+    timetables[PROGRAM][SEMESTER][row][day] = value
+    store.save("timetable.json", timetables)
+    return copy.deepcopy(timetables)
+
+
+@pytest.mark.parametrize("old, new", [
+    ({"a": [1, 2], "b": {"c": 1}}, {"a": [1, 3], "b": {}, "d": "x"}),
+    ({"a": [1, 2]}, {"a": [1, 2, 3]}),
+    ({}, {"a": {"b": [None]}}),
+])
+def test_diff_apply_invert_round_trip(old, new):
+    ops = journal.diff(old, new)
+    assert journal.apply(copy.deepcopy(old), ops) == new
+    assert journal.apply(copy.deepcopy(new), journal.invert(ops)) == old
+
+
+@pytest.mark.parametrize("compact_every", [200, 3])
+def test_state_at_replays_every_edit(data_dir, compact_every):
+    store = journaled_store(data_dir, compact_every)
+    states = {}
+    for step in range(7):
+        timetables = edit_cell(store, step % 3, 1 + step % 5, f"P{step} (ZZ)")
+        states[store.backend.seq] = timetables
+    assert bool(list((data_dir / "journal").glob("snapshot-*.json"))) == (compact_every < len(states))
+    for seq, timetables in states.items():
+        assert store.backend.state_at(seq)["timetable.json"] == timetables
+    assert journaled_store(data_dir, compact_every).timetables == states[max(states)]
+
+
+def test_undo_and_redo_walk_back_and_forth(data_dir):
+    store = journaled_store(data_dir)
+    original = copy.deepcopy(store.timetables)
+    states = [original] + [edit_cell(store, 0, day, f"P{day} (ZZ)") for day in (1, 2, 3)]
+
+    for expected in reversed(states[:-1]):
+        assert journal.undo(store) is not None
+        assert store.timetables == expected
+    assert journal.undo(store) is None
+
+    for expected in states[1:]:
+        assert journal.redo(store) is not None
+        assert store.timetables == expected
+    assert journal.redo(store) is None
+
+
+def test_a_batch_undoes_as_one_step(data_dir):
+    store = journaled_store(data_dir)
+    timetables = copy.deepcopy(store.timetables)
+    faculties = copy.deepcopy(store.faculties)
+    with store.batch():
+        edit_cell(store, 0, 1, "P9 (ZZ)")
+        store.faculties["ZZ"] = "New Faculty"
+        store.save("faculties.json", store.faculties)
+    journal.undo(store)
+    assert store.timetables == timetables and store.faculties == faculties
+
+
+def test_restore_is_an_undoable_edit(data_dir):
+    store = journaled_store(data_dir)
+    first = edit_cell(store, 0, 1, "P8 (ZZ)")
+    seq = store.backend.seq
+    latest = edit_cell(store, 0, 2, "P9 (ZZ)")
+
+    journal.restore(seq, store)
+    assert store.timetables == first
+    journal.undo(store)
+    assert store.timetables == latest
@@ -0,0 +1,42 @@
+from components import optimizer
+from data.timetable import time_slots
+
+
+def clashing_case():
+    def table(code):
+        return [[time_slots[0], code, "", "", "", ""], [time_slots[1], "", "", "", "", ""]]
+
+    timetables = {"P": {"1": table("C1")}, "Q": {"1": table("D1")}}
+    subject_faculty_map = {"P": {"1": {"C1": "F"}}, "Q": {"1": {"D1": "F"}}}
+    return timetables, subject_faculty_map
+
+
+def test_clash_free_chain_wins_over_a_lower_soft_cost(monkeypatch):
+    timetables, subject_faculty_map = clashing_case()
+    problem = optimizer.Problem(timetables, subject_faculty_map)
+    clashing = [[list(row) for row in grid] for grid in problem.grids]
+    clash_free = [[list(row) for row in grid] for grid in problem.grids]
+    # Move Q's class to Tuesday, away from P's Monday class
+    clash_free[1][0][0], clash_free[1][0][1] = -1, clash_free[1][0][0]
+    results = {
+        0: ((1, 10), clashing, 0, 0),
+        1: ((0, 5000), clash_free, 0, 0),
+    }
+    monkeypatch.setattr(optimizer, "_run_chain", lambda problem, seed, *_: results[seed])
+
+    optimized, report = optimizer.optimize(timetables, subject_faculty_map, workers=1, chains=2)
+
+    assert report["best_chain"] == 1
+    assert report["kept"] == "optimized"
+    assert report["after"]["hard"] == 0
+    assert optimized["Q"]["1"][0][1:3] == ["", "D1"]
+
+
+def test_chain_costs_compare_clashes_first():
+    timetables, subject_faculty_map = clashing_case()
+    chain = optimizer.Chain(optimizer.Problem(timetables, subject_faculty_map), 0)
+    assert chain.cost()[0] == chain.breakdown()["hard"] == 1
+
+    best, grids = chain.run(max_moves=200)
+    assert best[0] == 0
+    assert best <= chain.cost()
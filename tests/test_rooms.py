@@ -0,0 +1,61 @@
+import random
+
+from components.rooms import RoomIndex, apply_assignments, assign_rooms
+from data.timetable import time_slots
+
+
+def random_case(seed):
+    rng = random.Random(seed)
+    semesters = rng.randint(3, 12)
+    rooms = {f"R{i}": {"capacity": rng.choice([30, 50, 80, 100])} for i in range(rng.randint(2, 6))}
+    timetables = {"P": {}}
+    semester_metadata = {"P": {}}
+    for number in range(semesters):
+        table = [[slot, "", "", "", "", ""] for slot in time_slots[:2]]
+        for row in table:
+            for day_idx in range(1, 3):
+                if rng.random() < 0.7:
+                    row[day_idx] = f"C{number}"
+        timetables["P"][f"S{number}"] = table
+        semester_metadata["P"][f"S{number}"] = {
+            "students": rng.choice([20, 30, 40, 50, 60, 80, 100]),
+            "room_number": rng.choice(list(rooms) + [""]),
+        }
+    return timetables, semester_metadata, rooms
+
+
+def unexplained_clashes(seed):
+    timetables, semester_metadata, rooms = random_case(seed)
+    index = RoomIndex()
+    index.bind(timetables, semester_metadata, {})
+    assignments, unplaced = assign_rooms(index, rooms)
+    apply_assignments(semester_metadata, assignments)
+
+    checked = RoomIndex()
+    checked.bind(timetables, semester_metadata, {})
+    unplaced = set(unplaced)
+    return [
+        clash for clash in checked.clashes()
+        if (clash["program1"], clash["semester1"], f"{clash['day']} {clash['time']}") not in unplaced
+        and (clash["program2"], clash["semester2"], f"{clash['day']} {clash['time']}") not in unplaced
+    ]
+
+
+def test_augmenting_path_does_not_double_book_a_free_room():
+    # An augmenting path moved a semester into a room that a later semester then also took.
+    assert unexplained_clashes(4566) == []
+
+
+def test_assignment_leaves_only_unplaced_clashes():
+    for seed in range(5000):
+        assert unexplained_clashes(seed) == [], seed
+
+
+def test_everything_fits_with_enough_rooms():
+    timetables, semester_metadata, _ = random_case(1)
+    rooms = {f"R{i}": {"capacity": 100} for i in range(len(semester_metadata["P"]))}
+    index = RoomIndex()
+    index.bind(timetables, semester_metadata, {})
+    assignments, unplaced = assign_rooms(index, rooms)
+    assert unplaced == []
+    assert all(not item["room_overrides"] for item in assignments.values())
@@ -0,0 +1,107 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from components.occupancy import OccupancyIndex
+from data import scenarios
+from data.master import TimetableStore
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+PROGRAM, SEMESTER = "MSc DFIS", "Semester II"
+
+
+@pytest.fixture
+def store(tmp_path):
+    for path in DATA_DIR.glob("*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    return TimetableStore(tmp_path)
+
+
+def edit_live(store, row, day, value):
+    timetables = store.timetables
+    timetables[PROGRAM][SEMESTER][row][day] = value
+    store.save("timetable.json", timetables)
+
+
+def test_overlay_copies_only_edited_rows(store):
+    scenario = scenarios.load("Plan B", store)
+    scenario.set(PROGRAM, SEMESTER, 1, 2, "P9 (ZZ)")
+    overlay = scenario.timetables()
+    live = store.timetables
+    edited = overlay[PROGRAM][SEMESTER]
+    assert edited[1][2] == "P9 (ZZ)" and live[PROGRAM][SEMESTER][1][2] != "P9 (ZZ)"
+    assert edited[0] is live[PROGRAM][SEMESTER][0]
+    assert all(overlay[program] is live[program] for program in live if program != PROGRAM)
+    assert overlay[PROGRAM]["Semester I"] is live[PROGRAM]["Semester I"]
+
+    scenario.set(PROGRAM, SEMESTER, 1, 2, live[PROGRAM][SEMESTER][1][2])
+    assert scenario.edit_count() == 0 and scenario.timetables()[PROGRAM] is live[PROGRAM]
+
+
+def test_save_and_load_round_trip(store):
+    scenario = scenarios.load("Plan B", store)
+    scenario.set(PROGRAM, SEMESTER, 1, 2, "P9 (ZZ)")
+    scenarios.save(scenario, store)
+    scenarios.fork(scenario, "Plan C", store)
+    assert scenarios.names(store) == ["Plan B", "Plan C"]
+    assert scenarios.load("Plan C", store).diff() == scenario.diff()
+
+
+def test_merge_writes_edits_and_drops_the_scenario(store):
+    scenario = scenarios.load("Plan B", store)
+    scenario.set(PROGRAM, SEMESTER, 1, 2, "P9 (ZZ)")
+    scenarios.save(scenario, store)
+    merged, conflicts = scenarios.merge(scenario, store)
+    assert merged == [(PROGRAM, SEMESTER)] and conflicts == []
+    assert store.timetables[PROGRAM][SEMESTER][1][2] == "P9 (ZZ)"
+    assert scenarios.names(store) == []
+
+
+def test_merge_refuses_cells_changed_live_since_the_edit(store):
+    scenario = scenarios.load("Plan B", store)
+    scenario.set(PROGRAM, SEMESTER, 1, 2, "P9 (ZZ)")
+    scenario.set(PROGRAM, SEMESTER, 2, 3, "P8 (ZZ)")
+    scenarios.save(scenario, store)
+    edit_live(store, 1, 2, "P7 (YY)")
+
+    scenario = scenarios.load("Plan B", store)
+    merged, conflicts = scenarios.merge(scenario, store)
+    assert merged == []
+    assert [change[:4] for change in conflicts] == [(PROGRAM, SEMESTER, 1, 2)]
+    assert conflicts[0][4:] == ("P7 (YY)", "P9 (ZZ)", True)
+    assert store.timetables[PROGRAM][SEMESTER][2][3] != "P8 (ZZ)"
+    assert scenarios.names(store) == ["Plan B"]
+
+    merged, conflicts = scenarios.merge(scenario, store, force=True)
+    assert merged == [(PROGRAM, SEMESTER)] and len(conflicts) == 1
+    assert store.timetables[PROGRAM][SEMESTER][1][2] == "P9 (ZZ)"
+    assert store.timetables[PROGRAM][SEMESTER][2][3] == "P8 (ZZ)"
+
+
+def test_live_change_to_the_same_value_is_not_a_conflict(store):
+    scenario = scenarios.load("Plan B", store)
+    scenario.set(PROGRAM, SEMESTER, 1, 2, "P9 (ZZ)")
+    scenarios.save(scenario, store)
+    edit_live(store, 1, 2, "P9 (ZZ)")
+    scenario = scenarios.load("Plan B", store)
+    assert scenario.diff() == [] and scenario.conflicts() == []
+
+
+def test_copied_index_matches_a_full_rebuild(store):
+    live = OccupancyIndex()
+    live.bind(store.timetables, store.subject_faculty_map, store.subject_metadata)
+    before = live.clashes()
+    scenario = scenarios.load("Plan B", store)
+    scenario.set(PROGRAM, SEMESTER, 0, 1, store.timetables[PROGRAM]["Semester I"][0][1])
+    scenario.set(PROGRAM, SEMESTER, 1, 2, "P9 (RJ)")
+    scenario.set(PROGRAM, SEMESTER, 2, 3, "")
+
+    overlay = scenario.timetables()
+    index = live.copy(overlay)
+    for program, semester in scenario.edits:
+        index.update_cells(program, semester, store.timetables[program][semester])
+    rebuilt = OccupancyIndex()
+    rebuilt.bind(overlay, store.subject_faculty_map, store.subject_metadata)
+    assert index.clashes() == rebuilt.clashes()
+    assert live.clashes() == before
@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from components.faculty_index import FacultyIndex, QueryFacultyIndex
+from components.occupancy import OccupancyIndex
+from data import sqlite_backend
+from data.assignments import ResolvedAssignments
+from data.master import JsonFileBackend, TimetableStore
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+SLOT = "10.00 - 11.00"
+
+
+@pytest.fixture
+def store(tmp_path):
+    sqlite_backend.import_json(tmp_path / "timetable.db", DATA_DIR)
+    store = TimetableStore(backend=sqlite_backend.SqliteBackend(tmp_path / "timetable.db"))
+    yield store
+    store.backend.close()
+
+
+def key(assignment):
+    return tuple(assignment[:6]) + (assignment.source,)
+
+
+def test_empty_rows_survive_a_round_trip(tmp_path):
+    backend = sqlite_backend.SqliteBackend(tmp_path / "t.db")
+    data = {"A": {"1": [[], ["9-10", "X"], [], []], "2": []}}
+    backend.write_many([("timetable.json", data, json.dumps(data).encode())])
+    assert backend.read("timetable.json")[0] == data
+
+
+def test_queries_match_the_resolved_assignments(store):
+    resolved = ResolvedAssignments(store.timetables, store.subject_faculty_map)
+    assert store.backend.faculty_load() == dict(resolved.faculty_load())
+    for faculty, entries in resolved.by_faculty.items():
+        assert [key(entry) for entry in store.backend.faculty_cells(faculty)] == [key(entry) for entry in entries]
+
+
+def test_map_fallback_applies_only_to_classes_without_faculty(tmp_path):
+    store = TimetableStore(backend=sqlite_backend.SqliteBackend(tmp_path / "t.db"))
+    store.save("timetable.json", {"MSc CS": {"Semester I": [[SLOT, "P1 (RJ)", "P1", "Lunch break", "P2 (CK, RJ)", ""]]}})
+    store.save("subject_faculty_map.json", {"MSc CS": {"Semester I": {"P1": ["HP"], "Lunch": ["HP"]}}})
+    assert store.backend.faculty_load() == {"RJ": 2, "HP": 1, "CK": 1}
+    assert [(entry.day, entry.source) for entry in store.backend.faculty_cells("RJ")] == [(1, "cell"), (4, "cell")]
+    assert [(entry.day, entry.source) for entry in store.backend.faculty_cells("HP")] == [(2, "map")]
+    assert {row[0] for row in store.backend.slot_cells(4, SLOT)} == {"CK", "RJ"}
+
+
+@pytest.mark.parametrize("parity", [None, "Odd", "Even"])
+def test_contended_slots_give_the_same_clashes(store, parity):
+    args = store.timetables, store.subject_faculty_map, store.subject_metadata
+    full = OccupancyIndex()
+    full.bind(*args)
+    queried = OccupancyIndex.from_slots(*args, store.backend.contended_slots())
+    assert queried.clashes(parity) == full.clashes(parity)
+
+
+def test_faculty_index_uses_queries_on_sqlite_only(store):
+    index = FacultyIndex.for_store(store)
+    assert isinstance(index, QueryFacultyIndex)
+    json_index = FacultyIndex.for_store(TimetableStore(backend=JsonFileBackend(DATA_DIR)))
+    assert type(json_index) is FacultyIndex
+    assert index.faculty_codes() == json_index.faculty_codes()
+    for faculty in index.faculty_codes():
+        assert index.consolidated(faculty) == json_index.consolidated(faculty)
+        assert index.program_tables(faculty) == json_index.program_tables(faculty)
+        assert index.load_summary(faculty) == json_index.load_summary(faculty)
+
+
+def test_queries_see_pending_saves(store):
+    store = TimetableStore(backend=store.backend, flush_delay=60)
+    timetables = store.timetables
+    timetables["MSc DFIS"]["Semester II"][0][1] = "P1 (ZZ)"
+    store.save("timetable.json", timetables)
+    assert "ZZ" not in store.backend.faculty_load()
+    assert sqlite_backend.queries(store) is store.backend
+    assert store.backend.faculty_load()["ZZ"] == 1
+    assert sqlite_backend.queries(TimetableStore(backend=JsonFileBackend(DATA_DIR))) is None
@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from components.occupancy import OccupancyIndex
+
+np = pytest.importorskip("numpy")
+from data import tensor  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+SLOT = "10.00 - 11.00"
+
+
+def load(name):
+    with open(DATA_DIR / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def two_semesters(first, second, common=()):
+    """Two programs with one class each at the same slot, plus metadata marking ``common`` codes."""
+    timetables = {
+        "MSc A": {"Semester I": [[SLOT, first, "", "", "", ""]]},
+        "MSc B": {"Semester I": [[SLOT, second, "", "", "", ""]]},
+    }
+    metadata = {program: {"Semester I": {code: {"is_common": True} for code in common}} for program in timetables}
+    return timetables, metadata
+
+
+def occupancy_clashes(timetables, subject_faculty_map, subject_metadata):
+    index = OccupancyIndex()
+    index.bind(timetables, subject_faculty_map, subject_metadata)
+    return {(clash["faculty"], clash["time"]) for clash in index.clashes()}
+
+
+@pytest.mark.parametrize("first, second, common, clash", [
+    ("P1 (RJ)", "P2 (RJ)", (), True),
+    ("P1 (RJ)", "P1 (RJ)", ("P1",), False),
+    ("P1 (RJ)", "P2 (RJ)", ("P1",), True),
+])
+def test_common_subjects_are_not_clashes(first, second, common, clash):
+    timetables, metadata = two_semesters(first, second, common)
+    built = tensor.build_tensor(timetables, subject_metadata=metadata)
+    assert tensor.clash_slots(built) == ([("RJ", 1, SLOT)] if clash else [])
+    assert int(tensor.clash_counts(built.faculty_counts, built.common_counts).sum()) == clash
+    assert bool(occupancy_clashes(timetables, {}, metadata)) == clash
+
+
+def test_clash_slots_match_the_occupancy_index():
+    timetables = load("timetable.json")
+    subject_faculty_map = load("subject_faculty_map.json")
+    subject_metadata = load("subject_metadata.json")
+    built = tensor.build_tensor(timetables, subject_faculty_map, subject_metadata=subject_metadata)
+    assert {(faculty, time) for faculty, _, time in tensor.clash_slots(built)} == occupancy_clashes(
+        timetables, subject_faculty_map, subject_metadata
+    )
+
+
+def test_stacked_counts_keep_the_common_mask():
+    vocab = tensor.new_vocabularies()
+    clashing = tensor.build_tensor(two_semesters("P1 (RJ)", "P2 (RJ)")[0], vocab=vocab)
+    timetables, metadata = two_semesters("P1 (RJ)", "P1 (RJ)", ("P1",))
+    shared = tensor.build_tensor(timetables, vocab=vocab, subject_metadata=metadata)
+    _, counts, common = tensor.stack([clashing, shared])
+    assert tensor.clash_counts(counts, common).sum(axis=-1).tolist() == [1, 0]
+
+
+def python_subject_counts(table):
+    from components import viewer
+
+    return dict(viewer.subject_summary(table))  # without program/semester it is the parse_cell loop
+
+
+def test_subject_counts_match_the_python_loop():
+    from data.master import JsonFileBackend, TimetableStore
+
+    store = TimetableStore(backend=JsonFileBackend(DATA_DIR))
+    built = tensor.for_store(store)
+    assert tensor.for_store(store) is built
+    for program, semesters in store.timetables.items():
+        for semester, table in semesters.items():
+            assert tensor.subject_counts(built, program, semester) == python_subject_counts(table)
+
+
+def test_viewer_summary_uses_the_tensor_for_store_grids(monkeypatch):
+    from components import viewer
+
+    calls = []
+    original = tensor.subject_counts
+    monkeypatch.setattr(tensor, "subject_counts", lambda *args: calls.append(args[1:]) or original(*args))
+    program = next(iter(viewer.store.timetables))
+    semester, table = next(iter(viewer.store.timetables[program].items()))
+    assert dict(viewer.subject_summary(table, program, semester)) == python_subject_counts(table)
+    assert calls == [(program, semester)]
+
+    # A copy of the grid, or one with a repeated time slot, takes the loop
+    wide = [list(row) + ["P9 (ZZ)"] for row in table] + [list(table[0])]
+    assert dict(viewer.subject_summary(wide, program, semester)) == python_subject_counts(wide)
+    assert len(calls) == 1
@@ -0,0 +1,186 @@
+"""Render every program/semester and faculty timetable in one pass, either as
+a ZIP of PNGs or as a multi-page PDF.
+
+    python -m utils.bulk_export timetables.pdf
+    python -m utils.bulk_export timetables.zip --parity even --workers 4
+"""
+import argparse
+import io
+import os
+import re
+import sys
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from data.assignments import ResolvedAssignments
+from data.timetable import days, semester_parity_matches, sort_semesters
+from utils.image_exporter import CELL_FONT_SIZE, TITLE_FONT_SIZE, load_font, render_table
+
+FORMATS = ("pdf", "zip")
+PDF_RESOLUTION = 100.0
+
+
+# ------------------ Tables ------------------
+def safe_name(text):
+    return re.sub(r"[^\w.-]+", "_", str(text)).strip("_") or "table"
+
+
+def program_tables(timetables, semester_metadata=None, parity=None):
+    """Yield (name, rows, columns, title) per program/semester, as the viewer shows them."""
+    semester_metadata = semester_metadata or {}
+    for program in sorted(timetables):
+        for semester in sort_semesters(timetables[program]):
+            table = timetables[program][semester]
+            if not isinstance(table, list) or not table:
+                continue
+            if parity is not None and not semester_parity_matches(semester, parity):
+                continue
+            columns = ["Time"] + [f"DAY {i+1}" for i in range(len(table[0]) - 1)]
+            title = f"{program} - {semester}"
+            room_number = semester_metadata.get(program, {}).get(semester, {}).get("room_number", "")
+            if room_number:
+                title += f"\nRoom {room_number}"
+            yield f"programs/{safe_name(program)}_{safe_name(semester)}.png", table, columns, title
+
+
+def faculty_grids(timetables, parity=None, subject_faculty_map=None, index=None):
+    """Consolidated grid per faculty code, as the faculty view shows it.
+
+    Pass the ``FacultyIndex`` of the store (``FacultyIndex.for_store``) to
+    reuse it; otherwise one is built for ``timetables``.
+    """
+    from components.faculty_index import FacultyIndex
+
+    if index is None:
+        index = FacultyIndex(timetables, ResolvedAssignments(timetables, subject_faculty_map or {}))
+    return {
+        faculty_code: index.consolidated(faculty_code, parity)
+        for faculty_code in index.faculty_codes()
+        if parity is None or any(semester_parity_matches(entry.semester, parity) for entry in index.entries_for(faculty_code))
+    }
+
+
+def faculty_tables(timetables, faculties=None, parity=None, subject_faculty_map=None, index=None):
+    """Yield (name, rows, columns, title) per faculty that teaches at least one slot."""
+    faculties = faculties or {}
+    grids = faculty_grids(timetables, parity, subject_faculty_map, index)
+    for faculty_code in sorted(grids):
+        title = f"Consolidated Timetable for {faculty_code}"
+        if faculties.get(faculty_code):
+            title += f"\n{faculties[faculty_code]}"
+        yield f"faculty/{safe_name(faculty_code)}.png", grids[faculty_code], days, title
+
+
+def all_tables(timetables, semester_metadata=None, faculties=None, parity=None, include_faculty=True,
+               subject_faculty_map=None, faculty_index=None):
+    yield from program_tables(timetables, semester_metadata, parity)
+    if include_faculty:
+        yield from faculty_tables(timetables, faculties, parity, subject_faculty_map, faculty_index)
+
+
+# ------------------ Rendering ------------------
+def _init_worker():
+    # Fonts are cached per process; load them once before the first page
+    load_font(TITLE_FONT_SIZE)
+    load_font(CELL_FONT_SIZE)
+
+
+def _render_page(job):
+    name, rows, columns, title = job
+    buf = io.BytesIO()
+    render_table(rows, columns, title).save(buf, format="PNG")
+    return name, buf.getvalue()
+
+
+def render_pages(tables, workers=None):
+    """Yield (name, png_bytes) in table order.
+
+    With more than one worker the pages are rendered in a process pool. Jobs
+    are submitted as pages are consumed, so at most ``2 * workers`` pages are
+    queued or waiting in memory at any time.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    _init_worker()
+    if workers <= 1:
+        for job in tables:
+            yield _render_page(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        pending = deque()
+        for job in tables:
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            pending.append(executor.submit(_render_page, job))
+        while pending:
+            yield pending.popleft().result()
+
+
+# ------------------ Writers ------------------
+def export_zip(output, tables, workers=None):
+    """Write PNGs into ``output`` (path or binary file object) as they are rendered."""
+    count = 0
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, png in render_pages(tables, workers):
+            # PNG data is already compressed
+            archive.writestr(name, png, compress_type=zipfile.ZIP_STORED)
+            count += 1
+    return count
+
+
+def export_pdf(output_path, tables, workers=None):
+    """Append one page per table to the PDF at ``output_path``."""
+    from PIL import Image
+
+    count = 0
+    for _, png in render_pages(tables, workers):
+        with Image.open(io.BytesIO(png)) as page:
+            page.convert("RGB").save(output_path, "PDF", resolution=PDF_RESOLUTION, append=count > 0)
+        count += 1
+    if not count:
+        Image.new("RGB", (1, 1), "white").save(output_path, "PDF", resolution=PDF_RESOLUTION)
+    return count
+
+
+def export(output_path, fmt, tables, workers=None):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}.")
+    if fmt == "zip":
+        return export_zip(output_path, tables, workers)
+    return export_pdf(output_path, tables, workers)
+
+
+# ------------------ CLI ------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.bulk_export", description="Export all timetables as one PDF or ZIP.")
+    parser.add_argument("output", help="Output file; the format follows the extension unless --format is given.")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--parity", type=str.capitalize, choices=["Odd", "Even"], help="Only export odd or even semesters.")
+    parser.add_argument("--no-faculty", action="store_true", help="Skip the per-faculty timetables.")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: CPU count).")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        parser.error("cannot infer the format from the output name; pass --format pdf|zip")
+
+    from components.faculty_index import FacultyIndex
+    from data.master import store
+
+    tables = all_tables(
+        store.timetables,
+        store.semester_metadata,
+        store.faculties,
+        parity=args.parity,
+        include_faculty=not args.no_faculty,
+        subject_faculty_map=store.subject_faculty_map,
+        faculty_index=FacultyIndex.for_store(store),
+    )
+    count = export(args.output, fmt, tables, args.workers)
+    print(f"Wrote {count} timetables to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
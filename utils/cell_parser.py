@@ -0,0 +1,93 @@
+import re
+from functools import lru_cache
+
+# Cell kinds
+CLASS = "class"
+LUNCH = "lunch"
+LIBRARY = "library"
+EMPTY = "empty"
+
+CACHE_SIZE = 8192
+
+_CODE = re.compile(r"[^\s(]+")
+_FACULTY_GROUP = re.compile(r"\(([^)]*)\)")
+_FACULTY_SPLIT = re.compile(r"\s*,\s*")
+_LUNCH = re.compile(r"lunch", re.IGNORECASE)
+_LIBRARY = re.compile(r"library", re.IGNORECASE)
+
+
+class Cell:
+    """Parsed timetable cell, e.g. ``"L2 (RJ, CK)"`` -> code ``L2``, faculty ``("RJ", "CK")``."""
+
+    __slots__ = ("raw", "code", "faculty", "kind")
+
+    def __init__(self, raw, code="", faculty=(), kind=EMPTY):
+        self.raw = raw
+        self.code = code
+        self.faculty = faculty
+        self.kind = kind
+
+    @property
+    def is_class(self):
+        return self.kind == CLASS
+
+    def __repr__(self):
+        return f"Cell({self.raw!r}, code={self.code!r}, faculty={self.faculty!r}, kind={self.kind!r})"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse(raw):
+    text = raw.strip()
+    if not text:
+        return Cell(raw)
+    if _LUNCH.search(text):
+        return Cell(raw, kind=LUNCH)
+    if _LIBRARY.search(text):
+        return Cell(raw, kind=LIBRARY)
+
+    faculty = []
+    for group in _FACULTY_GROUP.findall(text):
+        for code in _FACULTY_SPLIT.split(group.strip()):
+            if code and code not in faculty:
+                faculty.append(code)
+    code = _CODE.match(text)
+    return Cell(raw, code.group(0) if code else "", tuple(faculty), CLASS)
+
+
+def parse_cell(cell):
+    if cell is None or cell != cell:  # None or NaN from the grid editor
+        cell = ""
+    elif not isinstance(cell, str):
+        cell = str(cell)
+    return _parse(cell)
+
+
+def rename_codes(raw, subjects=None, faculty=None):
+    """Cell text with its subject code and faculty codes mapped through ``{old: new}`` dicts.
+
+    Only a faculty group that names a renamed code is rewritten (as
+    ``(A, B)``); everything else in the cell is kept as typed.
+    """
+    if not isinstance(raw, str):
+        return raw
+    if subjects:
+        code = _CODE.match(raw, len(raw) - len(raw.lstrip()))
+        if code and code.group(0) in subjects:
+            raw = raw[:code.start()] + subjects[code.group(0)] + raw[code.end():]
+    if faculty:
+        def rename_group(group):
+            codes = [code for code in _FACULTY_SPLIT.split(group.group(1).strip()) if code]
+            if not any(code in faculty for code in codes):
+                return group.group(0)
+            renamed = []
+            for code in codes:
+                code = faculty.get(code, code)
+                if code not in renamed:
+                    renamed.append(code)
+            return "(" + ", ".join(renamed) + ")"
+        raw = _FACULTY_GROUP.sub(rename_group, raw)
+    return raw
+
+
+def cache_info():
+    return _parse.cache_info()
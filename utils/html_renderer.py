@@ -0,0 +1,130 @@
+"""HTML tables for the viewer and faculty view.
+
+Cells carry CSS classes instead of inline styles; the stylesheet is sent
+once per page by ``inject_styles``. Finished tables are memoized by a
+caller-supplied key that should include ``store.version``, so reruns that
+do not change the data reuse the same string.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from html import escape
+
+from utils import profiler
+from utils.cell_parser import CLASS, LIBRARY, LUNCH, parse_cell
+from utils.image_exporter import DEFAULT_SUBJECT_COLOR, subject_colors
+
+HTML_CACHE_SIZE = 256
+
+STYLESHEET = "".join([
+    "<style>",
+    ".tt-table{border-collapse:collapse;width:100%;text-align:center;}",
+    ".tt-table th{background:#333;color:#fff;padding:6px;border:1px solid #999;}",
+    ".tt-table td{padding:6px;border:1px solid #999;font-weight:bold;}",
+    ".tt-table td.tt-empty{font-weight:normal;}",
+    ".tt-time{background:#f1f1f1;}",
+    ".tt-lunch{background:#dcdcdc;}",
+    ".tt-library{background:#f2f2f2;}",
+    f".tt-class{{background:{DEFAULT_SUBJECT_COLOR};}}",
+    "".join(f".tt-s-{code}{{background:{color};}}" for code, color in subject_colors.items()),
+    ".tt-table td.tt-unavailable{background:repeating-linear-gradient(45deg,#eee,#eee 6px,#d5d5d5 6px,#d5d5d5 12px);}",
+    ".tt-table td.tt-conflict{outline:3px solid #c62828;outline-offset:-3px;}",
+    ".tt-summary{font-family:Arial,sans-serif;text-align:left;}",
+    ".tt-summary th,.tt-summary td{padding:10px;}",
+    ".tt-summary td{font-weight:normal;}",
+    ".tt-summary td.tt-code{font-weight:bold;}",
+    ".tt-summary .tt-num{text-align:right;}",
+    "</style>",
+])
+
+_html_cache = OrderedDict()
+_html_cache_lock = threading.Lock()
+
+
+def inject_styles():
+    import streamlit as st
+
+    st.markdown(STYLESHEET, unsafe_allow_html=True)
+
+
+def subject_class(code):
+    return f"tt-class tt-s-{code}" if code in subject_colors else "tt-class"
+
+
+# ------------------ Fragments ------------------
+@lru_cache(maxsize=8192)
+def cell_html(raw, suffix="", unavailable=False):
+    """``unavailable`` shades a free cell and outlines a class taught in it."""
+    cell = parse_cell(raw)
+    text = escape(str(raw).strip())
+    if cell.kind == LUNCH:
+        return f"<td class='tt-lunch'>{text}</td>"
+    if cell.kind == LIBRARY:
+        return f"<td class='tt-library'>{text}</td>"
+    if cell.kind == CLASS:
+        conflict = " tt-conflict" if unavailable else ""
+        return f"<td class='{subject_class(cell.code)}{conflict}'>{text}{escape(suffix)}</td>"
+    return "<td class='tt-empty tt-unavailable'></td>" if unavailable else "<td class='tt-empty'></td>"
+
+
+def header_html(columns):
+    return "<tr>" + "".join(f"<th>{escape(str(col))}</th>" for col in columns) + "</tr>"
+
+
+def row_html(row, suffixes=None, unavailable_days=()):
+    suffixes = suffixes or {}
+    fragments = [f"<td class='tt-time'>{escape(str(row[0]).strip())}</td>"] if row else []
+    for day_idx, raw in enumerate(row[1:], start=1):
+        cell = parse_cell(raw)
+        # Faculty written in the cell take precedence over the map (see data.assignments)
+        suffix = "" if cell.faculty else suffixes.get(cell.code, "")
+        fragments.append(cell_html(raw, suffix, day_idx in unavailable_days))
+    return "<tr>" + "".join(fragments) + "</tr>"
+
+
+# ------------------ Tables ------------------
+def timetable_html(rows, columns, faculty_map=None, unavailable=None):
+    """Grid with the first column as time; ``faculty_map`` ({code: [faculty]})
+    appends ``(A,B)`` to class cells that do not name their own faculty and
+    ``unavailable`` ({row_idx: {day_idx}}) marks slots a faculty cannot teach."""
+    suffixes = {
+        code: " (" + ",".join(faculty_list) + ")"
+        for code, faculty_list in (faculty_map or {}).items()
+        if faculty_list
+    }
+    unavailable = unavailable or {}
+    body = "".join(row_html(list(row), suffixes, unavailable.get(i, ())) for i, row in enumerate(rows))
+    return f"<table class='tt-table'>{header_html(columns)}{body}</table>"
+
+
+def summary_html(summary, subject_names):
+    """Classes per week per subject code, most frequent first."""
+    rows = []
+    for code, count in sorted(summary.items(), key=lambda item: (-item[1], item[0])):
+        rows.append(
+            f"<tr class='{subject_class(code)}'>"
+            f"<td class='tt-code'>{escape(code)}</td>"
+            f"<td>{escape(str(subject_names.get(code, 'Unknown Subject')))}</td>"
+            f"<td class='tt-num'>{count}</td>"
+            "</tr>"
+        )
+    return (
+        "<table class='tt-table tt-summary'>"
+        "<tr><th>Code</th><th>Subject</th><th class='tt-num'>Classes / Week</th></tr>"
+        f"{''.join(rows)}</table>"
+    )
+
+
+def cached_html(key, build):
+    """Return ``build()`` memoized under ``key``, e.g. ("timetable", program, semester, store.version)."""
+    with _html_cache_lock:
+        if key in _html_cache:
+            _html_cache.move_to_end(key)
+            return _html_cache[key]
+    with profiler.span(f"html {key[0]}"):
+        html = build()
+    with _html_cache_lock:
+        _html_cache[key] = html
+        while len(_html_cache) > HTML_CACHE_SIZE:
+            _html_cache.popitem(last=False)
+    return html
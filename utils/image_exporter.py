@@ -1,6 +1,16 @@
-from PIL import Image, ImageDraw, ImageFont
-import pandas as pd
+import hashlib
 import io
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from utils import profiler
+from utils.cell_parser import CLASS, LIBRARY, LUNCH, parse_cell
+
+if TYPE_CHECKING:  # PIL and pandas are imported on first render
+    import pandas as pd
+    from PIL import Image
 
 # Same colors from viewer
 subject_colors = {
@@ -11,72 +21,141 @@ subject_colors = {
 
 DEFAULT_SUBJECT_COLOR = "#eef"
 
+CELL_WIDTH = 220
+CELL_HEIGHT = 70
+TITLE_FONT_SIZE = 28
+CELL_FONT_SIZE = 20
+PADDING = 12
+HEADER_COLOR = "#cccccc"
+
+IMAGE_CACHE_SIZE = 64
+
+_image_cache = OrderedDict()
+_image_cache_lock = threading.Lock()
+
+
 def get_cell_color(content: str) -> str:
-    content = content.strip()
-    if "Lunch" in content:
+    cell = parse_cell(content)
+    if cell.kind == LUNCH:
         return "#dcdcdc"
-    elif "Library" in content:
+    elif cell.kind == LIBRARY:
         return "#f2f2f2"
-    elif content:
-        code = content.split()[0]
-        return subject_colors.get(code, DEFAULT_SUBJECT_COLOR)
+    elif cell.kind == CLASS:
+        return subject_colors.get(cell.code, DEFAULT_SUBJECT_COLOR)
     return "#ffffff"
 
-def generate_table_image(data: pd.DataFrame, title: str) -> io.BytesIO:
-    cell_width = 220
-    cell_height = 70
-    title_font_size = 28
-    cell_font_size = 20
-    padding = 12
 
-    rows, cols = data.shape
-    title_lines = [line.strip() for line in title.split("\n") if line.strip()]
+@lru_cache(maxsize=None)
+def load_font(size: int):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except IOError:
+        return ImageFont.load_default()
+
+
+def table_digest(rows: list, columns: list, title: str) -> str:
+    payload = json.dumps([title, [str(c) for c in columns], rows], default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
 
+def render_table(rows: list, columns: list, title: str) -> "Image.Image":
+    from PIL import Image, ImageDraw
+
+    title_font = load_font(TITLE_FONT_SIZE)
+    cell_font = load_font(CELL_FONT_SIZE)
+
+    cols = len(columns)
+    title_lines = [line.strip() for line in title.split("\n") if line.strip()]
+    width = CELL_WIDTH * cols
     image = Image.new(
         "RGB",
-        (cell_width * cols, cell_height * (rows + 1) + padding * 4 + title_font_size * len(title_lines)),
+        (width, CELL_HEIGHT * (len(rows) + 1) + PADDING * 4 + TITLE_FONT_SIZE * len(title_lines)),
         "white"
     )
     draw = ImageDraw.Draw(image)
 
-    try:
-        title_font = ImageFont.truetype("arial.ttf", title_font_size)
-        cell_font = ImageFont.truetype("arial.ttf", cell_font_size)
-    except IOError:
-        title_font = ImageFont.load_default()
-        cell_font = ImageFont.load_default()
-
     # Title
-    title_height = padding
-    line_height = title_font_size + 8
+    title_height = PADDING
+    line_height = TITLE_FONT_SIZE + 8
     for idx, line in enumerate(title_lines):
         try:
             text_width = draw.textlength(line, font=title_font)
         except AttributeError:
             text_width = draw.textsize(line, font=title_font)[0]
-        x = max((image.width - text_width) / 2, padding)
+        x = max((image.width - text_width) / 2, PADDING)
         y = title_height + idx * line_height
         draw.text((x, y), line, fill="black", font=title_font)
     title_height += len(title_lines) * line_height
-    title_height += padding
-
-    # Header
-    for j, col in enumerate(data.columns):
-        x = j * cell_width
-        y = title_height
-        draw.rectangle([x, y, x + cell_width, y + cell_height], outline="black", fill="#cccccc")
-        draw.text((x + padding, y + padding), str(col), fill="black", font=cell_font)
-
-    # Table cells
-    for i, row in data.iterrows():
-        for j, cell in enumerate(row):
-            x = j * cell_width
-            y = title_height + cell_height + i * cell_height
-            bg_color = get_cell_color(str(cell))
-            draw.rectangle([x, y, x + cell_width, y + cell_height], outline="black", fill=bg_color)
-            draw.text((x + padding, y + padding), str(cell), fill="black", font=cell_font)
-
-    buf = io.BytesIO()
-    image.save(buf, format="PNG")
-    buf.seek(0)
-    return buf
+    title_height += PADDING
+
+    # Backgrounds: one rectangle per run of same-coloured cells in a row
+    grid = [[str(col) for col in columns]] + [[str(cell) for cell in row] for row in rows]
+    colors = [[HEADER_COLOR] * cols] + [[get_cell_color(cell) for cell in row] for row in grid[1:]]
+    for i, row_colors in enumerate(colors):
+        y = title_height + i * CELL_HEIGHT
+        start = 0
+        for j in range(1, len(row_colors) + 1):
+            if j == len(row_colors) or row_colors[j] != row_colors[start]:
+                if row_colors[start] != "#ffffff":
+                    draw.rectangle([start * CELL_WIDTH, y, j * CELL_WIDTH, y + CELL_HEIGHT], fill=row_colors[start])
+                start = j
+
+    # Grid lines, drawn once for the whole table
+    bottom = title_height + len(grid) * CELL_HEIGHT
+    for i in range(len(grid) + 1):
+        y = title_height + i * CELL_HEIGHT
+        draw.line([(0, y), (cols * CELL_WIDTH, y)], fill="black")
+    for j in range(cols + 1):
+        x = min(j * CELL_WIDTH, width - 1)
+        draw.line([(x, title_height), (x, bottom)], fill="black")
+
+    # Text
+    for i, row in enumerate(grid):
+        y = title_height + i * CELL_HEIGHT + PADDING
+        for j, text in enumerate(row):
+            if text:
+                draw.text((j * CELL_WIDTH + PADDING, y), text, fill="black", font=cell_font)
+    return image
+
+
+def render_table_png(rows: list, columns: list, title: str) -> bytes:
+    key = table_digest(rows, columns, title)
+    with _image_cache_lock:
+        if key in _image_cache:
+            _image_cache.move_to_end(key)
+            return _image_cache[key]
+
+    with profiler.span("render_table_png"):
+        buf = io.BytesIO()
+        render_table(rows, columns, title).save(buf, format="PNG")
+        png = buf.getvalue()
+
+    with _image_cache_lock:
+        _image_cache[key] = png
+        while len(_image_cache) > IMAGE_CACHE_SIZE:
+            _image_cache.popitem(last=False)
+    return png
+
+
+def generate_table_image(data: "pd.DataFrame", title: str) -> io.BytesIO:
+    return io.BytesIO(render_table_png(data.values.tolist(), list(data.columns), title))
+
+
+def png_download_button(rows: list, columns: list, title: str, file_name: str, key: str, label: str = "📥 Download PNG"):
+    """Render the PNG only after the user asks for it; later reruns reuse the cached bytes."""
+    import streamlit as st
+
+    digest = table_digest(rows, columns, title)
+    if st.session_state.get(key) != digest:
+        if not st.button("🖼️ Prepare PNG", key=f"{key}_prepare"):
+            return
+        st.session_state[key] = digest
+    st.download_button(
+        label=label,
+        data=render_table_png(rows, columns, title),
+        file_name=file_name,
+        mime="image/png",
+        key=f"{key}_download"
+    )
@@ -0,0 +1,125 @@
+"""Lightweight timing spans for the app's hot paths.
+
+    with profiler.span("check_clashes"):
+        ...
+
+    @profiler.timed("render_table_png")
+    def render_table_png(...): ...
+
+Spans are grouped per Streamlit rerun between ``start_run`` and
+``end_run``; the last ``MAX_RUNS`` runs are kept for the performance panel
+and every span also feeds process-wide call counts. Timing is always on
+(two ``perf_counter`` calls); memory deltas are only collected while
+``enable_memory`` has tracemalloc running, since tracing slows everything
+down. tracemalloc sees the whole process, so deltas from concurrent
+sessions can mix.
+"""
+import cProfile
+import functools
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+MAX_RUNS = 20
+
+_local = threading.local()
+_lock = threading.Lock()
+_runs = deque(maxlen=MAX_RUNS)
+_totals = {}  # name -> [calls, seconds]
+
+
+# ------------------ Spans ------------------
+@contextmanager
+def span(name):
+    tracing = tracemalloc.is_tracing()
+    memory_before = tracemalloc.get_traced_memory()[0] if tracing else None
+    started = time.perf_counter()
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        _local.depth = depth
+        memory = tracemalloc.get_traced_memory()[0] - memory_before if tracing and tracemalloc.is_tracing() else None
+        run = getattr(_local, "run", None)
+        if run is not None:
+            run["spans"].append({"name": name, "seconds": seconds, "memory": memory, "depth": depth})
+        with _lock:
+            total = _totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+
+
+def timed(name=None):
+    """Decorator form of ``span``; the span name defaults to the function name."""
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ------------------ Runs ------------------
+def start_run(label):
+    _local.run = {"label": label, "started": time.time(), "spans": []}
+    _local.depth = 0
+
+
+def end_run():
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is not None:
+        with _lock:
+            _runs.append(run)
+    return run
+
+
+def recent_runs():
+    with _lock:
+        return list(reversed(_runs))
+
+
+def totals():
+    """{name: (calls, seconds)} since the process started."""
+    with _lock:
+        return {name: tuple(values) for name, values in _totals.items()}
+
+
+def summarize(run):
+    """Per span name: calls, total and max seconds, summed memory delta."""
+    summary = {}
+    for item in run["spans"]:
+        entry = summary.setdefault(item["name"], {"calls": 0, "seconds": 0.0, "max": 0.0, "memory": None})
+        entry["calls"] += 1
+        entry["seconds"] += item["seconds"]
+        entry["max"] = max(entry["max"], item["seconds"])
+        if item["memory"] is not None:
+            entry["memory"] = (entry["memory"] or 0) + item["memory"]
+    return summary
+
+
+# ------------------ Memory / cProfile ------------------
+def enable_memory(enabled=True):
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+@contextmanager
+def profile_to(path):
+    """Run the block under cProfile and dump the stats to ``path`` (open with pstats or snakeviz)."""
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        profile.dump_stats(str(path))